@@ -1,33 +1,9 @@
 import json
-import re
 
-def parse_dzn(file_path):
-    with open(file_path, 'r') as file:
-        data = file.read()
-
-    parsed_data = {}
-
-    pattern = r'(\w+)\s*=\s*(\[[^\]]*\]|\d+);'
-    matches = re.findall(pattern, data, re.DOTALL)
-
-    for key, value in matches:
-        if value.startswith('['):  # Handling lists
-            value = value.replace('|', '').replace('\n', ' ').strip('[]')  # Remove | and newlines
-            parsed_data[key] = list(map(int, re.findall(r'\d+', value)))  # Extract numbers safely
-        else:
-            parsed_data[key] = int(value)  # Convert to integer
+from models.parser import Parser
 
-    supply_cost_match = re.search(r'SupplyCost\s*=\s*\[\|(.*?)\|\];', data, re.DOTALL)
-    if supply_cost_match:
-        supply_cost_str = supply_cost_match.group(1).strip().replace('\n', ' ')
-        parsed_data["SupplyCost"] = [list(map(int, re.findall(r'\d+', row))) for row in supply_cost_str.split('|')]
-
-    incompatible_match = re.search(r'IncompatiblePairs\s*=\s*\[\|(.*?)\|\];', data, re.DOTALL)
-    if incompatible_match:
-        incompatible_str = incompatible_match.group(1).strip().replace('\n', ' ')
-        parsed_data["IncompatiblePairs"] = [list(map(int, re.findall(r'\d+', row))) for row in incompatible_str.split('|')]
-
-    return parsed_data
+def parse_dzn(file_path):
+    return Parser.parse_dzn(file_path)
 
 # # Convert to JSON
 # dzn_file = "instances/toy.dzn"
@@ -48,12 +24,13 @@ instance_files = [
         # Add more instance files as needed
     ]
 
-for file_path in instance_files:
-    # Convert to JSON
-    json_output = parse_dzn(file_path)
+if __name__ == "__main__":
+    for file_path in instance_files:
+        # Convert to JSON
+        json_output = parse_dzn(file_path)
 
-    # Save as JSON file
-    with open(f"parsed_{file_path}.json", "w") as json_file:
-        json.dump(json_output, json_file, indent=2)
+        # Save as JSON file
+        with open(f"parsed_{file_path}.json", "w") as json_file:
+            json.dump(json_output, json_file, indent=2)
 
-    print(json.dumps(json_output, indent=2))
+        print(json.dumps(json_output, indent=2))
@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.parser import Parser
+from models.search_random import SearchRandom
+from solver.Tweaks import Tweaks
+from solver.solver import Solver
+from solver.validator import Validator
+
+
+instance_files = [f"instances/wlp0{i}.dzn" for i in range(1, 9)]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run_pipeline(instance, iterations):
+    """Construction followed by a short tweak run; returns costs, validity and timings."""
+    solution, construct_time = timed(lambda: Solver.initial_solution(instance))
+    split, solve_time = timed(lambda: Solver(instance).solve())
+    split.fitness()
+    improved, tweak_time = timed(lambda: Tweaks.tweak_with_iterations(solution, instance, iterations=iterations,
+                                                                      rnd=SearchRandom(0)))
+    return {
+        "construct": construct_time,
+        "solve": solve_time,
+        "tweak": tweak_time,
+        "cost": improved.fitness_score,
+        "solve_cost": split.fitness_score,
+        "valid": Validator(instance, improved).validate() and Validator(instance, split).validate(),
+    }
+
+
+if __name__ == "__main__":
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    iterations = 50
+    parser = Parser()
+
+    print(f"{'instance':<8} {'reduce':>7} {'kept%':>6} {'dom':>4} "
+          f"{'construct':>14} {'solve':>14} {'tweak x' + str(iterations):>14} {'cost full/reduced':>22} valid")
+    for file_path in instance_files:
+        full = parser.parse_instance(file_path)
+        reduced, reduce_time = timed(lambda: full.reduce(k))
+        reduction = reduced.reduction
+
+        a = run_pipeline(full, iterations)
+        b = run_pipeline(reduced, iterations)
+
+        kept = 100.0 * sum(len(c) for c in reduction.candidates) / (full.num_stores * full.num_warehouses)
+        print(f"{os.path.basename(file_path).split('.')[0]:<8} {reduce_time:>6.2f}s {kept:>5.1f}% "
+              f"{len(reduction.dominated_warehouses):>4} "
+              f"{a['construct']:>6.2f}/{b['construct']:<6.2f}s {a['solve']:>6.2f}/{b['solve']:<6.2f}s "
+              f"{a['tweak']:>6.2f}/{b['tweak']:<6.2f}s "
+              f"{a['cost']:>7}/{b['cost']:<7} {a['solve_cost']:>6}/{b['solve_cost']:<6} "
+              f"{a['valid'] and b['valid']}")
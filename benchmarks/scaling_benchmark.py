@@ -0,0 +1,95 @@
+import argparse
+import math
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.instance_generator import InstanceGenerator
+from models.parser import Parser
+from models.search_random import SearchRandom
+from solver.Tweaks import Tweaks
+from solver.alns import ALNS
+from solver.solver import Solver
+from solver.validator import Validator
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def measure(num_stores: int, warehouse_ratio: float, args) -> dict:
+    """Generate, parse, construct, evaluate and improve one instance. Runs in a fresh process per size,
+    so the peak RSS after each phase belongs to this instance only."""
+    path = os.path.join(args.output_dir, f"synthetic_{num_stores}.dzn")
+    generator = InstanceGenerator(num_stores, max(1, int(num_stores * warehouse_ratio)), args.tightness,
+                                  args.cost_structure, args.conflict_degree, seed=args.seed)
+    _, generate_time = timed(lambda: InstanceGenerator.write_dzn(generator.generate(), path))
+    row = {"stores": num_stores, "warehouses": generator.num_warehouses,
+           "file_mb": os.path.getsize(path) / 2 ** 20, "generate": generate_time}
+
+    instance, row["parse"] = timed(lambda: Parser().parse_instance(path))
+    row["parse_rss"] = peak_rss_mb()
+    solution, row["construct"] = timed(lambda: Solver.initial_solution(instance))
+    _, row["fitness"] = timed(solution.fitness)
+    improved, row["tweak"] = timed(lambda: Tweaks.tweak_with_iterations(solution, instance, iterations=args.tweaks,
+                                                                        rnd=SearchRandom(args.seed)))
+    improved, row["alns"] = timed(lambda: ALNS(instance, iterations=args.alns, effort="stores",
+                                               rnd=SearchRandom(args.seed)).run(improved))
+    row["peak_rss"] = peak_rss_mb()
+    row["cost"] = improved.fitness_score
+    row["valid"] = Validator(instance, improved).validate()
+
+    if not args.keep:
+        os.remove(path)
+    return row
+
+
+def growth(rows, key) -> str:
+    """Log-log slope between the smallest and largest instance: ~1 linear, ~2 quadratic in the store count."""
+    first, last = rows[0], rows[-1]
+    if first[key] <= 0 or last[key] <= 0 or first["stores"] == last["stores"]:
+        return "  n/a"
+    return f"{math.log(last[key] / first[key]) / math.log(last['stores'] / first['stores']):5.2f}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and memory of the pipeline on growing synthetic instances.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 2000, 5000, 10000, 20000])
+    parser.add_argument("--warehouse-ratio", type=float, default=0.05, help="Warehouses per store")
+    parser.add_argument("--tightness", type=float, default=0.45)
+    parser.add_argument("--cost-structure", choices=InstanceGenerator.COST_STRUCTURES, default="geometric")
+    parser.add_argument("--conflict-degree", type=float, default=10.0)
+    parser.add_argument("--tweaks", type=int, default=10000, help="tweak_with_iterations iterations")
+    parser.add_argument("--alns", type=int, default=100, help="ALNS iterations")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output-dir", default="output/synthetic")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated .dzn files")
+    args = parser.parse_args()
+
+    phases = ["generate", "parse", "construct", "fitness", "tweak", "alns"]
+    print(f"{'stores':>7} {'wh':>5} {'MB':>7} " + " ".join(f"{p + ' s':>10}" for p in phases)
+          + f" {'parse RSS':>10} {'peak RSS':>9} {'cost':>10} valid")
+
+    rows = []
+    for size in args.sizes:
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            row = executor.submit(measure, size, args.warehouse_ratio, args).result()
+        rows.append(row)
+        print(f"{row['stores']:>7} {row['warehouses']:>5} {row['file_mb']:>7.1f} "
+              + " ".join(f"{row[p]:>10.3f}" for p in phases)
+              + f" {row['parse_rss']:>8.0f}MB {row['peak_rss']:>7.0f}MB {row['cost']:>10} {row['valid']}")
+
+    if len(rows) > 1:
+        print(f"{'growth':>21} " + " ".join(f"{growth(rows, p):>10}" for p in phases)
+              + f" {growth(rows, 'parse_rss'):>10} {growth(rows, 'peak_rss'):>9}")
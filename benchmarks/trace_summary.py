@@ -0,0 +1,55 @@
+import argparse
+import csv
+import glob
+import os
+import re
+import sys
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from solver.trace import load_trace, summary_curve
+
+
+def group_name(trace_path: str) -> str:
+    """Batch runner trace name without the seed, so all seeds of one configuration are merged."""
+    name = os.path.basename(trace_path).rsplit('.', 1)[0]
+    return re.sub(r"__s\d+(?=__)", "", name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge convergence traces of many runs into summary curves.")
+    parser.add_argument("traces", nargs="*", default=["output/traces/*.csv"],
+                        help="Trace files or glob patterns (.csv or .npy)")
+    parser.add_argument("--axis", choices=["time", "iteration"], default="time")
+    parser.add_argument("--points", type=int, default=100, help="Grid points per curve")
+    parser.add_argument("--output", default="output/trace_summary.csv")
+    args = parser.parse_args()
+
+    groups = defaultdict(list)
+    for path in sorted({path for pattern in args.traces for path in glob.glob(pattern)}):
+        groups[group_name(path)].append(load_trace(path))
+    if not groups:
+        parser.error("no trace files found")
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(args.output, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["group", args.axis, "runs", "min", "median", "mean", "max"])
+        print(f"{'group':<60} {'runs':>4} {'final min':>10} {'median':>10} {'max':>10}")
+        for name, traces in sorted(groups.items()):
+            curve = summary_curve(traces, axis=args.axis, points=args.points)
+            for i in range(len(curve[args.axis])):
+                writer.writerow([name, f"{curve[args.axis][i]:.6f}", int(curve["runs"][i])]
+                                + [f"{curve[key][i]:.1f}" for key in ("min", "median", "mean", "max")])
+            print(f"{name:<60} {len(traces):>4} {curve['min'][-1]:>10.0f} {curve['median'][-1]:>10.0f} "
+                  f"{curve['max'][-1]:>10.0f}")
+
+    print(f"Summary curves written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import argparse
+import glob
+import itertools
+import math
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.parser import Parser
+from models.search_random import SearchRandom
+from solver.batch_runner import IMPROVEMENTS, instance_name
+from solver.solver import Solver
+from solver.tuned_config import DEFAULT_PARAMS, SIZE_CLASSES, TunedConfig, size_class
+from solver.validator import Validator
+
+# Candidate values of each tunable parameter; the defaults are always among them
+GRIDS = {
+    "tweak_with_iterations1": {
+        "temperature": [10.0, 100.0, 1000.0],
+        "cooling": [0.99, 0.995, 0.999, 0.9995],
+        "iterations": [1000, 10000, 50000],
+    },
+    "warehouse_ga": {
+        "mutation_rate": [0.005, 0.02, 0.05],
+        "tournament_size": [2, 3, 5],
+    },
+}
+
+_instances = {}  # per worker process: instance path -> (instance, initial solution)
+
+
+def evaluate(method: str, params: dict, instance_path: str, seed: int, time_limit: float) -> float:
+    """
+    Cost of one run of the method with the given parameters; invalid or failed runs cost infinity. Like
+    batch_runner.execute_run, any exception only fails this run, so one bad configuration cannot stop the race.
+    """
+    params = dict(params)
+    iterations = params.pop("iterations", 1000)
+    try:
+        if instance_path not in _instances:
+            instance = Parser().parse_instance(instance_path)
+            _instances[instance_path] = (instance, Solver.initial_solution(instance))
+        instance, solution = _instances[instance_path]
+
+        improved = IMPROVEMENTS[method](solution, instance, iterations, time_limit, SearchRandom(seed),
+                                        None, None, **params)
+        if improved.fitness_score is None:
+            improved.fitness()
+        return improved.fitness_score if Validator(instance, improved).validate() else math.inf
+    except Exception:
+        # The whole traceback: in the race the failure is otherwise only an infinite cost
+        print(f"  {method} {params} on {instance_name(instance_path)} seed {seed} failed:\n"
+              f"{traceback.format_exc()}", flush=True)
+        return math.inf
+
+
+def configurations(grid: Dict[str, list]) -> List[dict]:
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def sign_test(wins: int, losses: int) -> float:
+    """One-sided p-value of `wins` successes in wins + losses fair coin flips (ties are left out)."""
+    n = wins + losses
+    return sum(math.comb(n, k) for k in range(wins, n + 1)) / 2 ** n if n else 1.0
+
+
+class Race:
+    """
+    Racing over configurations: every block (an instance and a seed) runs all surviving configurations on the
+    process pool, then each configuration is compared with the leader (lowest mean cost relative to the block's
+    best) by a paired sign test, and dropped once it is worse with p < alpha. A block on which every surviving
+    configuration fails stops the race with a RuntimeError, as there is no winner to report.
+    """
+
+    def __init__(self, method: str, configs: List[dict], blocks: List[Tuple[str, int]], time_limit: float,
+                 executor: ProcessPoolExecutor, alpha: float = 0.05, min_blocks: int = 5):
+        self.method = method
+        self.configs = configs
+        self.blocks = blocks
+        self.time_limit = time_limit
+        self.executor = executor
+        self.alpha = alpha
+        self.min_blocks = min_blocks
+        self.costs: List[List[float]] = [[] for _ in configs]  # config index -> cost per block
+
+    def relative(self, index: int, alive: List[int]) -> float:
+        """Mean cost of the configuration relative to the best surviving configuration of each block."""
+        ratios = []
+        for block in range(len(self.costs[index])):
+            best = min(self.costs[i][block] for i in alive)
+            cost = self.costs[index][block]
+            ratios.append(1.0 if cost == best else math.inf if math.isinf(cost) else cost / best)
+        return sum(ratios) / len(ratios)
+
+    def run(self) -> Tuple[dict, List[int]]:
+        """Best configuration and the indices of all configurations that survived to the end."""
+        alive = list(range(len(self.configs)))
+        for number, (instance_path, seed) in enumerate(self.blocks, start=1):
+            futures = {i: self.executor.submit(evaluate, self.method, self.configs[i], instance_path, seed,
+                                               self.time_limit) for i in alive}
+            for i, future in futures.items():
+                self.costs[i].append(future.result())
+            if all(math.isinf(self.costs[i][-1]) for i in alive):
+                raise RuntimeError(f"Every configuration of {self.method} failed on {instance_name(instance_path)} "
+                                   f"seed {seed}")
+
+            leader = min(alive, key=lambda i: self.relative(i, alive))
+            if number >= self.min_blocks:
+                survivors = []
+                for i in alive:
+                    wins = sum(a < b for a, b in zip(self.costs[leader], self.costs[i]))
+                    losses = sum(a > b for a, b in zip(self.costs[leader], self.costs[i]))
+                    if i == leader or sign_test(wins, losses) >= self.alpha:
+                        survivors.append(i)
+                alive = survivors
+
+            print(f"  block {number}/{len(self.blocks)} {instance_name(instance_path)} seed {seed}: "
+                  f"{len(alive)} configs alive, leader {self.configs[leader]}")
+            if len(alive) == 1:
+                break
+
+        return self.configs[min(alive, key=lambda i: self.relative(i, alive))], alive
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Race solver parameter configurations per instance size class.")
+    parser.add_argument("instances", nargs="*", default=["instances/*.dzn"], help="Instance files or glob patterns")
+    parser.add_argument("--methods", default=",".join(GRIDS), help=f"Comma separated: {', '.join(GRIDS)}")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2, 3, 4])
+    parser.add_argument("--time-limit", type=float, default=5.0, help="Seconds per run, the same for every config")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Significance level for dropping a config")
+    parser.add_argument("--min-blocks", type=int, default=5, help="Blocks before the first elimination")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="config/tuned.json")
+    args = parser.parse_args()
+
+    paths = sorted({path for pattern in args.instances for path in glob.glob(pattern)})
+    classes = {name: [] for name, _ in SIZE_CLASSES}
+    for path in paths:
+        instance = Parser().parse_instance(path)
+        classes[size_class(instance.num_stores, instance.num_warehouses)].append(path)
+
+    config = TunedConfig.load(args.output) if os.path.exists(args.output) else TunedConfig()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for method in args.methods.split(","):
+            if method not in GRIDS:
+                parser.error(f"unknown method '{method}', expected one of {', '.join(GRIDS)}")
+            for size, size_paths in classes.items():
+                if not size_paths:
+                    continue
+                # Seed-major order, so the early blocks already cover every instance of the class
+                blocks = [(path, seed) for seed in args.seeds for path in size_paths]
+                print(f"{method} / {size}: {len(configurations(GRIDS[method]))} configs, "
+                      f"{len(blocks)} blocks")
+                race = Race(method, configurations(GRIDS[method]), blocks, args.time_limit, executor,
+                            alpha=args.alpha, min_blocks=args.min_blocks)
+                try:
+                    best, alive = race.run()
+                except RuntimeError as e:
+                    # Keep the previous configuration of this class rather than an arbitrary failed one
+                    print(f"{method} / {size}: race stopped: {e}")
+                    continue
+                print(f"{method} / {size}: best {best} (default {DEFAULT_PARAMS[method]}), "
+                      f"{len(alive)} survivors")
+                config.set(method, size, best)
+                # Saved after every race, so an interrupted tuning session keeps what it finished
+                config.save(args.output)
+
+    print(f"Tuned configuration written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
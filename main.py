@@ -1,60 +1,68 @@
-import copy
-
-from models.parser import Parser
-from solver.InitialSolution import InitialSolution
-from solver.Tweaks import Tweaks
-from solver.solver import Solver
-from solver.validator import Validator
-
-
-parser = Parser()
-
-instance_files = [
-        # "parsed_instances/wlp01.dzn.json",
-        "parsed_instances/wlp02.dzn.json",
-        # "parsed_instances/wlp03.dzn.json",
-        # "parsed_instances/wlp04.dzn.json",
-    ]
+import argparse
+import json
+
+from solver.batch_runner import BatchRunner, CONSTRUCTORS, IMPROVEMENTS
+
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser(description="Solve a batch of warehouse location instances.")
+    arg_parser.add_argument("instances", nargs="*", default=["parsed_instances/wlp02.dzn.json"],
+                            help="Instance files or glob patterns (.dzn or parsed .json)")
+    arg_parser.add_argument("--constructors", default="initial_solution",
+                            help=f"Comma separated constructors: {', '.join(CONSTRUCTORS)}")
+    arg_parser.add_argument("--improvements", default="tweak_with_iterations",
+                            help=f"Comma separated improvement methods: {', '.join(IMPROVEMENTS)}")
+    arg_parser.add_argument("--seeds", type=int, nargs="+", default=[0])
+    arg_parser.add_argument("--iterations", type=int, default=1000)
+    arg_parser.add_argument("--time-limit", type=float, default=None,
+                            help="Time limit in seconds for the improvement phase of each run")
+    arg_parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    arg_parser.add_argument("--output-dir", default="output")
+    arg_parser.add_argument("--checkpoint-interval", type=float, default=60.0,
+                            help="Seconds between search checkpoints written under <output-dir>/checkpoints")
+    arg_parser.add_argument("--resume", action="store_true",
+                            help="Skip runs already recorded in the results CSV and continue interrupted "
+                                 "searches from their last checkpoint")
+    arg_parser.add_argument("--config", default=None,
+                            help="Tuned parameter file written by benchmarks/tune.py (e.g. config/tuned.json)")
+    arg_parser.add_argument("--store", default=None,
+                            help="Best known solution store (SQLite, e.g. output/best_known.sqlite): valid results "
+                                 "are recorded there and the 'best_known' constructor warm-starts from it")
+    arg_parser.add_argument("--targets", default=None,
+                            help="JSON file of target costs per instance name, e.g. {\"wlp01\": 32000}; runs on "
+                                 "instances whose stored best meets the target are skipped")
+    arg_parser.add_argument("--cost-dir", default=None,
+                            help="Directory for memory-mapped supply cost matrices (e.g. output/costs): each instance's "
+                                 "costs are written there once in the narrowest integer dtype and mapped from disk, "
+                                 "for instances too large to hold as Python lists")
+    arg_parser.add_argument("--reduce-k", type=int, default=None,
+                            help="Restrict every store to its k best candidate warehouses (see Instance.reduce), so "
+                                 "constructors and improvements search the reduced graph")
+    return arg_parser.parse_args()
 
 
 if __name__ == "__main__":
-
-    for file_path in instance_files:
-        print(f"Solving instance: {file_path}")
-
-        instance = parser.parse_instance(file_path)
-
-        # solver = Solver(instance)
-        # initial_solution = solver.solve()
-
-        # init = InitialSolution(instance)
-
-        sol = Solver.initial_solution(copy.deepcopy(instance))
-        # sol.fitness()
-        # sol = init.generate_valid_solution()
-
-        improved = Tweaks.tweak_with_iterations(sol, instance)
-
-        # output_path = f"output/{file_path.split('/')[-1].replace('.dzn.json', '.txt')}"
-        # initial_solution.export(output_path)
-
-        is_valid = Validator(instance, sol).validate()
-        is_valid_improved = Validator(instance, improved).validate()
-
-        print(f"Initial score: {sol.fitness_score}")
-        print(f"Solution score: {improved.fitness_score}")
-        # print(f"Exported to: {output_path}")
-        print(f"Valid: {'Yes' if is_valid else 'No'}")
-        print(f"Valid: {'Yes' if is_valid_improved else 'No'}")
-
-
-# if __name__ == "__main__":
-#
-#     for file_path in instance_files:
-#         instance = parser.parse_instance(file_path)
-#         initial_solution = parser.parse_solution("output/" + file_path.split("/")[1].split(".")[0] + ".txt", instance)
-#         initial_solution.fitness()
-#
-#         improved = Tweaks.move_store_allocation(initial_solution, instance)
-#         print(improved.fitness_score)
-#         print(Validator(instance, improved).validate())
\ No newline at end of file
+    args = parse_args()
+
+    targets = None
+    if args.targets:
+        with open(args.targets) as file:
+            targets = json.load(file)
+
+    runner = BatchRunner(
+        instance_patterns=args.instances,
+        constructors=args.constructors.split(","),
+        improvements=args.improvements.split(","),
+        seeds=args.seeds,
+        iterations=args.iterations,
+        time_limit=args.time_limit,
+        workers=args.workers,
+        output_dir=args.output_dir,
+        checkpoint_interval=args.checkpoint_interval,
+        config_path=args.config,
+        store_path=args.store,
+        targets=targets,
+        cost_dir=args.cost_dir,
+        reduce_k=args.reduce_k,
+    )
+    runner.run(resume=args.resume)
@@ -0,0 +1,132 @@
+import heapq
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class ConflictGraph:
+    """
+    Store incompatibility graph, built once when the instance is loaded.
+    Adjacency is kept in CSR form: the neighbours of store s are indices[indptr[s]:indptr[s + 1]].
+    """
+
+    def __init__(self, num_stores: int, incompatible_pairs: Sequence[Tuple[int, int]]):
+        self.num_stores = num_stores
+
+        pairs = np.array(incompatible_pairs, dtype=np.int64).reshape(-1, 2)
+        # Both directions, without self loops or duplicates
+        edges = np.concatenate([pairs, pairs[:, ::-1]])
+        edges = edges[edges[:, 0] != edges[:, 1]]
+        edges = np.unique(edges, axis=0)
+
+        self.degrees = np.bincount(edges[:, 0], minlength=num_stores).astype(np.int32)
+        self.indptr = np.zeros(num_stores + 1, dtype=np.int64)
+        np.cumsum(self.degrees, out=self.indptr[1:])
+        self.indices = edges[:, 1].astype(np.int32)  # np.unique sorted rows, so already grouped by store
+
+        self.component_labels, self.num_components = self.find_components()
+        self.cliques: List[List[int]] = self.find_cliques()
+        self.max_clique: List[int] = max(self.cliques, key=len) if self.cliques else []
+
+    def neighbors(self, store_id: int) -> np.ndarray:
+        return self.indices[self.indptr[store_id]:self.indptr[store_id + 1]]
+
+    def find_components(self) -> Tuple[np.ndarray, int]:
+        """Connected components by breadth-first search over the CSR arrays."""
+        labels = np.full(self.num_stores, -1, dtype=np.int32)
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        component = 0
+
+        for start in range(self.num_stores):
+            if labels[start] >= 0:
+                continue
+            labels[start] = component
+            queue = [start]
+            while queue:
+                store = queue.pop()
+                for other in indices[indptr[store]:indptr[store + 1]]:
+                    if labels[other] < 0:
+                        labels[other] = component
+                        queue.append(other)
+            component += 1
+
+        return labels, component
+
+    def find_cliques(self) -> List[List[int]]:
+        """
+        Greedy maximal cliques: each store, taken by decreasing degree, seeds a clique that is grown
+        with its highest degree neighbours adjacent to every member. Only distinct cliques of size >= 3 are kept.
+        """
+        adjacency = [set(self.neighbors(s).tolist()) for s in range(self.num_stores)]
+        degrees = self.degrees.tolist()
+        seen = set()
+        cliques = []
+
+        for seed in sorted(range(self.num_stores), key=lambda s: -degrees[s]):
+            if degrees[seed] < 2:
+                break
+            clique = [seed]
+            candidates = adjacency[seed]
+            for other in sorted(adjacency[seed], key=lambda s: -degrees[s]):
+                if other in candidates:
+                    clique.append(other)
+                    candidates = candidates & adjacency[other]
+
+            key = tuple(sorted(clique))
+            if len(clique) >= 3 and key not in seen:
+                seen.add(key)
+                cliques.append(list(key))
+
+        cliques.sort(key=len, reverse=True)
+        return cliques
+
+    def dsatur_order(self) -> List[int]:
+        """
+        DSatur colouring order: repeatedly take the store whose neighbours already use the most distinct
+        colours (ties by degree), so highly conflicting stores come first. Uses a lazy max-heap.
+        """
+        degrees = self.degrees.tolist()
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+
+        colors = [-1] * self.num_stores
+        neighbor_colors = [set() for _ in range(self.num_stores)]
+        heap = [(0, -degrees[s], s) for s in range(self.num_stores)]
+        heapq.heapify(heap)
+        order = []
+
+        while heap:
+            neg_saturation, _, store = heapq.heappop(heap)
+            if colors[store] >= 0 or -neg_saturation != len(neighbor_colors[store]):
+                continue  # stale heap entry
+
+            color = 0
+            while color in neighbor_colors[store]:
+                color += 1
+            colors[store] = color
+            order.append(store)
+
+            for other in indices[indptr[store]:indptr[store + 1]]:
+                if colors[other] < 0 and color not in neighbor_colors[other]:
+                    neighbor_colors[other].add(color)
+                    heapq.heappush(heap, (-len(neighbor_colors[other]), -degrees[other], other))
+
+        return order
+
+    def store_order(self, order: str = "index", demands: Optional[Sequence[int]] = None) -> List[int]:
+        """Order in which a constructor should place stores: 'index', 'degree' or 'dsatur'."""
+        if order == "index":
+            return list(range(self.num_stores))
+        if order == "degree":
+            demands = demands if demands is not None else [0] * self.num_stores
+            return sorted(range(self.num_stores), key=lambda s: (-self.degrees[s], -demands[s], s))
+        if order == "dsatur":
+            return self.dsatur_order()
+        raise ValueError(f"Unknown store order '{order}', expected 'index', 'degree' or 'dsatur'")
+
+    def summary(self) -> str:
+        return (f"Conflict edges: {len(self.indices) // 2}\n"
+                f"Max degree: {int(self.degrees.max()) if self.num_stores else 0}\n"
+                f"Components: {self.num_components}\n"
+                f"Largest clique found: {len(self.max_clique)}")
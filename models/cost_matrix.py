@@ -0,0 +1,168 @@
+import os
+import re
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Working set of the chunked passes over the supply cost matrix (values are widened to int64 inside a chunk)
+CHUNK_BYTES = 64 * 1024 * 1024
+
+# Candidates for the stored dtype, narrowest first
+INTEGER_DTYPES = (np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32, np.int64)
+
+
+def narrowest_dtype(low: int, high: int) -> np.dtype:
+    """Smallest integer dtype holding every value in [low, high]."""
+    for dtype in INTEGER_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+    raise ValueError(f"Values in [{low}, {high}] do not fit in 64 bits")
+
+
+def row_chunks(num_rows: int, num_columns: int, itemsize: int = 8) -> Iterator[Tuple[int, int]]:
+    """(start, stop) row ranges whose num_columns wide blocks of itemsize values stay within CHUNK_BYTES."""
+    step = max(1, CHUNK_BYTES // max(1, num_columns * itemsize))
+    for start in range(0, num_rows, step):
+        yield start, min(start + step, num_rows)
+
+
+def iter_dzn_rows(file_path: str, key: str = "SupplyCost") -> Iterator[np.ndarray]:
+    """Rows of a '[| a, b | c, d |]' matrix of a .dzn file, read line by line without loading the file."""
+    start = re.compile(rf'\s*{key}\s*=\s*\[\|')
+    buffer = None
+    with open(file_path, 'r') as file:
+        for line in file:
+            if buffer is None:
+                match = start.match(line)
+                if not match:
+                    continue
+                line = line[match.end():]
+                buffer = ''
+            buffer += line
+            end = buffer.find(']')
+            rows = (buffer[:end] if end >= 0 else buffer).split('|')
+            # Without the closing bracket the last segment may be a row cut at the line end
+            buffer = rows.pop() if end < 0 else ''
+            for row in rows:
+                if row.strip():
+                    yield np.fromstring(row, dtype=np.int64, sep=',')
+            if end >= 0:
+                return
+    if buffer is None:
+        raise ValueError(f"No {key} matrix in {file_path}")
+    raise ValueError(f"Unterminated {key} matrix in {file_path}")
+
+
+def write_cost_matrix(path: str, rows: Callable[[], Iterable], num_stores: int, num_warehouses: int) -> np.memmap:
+    """
+    Write the matrix to a .npy file in the narrowest dtype that fits and return it memory-mapped read-only.
+    `rows` returns a fresh iterator over the rows: one pass finds the value range, a second writes. The file is
+    written under a temporary name and renamed, so concurrent workers never map a partial file.
+    """
+    low, high, count = 0, 0, 0
+    for row in rows():
+        row = np.asarray(row, dtype=np.int64)
+        if row.size != num_warehouses:
+            raise ValueError(f"Supply cost row {count} has {row.size} values, expected {num_warehouses}")
+        if row.size:
+            low, high = min(low, int(row.min())), max(high, int(row.max()))
+        count += 1
+    if count != num_stores:
+        raise ValueError(f"Supply cost matrix has {count} rows, expected {num_stores}")
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    matrix = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=narrowest_dtype(low, high),
+                                       shape=(num_stores, num_warehouses))
+    for store_id, row in enumerate(rows()):
+        matrix[store_id] = row
+    matrix.flush()
+    del matrix
+    os.replace(tmp_path, path)
+    return open_cost_matrix(path)
+
+
+def open_cost_matrix(path: str) -> np.memmap:
+    return np.load(path, mmap_mode='r')
+
+
+def is_fresh(path: str, source_path: str) -> bool:
+    """True if the derived file exists and is at least as recent as the file it was built from."""
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source_path)
+
+
+def rank_rows(costs: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """
+    Column ids of every row sorted by increasing value (ties by id), in the narrowest index dtype, computed in
+    row chunks. `out` may be a memory-mapped array to keep the ranking on disk as well.
+    """
+    num_rows, num_columns = costs.shape
+    if out is None:
+        out = np.empty(costs.shape, dtype=narrowest_dtype(0, max(num_columns - 1, 0)))
+    for start, stop in row_chunks(num_rows, num_columns):
+        out[start:stop] = np.argsort(costs[start:stop], axis=1, kind='stable')
+    return out
+
+
+def cached_ranking(costs: np.memmap) -> np.memmap:
+    """rank_rows of a memory-mapped matrix, kept in a .order.npy file next to it and reused while fresh."""
+    base = costs.filename[:-len('.npy')] if costs.filename.endswith('.npy') else costs.filename
+    path = base + '.order.npy'
+    if not is_fresh(path, costs.filename):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        dtype = narrowest_dtype(0, max(costs.shape[1] - 1, 0))
+        order = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=dtype, shape=costs.shape)
+        rank_rows(costs, order)
+        order.flush()
+        del order
+        os.replace(tmp_path, path)
+    return np.load(path, mmap_mode='r')
+
+
+class CostVector:
+    """One row or column of a cost matrix that reads as a list of Python ints."""
+    __slots__ = ('values',)
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+
+    def __getitem__(self, index: int) -> int:
+        return int(self.values[index])
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values.tolist())
+
+
+class CostRows:
+    """
+    The [store][warehouse] list-of-lists interface of the parsed SupplyCost over a (memory-mapped) array, so
+    the per-move code keeps exact Python integer arithmetic whatever dtype the matrix is stored in. Row vectors
+    are created on first access and kept, as Solution.assign/unassign look a row up on every move.
+    """
+    __slots__ = ('matrix', 'rows', 'vectors')
+
+    def __init__(self, matrix: np.ndarray):
+        self.matrix = matrix
+        self.rows = np.asarray(matrix)  # plain ndarray view: slicing a memmap subclass is slower
+        self.vectors: List[Optional[CostVector]] = [None] * len(self.rows)
+
+    def __getitem__(self, store_id: int) -> CostVector:
+        vector = self.vectors[store_id]
+        if vector is None:
+            vector = self.vectors[store_id] = CostVector(self.rows[store_id])
+        return vector
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self):
+        return (self[store_id] for store_id in range(len(self.rows)))
+
+    def column(self, warehouse_id: int) -> CostVector:
+        return CostVector(self.rows[:, warehouse_id])
@@ -0,0 +1,85 @@
+from typing import List, Optional
+
+import numpy as np
+
+
+class FeasibilityReport:
+    """
+    Result of the pre-check: the reasons the instance cannot have a feasible solution (empty if none was found)
+    and a lower bound on the number of warehouses any feasible solution opens.
+    Passing the checks does not prove feasibility; failing one proves infeasibility.
+    """
+
+    def __init__(self, reasons: List[str], min_open_warehouses: int, single_source: bool):
+        self.reasons = reasons
+        self.min_open_warehouses = min_open_warehouses
+        self.single_source = single_source
+
+    @property
+    def feasible(self) -> bool:
+        return not self.reasons
+
+    def raise_if_infeasible(self) -> None:
+        if self.reasons:
+            raise ValueError("Instance is infeasible: " + "; ".join(self.reasons))
+
+    def summary(self) -> str:
+        status = "no infeasibility found" if self.feasible else "infeasible"
+        lines = [f"Feasibility ({'single source' if self.single_source else 'split demand'}): {status}",
+                 f"Min open warehouses: {self.min_open_warehouses}"]
+        return "\n".join(lines + [f"  - {reason}" for reason in self.reasons])
+
+
+def check_feasibility(instance, single_source: bool = False) -> FeasibilityReport:
+    """
+    Necessary conditions for a feasible solution, all vectorized over demands and capacities:
+    - total demand fits in the total capacity;
+    - with single sourcing, every store fits in at least one warehouse;
+    - bin-packing bound: the fewest warehouses whose largest capacities cover the total demand;
+    - conflict cliques: the stores of a clique need pairwise disjoint warehouse sets, so each needs at least as
+      many warehouses as its demand requires with the largest capacities, and these counts add up over the clique.
+    """
+    capacities = np.sort(np.array([w.capacity for w in instance.warehouses], dtype=np.int64))[::-1]
+    demands = np.array([s.demand for s in instance.stores], dtype=np.int64)
+    covered = np.cumsum(capacities)
+    reasons = []
+
+    total_demand = int(demands.sum())
+    if total_demand > covered[-1]:
+        reasons.append(f"total demand {total_demand} exceeds total capacity {int(covered[-1])}")
+
+    # Fewest warehouses that can hold the given demand (W + 1 if even all of them cannot)
+    def warehouses_needed(demand) -> np.ndarray:
+        return np.searchsorted(covered, demand, side='left') + 1
+
+    if single_source:
+        too_big = np.nonzero(demands > capacities[0])[0]
+        if too_big.size:
+            reasons.append(f"{too_big.size} store(s) have more demand than the largest capacity {int(capacities[0])}, "
+                           f"e.g. store {int(too_big[0])} with demand {int(demands[too_big[0]])}")
+        per_store = np.ones(len(demands), dtype=np.int64)
+    else:
+        per_store = warehouses_needed(demands)
+
+    min_open = int(min(warehouses_needed(total_demand), instance.num_warehouses))
+
+    graph = instance.conflict_graph
+    clique_bound: Optional[int] = None
+    worst_clique: List[int] = []
+    for clique in graph.cliques or ([graph.max_clique] if graph.max_clique else []):
+        bound = int(per_store[clique].sum())
+        if clique_bound is None or bound > clique_bound:
+            clique_bound, worst_clique = bound, clique
+    # Any conflict edge alone needs two warehouses
+    if clique_bound is None and len(graph.indices):
+        s = int(np.argmax(graph.degrees))
+        worst_clique = [s, int(graph.neighbors(s)[0])]
+        clique_bound = int(per_store[worst_clique].sum())
+
+    if clique_bound is not None:
+        if clique_bound > instance.num_warehouses:
+            reasons.append(f"stores {worst_clique} are pairwise incompatible and need at least {clique_bound} "
+                           f"separate warehouses, but there are only {instance.num_warehouses}")
+        min_open = max(min_open, min(clique_bound, instance.num_warehouses))
+
+    return FeasibilityReport(reasons, min_open, single_source)
@@ -1,10 +1,14 @@
-import random
+import time
+from typing import Optional
+
+from models.search_random import SearchRandom, default_random
 
 
 class GeneticAlgorithm:
     def __init__(self, population_size, chromosome_length, fitness_fn,
                  crossover_rate=0.8, mutation_rate=0.02, tournament_size=3, generations=100,
-                 initial_population=None):
+                 initial_population=None, rnd: Optional[SearchRandom] = None, trace=None,
+                 time_limit: Optional[float] = None, verbose: bool = True, lineage: bool = False):
         self.population_size = population_size
         self.chromosome_length = chromosome_length
         self.fitness_fn = fitness_fn
@@ -13,6 +17,14 @@ class GeneticAlgorithm:
         self.tournament_size = tournament_size
         self.generations = generations
         self.initial_population = initial_population
+        self.rnd = rnd or default_random()
+        self.trace = trace  # optional solver.trace.TraceRecorder; fitness is maximized, so it records fitness values
+        self.time_limit = time_limit  # seconds, checked once per generation
+        self.verbose = verbose
+        # With lineage, fitness_fn is called as fitness_fn(chromosome, parent): the parent chromosome the child
+        # takes most of its genes from (None in the initial population), for fitness functions that evaluate
+        # children incrementally
+        self.lineage = lineage
 
     def initialize_population(self):
         population = []
@@ -26,37 +38,63 @@ class GeneticAlgorithm:
 
         # Fill the rest of the population with random individuals
         while len(population) < self.population_size:
-            individual = [random.randint(0, 1) for _ in range(self.chromosome_length)]
+            individual = self.rnd.bits(self.chromosome_length).tolist()
             population.append(individual)
         return population
 
     def tournament_selection(self, population, fitnesses):
-        selected = random.sample(list(zip(population, fitnesses)), self.tournament_size)
+        selected = self.rnd.sample(list(zip(population, fitnesses)), self.tournament_size)
         return max(selected, key=lambda x: x[1])[0]
 
     def crossover(self, parent1, parent2):
-        if random.random() < self.crossover_rate:
-            point = random.randint(1, self.chromosome_length - 1)
-            return parent1[:point] + parent2[point:]
-        return parent1[:], parent2[:]
+        (child1, _), (child2, _) = self.crossover_with_parents(parent1, parent2)
+        return child1, child2
+
+    def crossover_with_parents(self, parent1, parent2):
+        """Both children, each with the parent that contributes most of its genes."""
+        if self.rnd.random() < self.crossover_rate:
+            point = self.rnd.randint(1, self.chromosome_length - 1)
+            head = 2 * point >= self.chromosome_length
+            return ((parent1[:point] + parent2[point:], parent1 if head else parent2),
+                    (parent2[:point] + parent1[point:], parent2 if head else parent1))
+        return (parent1[:], parent1), (parent2[:], parent2)
+
+    def evaluate(self, population, parents):
+        if self.lineage:
+            return [self.fitness_fn(ind, parent) for ind, parent in zip(population, parents)]
+        return [self.fitness_fn(ind) for ind in population]
 
     def mutate(self, chromosome):
-        return [gene if random.random() > self.mutation_rate else 1 - gene for gene in chromosome]
+        # One batch of uniforms per chromosome instead of a draw per gene
+        flips = (self.rnd.uniforms(len(chromosome)) < self.mutation_rate).tolist()
+        return [1 - gene if flip else gene for gene, flip in zip(chromosome, flips)]
 
     def run(self):
         population = self.initialize_population()
+        parents = [None] * len(population)
+        best_fitness = None
+        deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else None
         for gen in range(self.generations):
-            fitnesses = [self.fitness_fn(ind) for ind in population]
-            new_population = []
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            fitnesses = self.evaluate(population, parents)
+            new_population, new_parents = [], []
             while len(new_population) < self.population_size:
                 parent1 = self.tournament_selection(population, fitnesses)
                 parent2 = self.tournament_selection(population, fitnesses)
-                child1, child2 = self.crossover(parent1, parent2)
+                (child1, from1), (child2, from2) = self.crossover_with_parents(parent1, parent2)
                 new_population.append(self.mutate(child1))
+                new_parents.append(from1)
                 if len(new_population) < self.population_size:
                     new_population.append(self.mutate(child2))
-            population = new_population
-            print(f"Generation {gen}: Best fitness = {max(fitnesses)}")
-        # Return the best solution
+                    new_parents.append(from2)
+            population, parents = new_population, new_parents
+            if self.verbose:
+                print(f"Generation {gen}: Best fitness = {max(fitnesses)}")
+            if self.trace is not None:
+                best_fitness = max(fitnesses) if best_fitness is None else max(best_fitness, max(fitnesses))
+                self.trace.record(gen, max(fitnesses), best_fitness, "generation")
+        # Return the best solution of the final population (fitnesses above belong to the previous one)
+        fitnesses = self.evaluate(population, parents)
         best_idx = fitnesses.index(max(fitnesses))
         return population[best_idx], max(fitnesses)
@@ -1,20 +1,114 @@
-from typing import List
+import hashlib
+from typing import List, Tuple
 
+import numpy as np
+
+from models.conflict_graph import ConflictGraph
+from models.cost_matrix import CHUNK_BYTES, CostRows, cached_ranking, rank_rows, row_chunks
+from models.feasibility import FeasibilityReport, check_feasibility
+from models.read_only import ReadOnly
+from models.reduction import InstanceReduction
 from models.store import Store
 from models.warehouse import Warehouse
 
 
-class InstanceData:
+class InstanceData(ReadOnly):
+    """
+    Read-only problem instance. All search state (allocations, remaining capacities, suppliers)
+    lives in Solution, so a single instance can back any number of concurrent searches.
+    The supply costs are either the parsed lists (held as an int64 array) or a CostRows over a memory-mapped
+    file in the narrowest dtype; `costs` may then be unsigned and narrow, so widen it before doing arithmetic.
+    """
+    __slots__ = ('num_warehouses', 'num_stores', 'supply_costs_matrix', 'warehouses', 'stores',
+                 'incompatible_pairs', 'total_capacity', 'costs', 'fixed_costs', '_cost_order', 'reduction',
+                 'conflict_graph', '_feasibility', '_content_hash')
 
-    def __init__(self, num_warehouses, num_stores, supply_costs_matrix, warehouses, stores: List[Store], incompatible_pairs):
+    def __init__(self, num_warehouses, num_stores, supply_costs_matrix, warehouses, stores: List[Store],
+                 incompatible_pairs, reduction: InstanceReduction = None, conflict_graph: ConflictGraph = None):
         self.num_warehouses = num_warehouses
         self.num_stores = num_stores
         self.supply_costs_matrix = supply_costs_matrix
-        self.warehouses = warehouses
-        self.stores = stores
-        self.incompatible_pairs = incompatible_pairs
+        self.warehouses: Tuple[Warehouse, ...] = tuple(warehouses)
+        self.stores: Tuple[Store, ...] = tuple(stores)
+        self.incompatible_pairs: Tuple[Tuple[int, int], ...] = tuple(tuple(pair) for pair in incompatible_pairs)
         self.total_capacity = sum(w.capacity for w in warehouses)
 
+        # Numpy views used by the vectorized code paths
+        if isinstance(supply_costs_matrix, CostRows):
+            self.costs = supply_costs_matrix.matrix
+        else:
+            self.costs = np.asarray(supply_costs_matrix, dtype=np.int64)
+        self.costs.setflags(write=False)
+        self.fixed_costs = np.array([w.fixed_cost for w in warehouses], dtype=np.int64)
+        self.fixed_costs.setflags(write=False)
+
+        self.reduction = reduction
+        self.conflict_graph = conflict_graph or ConflictGraph(num_stores, self.incompatible_pairs)
+        self._feasibility = {}  # memo of check_feasibility per single_source flag
+
+    def cost_order(self) -> np.ndarray:
+        """Warehouse ids per store sorted by increasing supply cost (ties by id), computed once in row chunks."""
+        if not hasattr(self, '_cost_order'):
+            # A memory-mapped matrix gets its ranking on disk too, shared by every process opening the instance
+            order = cached_ranking(self.costs) if isinstance(self.costs, np.memmap) else rank_rows(self.costs)
+            order.setflags(write=False)
+            self._cost_order = order
+        return self._cost_order
+
+    def supply_cost(self, stores: np.ndarray, warehouses: np.ndarray, amounts: np.ndarray) -> int:
+        """Total supply cost of (store, warehouse, amount) triples, gathered from the cost matrix in chunks."""
+        total = 0
+        step = CHUNK_BYTES // 32  # a few int64 temporaries per triple
+        for start in range(0, len(stores), step):
+            chunk = slice(start, start + step)
+            unit_costs = self.costs[stores[chunk], warehouses[chunk]].astype(np.int64)
+            total += int(unit_costs @ np.asarray(amounts[chunk], dtype=np.int64))
+        return total
+
+    def reduce(self, k: int = 10) -> 'InstanceData':
+        """Copy of the instance where every store is restricted to a short list of candidate warehouses."""
+        return InstanceData(self.num_warehouses, self.num_stores, self.supply_costs_matrix, self.warehouses,
+                            self.stores, self.incompatible_pairs, reduction=InstanceReduction(self, k),
+                            conflict_graph=self.conflict_graph)
+
+    def candidate_warehouses(self, store_id: int) -> List[int]:
+        """Warehouses a solver should consider for the store, cheapest first."""
+        if self.reduction is not None:
+            return self.reduction.candidates[store_id]
+        return self.cost_order()[store_id].tolist()
+
+    def store_order(self, order: str = "index") -> List[int]:
+        """Order in which constructors place stores, see ConflictGraph.store_order."""
+        return self.conflict_graph.store_order(order, [s.demand for s in self.stores])
+
+    def feasibility(self, single_source: bool = False) -> FeasibilityReport:
+        """Fast necessary-condition check (capacity, bin packing, conflict cliques), computed once per mode."""
+        if single_source not in self._feasibility:
+            self._feasibility[single_source] = check_feasibility(self, single_source)
+        return self._feasibility[single_source]
+
+    def min_open_warehouses(self) -> int:
+        """Lower bound on the number of open warehouses in any feasible solution."""
+        return self.feasibility().min_open_warehouses
+
+    def content_hash(self) -> str:
+        """
+        SHA-256 of the instance data (capacities, fixed costs, demands, supply costs, incompatible pairs), so the
+        same instance gets the same key whatever file or format it was read from. Computed once.
+        """
+        if not hasattr(self, '_content_hash'):
+            digest = hashlib.sha256()
+            digest.update(np.array([self.num_stores, self.num_warehouses], dtype=np.int64).tobytes())
+            digest.update(np.array([w.capacity for w in self.warehouses], dtype=np.int64).tobytes())
+            digest.update(self.fixed_costs.tobytes())
+            digest.update(np.array([s.demand for s in self.stores], dtype=np.int64).tobytes())
+            # As int64 whatever the stored dtype, so a memory-mapped instance hashes like the parsed one
+            for start, stop in row_chunks(self.num_stores, self.num_warehouses):
+                digest.update(np.ascontiguousarray(self.costs[start:stop], dtype=np.int64).tobytes())
+            pairs = sorted({tuple(sorted(pair)) for pair in self.incompatible_pairs})
+            digest.update(np.array(pairs, dtype=np.int64).tobytes())
+            self._content_hash = digest.hexdigest()
+        return self._content_hash
 
     def summary(self) -> str:
         """Return a summary of the problem instance"""
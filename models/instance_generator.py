@@ -0,0 +1,145 @@
+import argparse
+import os
+from typing import Optional
+
+import numpy as np
+
+
+class InstanceGenerator:
+    """
+    Random warehouse location instances in the .dzn layout of instances/ (1-based incompatible pairs).
+    Defaults mirror the bundled wlp instances: demand 5-20, capacities 30-100 scaled so that total demand is
+    `tightness` times total capacity, fixed cost about 10 per unit of capacity, supply costs 0-140.
+
+    cost_structure:
+        'geometric'  stores and warehouses uniform in the unit square, cost proportional to distance
+        'clustered'  like geometric, but stores are grouped around a few centres
+        'random'     independent uniform costs
+    conflict_degree is the incompatibility density, as the mean number of incompatible partners per store.
+    """
+
+    COST_STRUCTURES = ("geometric", "clustered", "random")
+
+    def __init__(self, num_stores: int, num_warehouses: int, tightness: float = 0.45,
+                 cost_structure: str = "geometric", conflict_degree: float = 10.0,
+                 demand_range=(5, 20), fixed_cost_per_unit: float = 10.0, cost_scale: int = 100,
+                 seed: Optional[int] = None):
+        if cost_structure not in self.COST_STRUCTURES:
+            raise ValueError(f"Unknown cost structure '{cost_structure}', expected one of {self.COST_STRUCTURES}")
+        if not 0 < tightness <= 1:
+            raise ValueError(f"Capacity tightness must be in (0, 1], got {tightness}")
+
+        self.num_stores = num_stores
+        self.num_warehouses = num_warehouses
+        self.tightness = tightness
+        self.cost_structure = cost_structure
+        self.conflict_degree = conflict_degree
+        self.demand_range = demand_range
+        self.fixed_cost_per_unit = fixed_cost_per_unit
+        self.cost_scale = cost_scale
+        self.rng = np.random.default_rng(seed)
+
+    def demands(self) -> np.ndarray:
+        low, high = self.demand_range
+        return self.rng.integers(low, high + 1, self.num_stores)
+
+    def capacities(self, demands: np.ndarray) -> np.ndarray:
+        raw = self.rng.integers(3, 11, self.num_warehouses) * 10.0
+        capacities = np.rint(raw * demands.sum() / (self.tightness * raw.sum())).astype(np.int64)
+        # Every store must fit somewhere in one piece
+        return np.maximum(capacities, demands.max())
+
+    def fixed_costs(self, capacities: np.ndarray) -> np.ndarray:
+        noise = self.rng.uniform(0.8, 1.2, self.num_warehouses)
+        return np.rint(capacities * self.fixed_cost_per_unit * noise).astype(np.int64)
+
+    def supply_costs(self) -> np.ndarray:
+        S, W = self.num_stores, self.num_warehouses
+        if self.cost_structure == "random":
+            return self.rng.integers(0, int(self.cost_scale * 1.4) + 1, (S, W))
+
+        warehouses = self.rng.random((W, 2))
+        if self.cost_structure == "clustered":
+            centres = self.rng.random((max(1, S // 200), 2))
+            stores = centres[self.rng.integers(0, len(centres), S)] + self.rng.normal(0, 0.05, (S, 2))
+            stores = np.clip(stores, 0.0, 1.0)
+        else:
+            stores = self.rng.random((S, 2))
+
+        # Row blocks keep the float temporaries small for large instances
+        costs = np.empty((S, W), dtype=np.int64)
+        for start in range(0, S, 1024):
+            block = stores[start:start + 1024]
+            distance = np.sqrt(((block[:, None, :] - warehouses[None, :, :]) ** 2).sum(axis=2))
+            costs[start:start + 1024] = np.rint(distance * self.cost_scale)
+        return costs
+
+    def incompatible_pairs(self) -> np.ndarray:
+        """Distinct unordered store pairs (0-based), as many as the conflict degree asks for."""
+        S = self.num_stores
+        target = min(int(round(self.conflict_degree * S / 2)), S * (S - 1) // 2)
+        pairs = np.empty((0, 2), dtype=np.int64)
+        while len(pairs) < target:
+            draw = self.rng.integers(0, S, (2 * (target - len(pairs)) + 16, 2))
+            draw = np.sort(draw[draw[:, 0] != draw[:, 1]], axis=1)
+            pairs = np.unique(np.concatenate([pairs, draw]), axis=0)
+        # np.unique sorted the pairs; drop a random surplus rather than the largest ids
+        keep = np.sort(self.rng.permutation(len(pairs))[:target])
+        return pairs[keep]
+
+    def generate(self) -> dict:
+        """Instance in the dict layout of Parser.parse_dzn (incompatible pairs 1-based)."""
+        demands = self.demands()
+        capacities = self.capacities(demands)
+        return {
+            "Warehouses": self.num_warehouses,
+            "Stores": self.num_stores,
+            "Capacity": capacities,
+            "FixedCost": self.fixed_costs(capacities),
+            "Goods": demands,
+            "SupplyCost": self.supply_costs(),
+            "IncompatiblePairs": self.incompatible_pairs() + 1,
+        }
+
+    @staticmethod
+    def write_dzn(data: dict, file_path: str) -> None:
+        def int_list(values) -> str:
+            return ", ".join(map(str, np.asarray(values).tolist()))
+
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        pairs = np.asarray(data["IncompatiblePairs"]).reshape(-1, 2)
+        with open(file_path, 'w') as file:
+            file.write(f"Warehouses = {data['Warehouses']};\n")
+            file.write(f"Stores = {data['Stores']};\n\n")
+            file.write(f"Capacity = [{int_list(data['Capacity'])}];\n")
+            file.write(f"FixedCost = [{int_list(data['FixedCost'])}];\n")
+            file.write(f"Goods = [{int_list(data['Goods'])}];\n")
+            file.write("SupplyCost = [|")
+            file.write("\n              |".join(int_list(row) for row in np.asarray(data["SupplyCost"])))
+            file.write("|];\n\n")
+            file.write(f"Incompatibilities = {len(pairs)};\n")
+            if len(pairs):
+                file.write("IncompatiblePairs = [| " + " | ".join(f"{a}, {b}" for a, b in pairs.tolist()) + " |];\n")
+            else:
+                file.write("IncompatiblePairs = [];\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic warehouse location instance (.dzn).")
+    parser.add_argument("output", help="Path of the .dzn file to write")
+    parser.add_argument("--stores", type=int, default=10000)
+    parser.add_argument("--warehouses", type=int, default=None, help="Defaults to stores / 10")
+    parser.add_argument("--tightness", type=float, default=0.45, help="Total demand / total capacity")
+    parser.add_argument("--cost-structure", choices=InstanceGenerator.COST_STRUCTURES, default="geometric")
+    parser.add_argument("--conflict-degree", type=float, default=10.0,
+                        help="Mean number of incompatible stores per store")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generator = InstanceGenerator(args.stores, args.warehouses or max(1, args.stores // 10), args.tightness,
+                                  args.cost_structure, args.conflict_degree, seed=args.seed)
+    InstanceGenerator.write_dzn(generator.generate(), args.output)
+    print(f"Wrote {args.output}")
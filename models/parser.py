@@ -1,7 +1,10 @@
 import ast
 import json
-from typing import List, Tuple
+import os
+import re
+from typing import List, Optional, Tuple
 
+from models.cost_matrix import CostRows, is_fresh, iter_dzn_rows, open_cost_matrix, write_cost_matrix
 from models.instance_data import InstanceData
 from models.solution import Solution
 from models.store import Store
@@ -9,81 +12,156 @@ from models.warehouse import Warehouse
 
 
 class Parser:
+    """
+    Reads instances and solutions. With a `cost_dir`, the supply cost matrix of an instance is not kept as
+    Python lists: it is streamed into a .npy file there, in the narrowest integer dtype that fits, and
+    memory-mapped. The file is reused while it is newer than the instance file.
+    """
+
+    def __init__(self, cost_dir: Optional[str] = None):
+        self.cost_dir = cost_dir
+
+    @staticmethod
+    def parse_dzn(file_path) -> dict:
+        """Parse a raw MiniZinc .dzn instance into the same dict layout as the parsed json files."""
+        with open(file_path, 'r') as file:
+            return Parser.parse_dzn_text(file.read())
+
+    @staticmethod
+    def parse_dzn_header(file_path) -> dict:
+        """parse_dzn without the SupplyCost matrix, whose lines are skipped while reading."""
+        lines = []
+        with open(file_path, 'r') as file:
+            in_supply_cost = False
+            for line in file:
+                if not in_supply_cost and re.match(r'\s*SupplyCost\s*=', line):
+                    in_supply_cost = True
+                if in_supply_cost:
+                    in_supply_cost = ';' not in line
+                else:
+                    lines.append(line)
+        return Parser.parse_dzn_text(''.join(lines))
+
+    @staticmethod
+    def parse_dzn_text(data: str) -> dict:
+        parsed_data = {}
+
+        pattern = r'(\w+)\s*=\s*(\[[^\]]*\]|\d+);'
+        matches = re.findall(pattern, data, re.DOTALL)
+
+        for key, value in matches:
+            if value.startswith('['):  # Handling lists
+                value = value.replace('|', '').replace('\n', ' ').strip('[]')  # Remove | and newlines
+                parsed_data[key] = list(map(int, re.findall(r'\d+', value)))  # Extract numbers safely
+            else:
+                parsed_data[key] = int(value)  # Convert to integer
+
+        supply_cost_match = re.search(r'SupplyCost\s*=\s*\[\|(.*?)\|\];', data, re.DOTALL)
+        if supply_cost_match:
+            supply_cost_str = supply_cost_match.group(1).strip().replace('\n', ' ')
+            parsed_data["SupplyCost"] = [list(map(int, re.findall(r'\d+', row))) for row in supply_cost_str.split('|')]
+
+        incompatible_match = re.search(r'IncompatiblePairs\s*=\s*\[\|(.*?)\|\];', data, re.DOTALL)
+        if incompatible_match:
+            incompatible_str = incompatible_match.group(1).strip().replace('\n', ' ')
+            parsed_data["IncompatiblePairs"] = [list(map(int, re.findall(r'\d+', row))) for row in incompatible_str.split('|')]
+        else:
+            parsed_data["IncompatiblePairs"] = []
+
+        return parsed_data
 
     def parse_instance(self, instance_file_path) -> InstanceData:
-        with open(instance_file_path, 'r') as file:
-            data = json.loads(file.read())
-
+        if self.cost_dir is not None:
+            return self.parse_mapped_instance(instance_file_path)
+
+        # Accept both the parsed json files and the raw .dzn instances
+        if instance_file_path.endswith('.dzn'):
+            data = self.parse_dzn(instance_file_path)
+        else:
+            with open(instance_file_path, 'r') as file:
+                data = json.loads(file.read())
+
+        return self.instance_from_data(data)
+
+    def cost_path(self, instance_file_path: str) -> str:
+        return os.path.join(self.cost_dir, os.path.basename(instance_file_path) + '.costs.npy')
+
+    def parse_mapped_instance(self, instance_file_path: str) -> InstanceData:
+        """parse_instance with the supply costs memory-mapped from cost_dir, written there first if needed."""
+        cost_path = self.cost_path(instance_file_path)
+        if instance_file_path.endswith('.dzn'):
+            data = self.parse_dzn_header(instance_file_path)
+            rows = lambda: iter_dzn_rows(instance_file_path)
+        else:
+            with open(instance_file_path, 'r') as file:
+                data = json.loads(file.read())
+            supply_cost = data.pop("SupplyCost")
+            rows = lambda: iter(supply_cost)
+
+        shape = (data["Stores"], data["Warehouses"])
+        costs = open_cost_matrix(cost_path) if is_fresh(cost_path, instance_file_path) else None
+        if costs is None or costs.shape != shape:
+            costs = write_cost_matrix(cost_path, rows, *shape)
+        return self.instance_from_data(data, CostRows(costs))
+
+    @staticmethod
+    def instance_from_data(data: dict, supply_costs: Optional[CostRows] = None) -> InstanceData:
+        """
+        Build the instance from the dict layout of parse_dzn (incompatible pairs 1-based). A CostRows over a
+        memory-mapped matrix replaces data["SupplyCost"] if given.
+        """
         # Initialize basic properties
         num_warehouses = data["Warehouses"]
         num_stores = data["Stores"]
 
         # Supply costs matrix [stores][warehouses]
-        supply_costs_matrix: List[List[int]] = data["SupplyCost"]
+        supply_costs_matrix = supply_costs if supply_costs is not None else data["SupplyCost"]
 
         # Create warehouses
         warehouses: List[Warehouse] = []
         for i in range(num_warehouses):
-            supply_costs = [supply_costs_matrix[s][i] for s in range(num_stores)]
+            if supply_costs is not None:
+                supply_costs_column = supply_costs.column(i)
+            else:
+                supply_costs_column = [supply_costs_matrix[s][i] for s in range(num_stores)]
             warehouse = Warehouse(
                 id=i,
                 capacity=data["Capacity"][i],
                 fixed_cost=data["FixedCost"][i],
-                supply_costs=supply_costs
+                supply_costs=supply_costs_column
             )
             warehouses.append(warehouse)
 
+        # Incompatibilities (converted to 0-based indexing)
+        incompatible_pairs: List[Tuple[int, int]] = []
+        incompatible_stores: List[List[int]] = [[] for _ in range(num_stores)]
+
+        for pair in data["IncompatiblePairs"]:
+            s1, s2 = pair[0] - 1, pair[1] - 1  # convert to 0-based
+            incompatible_pairs.append((s1, s2))
+            incompatible_stores[s1].append(s2)
+            incompatible_stores[s2].append(s1)
+
         # Create stores
         stores: List[Store] = []
         for i in range(num_stores):
             store = Store(
                 id=i,
                 demand=data["Goods"][i],
-                supply_costs=supply_costs_matrix[i]
+                supply_costs=supply_costs_matrix[i],
+                incompatible_stores=tuple(incompatible_stores[i])
             )
             stores.append(store)
 
-        # # Incompatibilities (converted to 0-based indexing)
-        # incompatible_pairs: List[Tuple[int, int]] = [
-        #     (pair[0] - 1, pair[1] - 1)  # Convert to 0-based
-        #     for pair in data["IncompatiblePairs"]
-        # ]
-
-        # Incompatibilities (converted to 0-based indexing)
-        incompatible_pairs: List[Tuple[int, int]] = []
-        store_map = {store.id: store for store in stores}
-
-        for pair in data["IncompatiblePairs"]:
-            s1, s2 = pair[0] - 1, pair[1] - 1  # convert to 0-based
-            incompatible_pairs.append((s1, s2))
-            store_map[s1].incompatible_stores.append(s2)
-            store_map[s2].incompatible_stores.append(s1)
-
         return InstanceData(num_warehouses, num_stores, supply_costs_matrix, warehouses, stores, incompatible_pairs)
 
     def parse_solution(self, solution_file_path: str, problem: InstanceData) -> Solution:
         """Parse the solution from the exported file format and return a Solution object."""
-        with open(solution_file_path, 'r') as file:
-            # Read the entire file and remove the surrounding square brackets
-            file_content = file.read().strip()
-            if file_content.startswith('[') and file_content.endswith(']'):
-                file_content = file_content[1:-1]  # Remove leading and trailing brackets
-
-            # Split the content into rows, each corresponding to a store's allocations
-            rows = file_content.split('\n')
-
-            # Create a Solution object, passing the problem to initialize allocations
-            solution = Solution(problem)
+        # Compact sparse checkpoints written by Solution.export_sparse
+        if solution_file_path.endswith('.npz'):
+            return Solution.from_sparse(solution_file_path, problem)
 
-            for store_id, row in enumerate(rows):
-                # Remove parentheses and split by commas to get the allocations
-                allocations = row.strip()[1:-1].split(',')
-                for warehouse_id, allocation in enumerate(allocations):
-                    solution.allocation[store_id][warehouse_id] = int(allocation)
-
-            for store_alloc in solution.allocation:
-                for warehouse_id, amount in enumerate(store_alloc):
-                    if amount > 0:
-                        solution.open_warehouses[warehouse_id] = True
+        with open(solution_file_path, 'r') as file:
+            file_content = file.read()
 
-        return solution
\ No newline at end of file
+        return Solution.from_solution_data(file_content, problem)
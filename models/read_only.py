@@ -0,0 +1,11 @@
+class ReadOnly:
+    """Base for the instance model: every attribute is set once in __init__ and cannot change afterwards."""
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError(f"{type(self).__name__}.{name} is read-only")
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__}.{name} is read-only")
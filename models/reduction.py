@@ -0,0 +1,109 @@
+from typing import List, Set
+
+import numpy as np
+
+from models.cost_matrix import CHUNK_BYTES
+
+
+class InstanceReduction:
+    """
+    Preprocessing that shrinks the store-warehouse graph the solvers search:
+    - pairs where the store's demand exceeds the warehouse capacity can never be used
+    - a warehouse is dominated if another one is at most as expensive to open, has at least
+      the same capacity and supplies every store at most as cheaply
+    - each store keeps its k cheapest usable warehouses, non-dominated ones first; stores that
+      cannot be placed by a greedy pass over the reduced graph get their list widened
+    """
+
+    def __init__(self, instance, k: int = 10):
+        self.instance = instance
+        self.k = k
+
+        self.costs = instance.costs
+        self.capacities = np.array([w.capacity for w in instance.warehouses], dtype=np.int64)
+        self.fixed_costs = instance.fixed_costs
+        self.demands = np.array([s.demand for s in instance.stores], dtype=np.int64)
+
+        self.infeasible_pairs = self.demands[:, None] > self.capacities[None, :]
+        self.dominated_warehouses: Set[int] = self.find_dominated_warehouses()
+        self.preference_lists: List[List[int]] = self.build_preference_lists()
+        self.candidates: List[List[int]] = self.build_candidate_lists()
+
+    def find_dominated_warehouses(self) -> Set[int]:
+        """
+        Checks every (rival, warehouse) pair at once: the pairs no worse on fixed cost and capacity are filtered
+        through the cost matrix in row chunks, sized to the pairs still standing, which thin out after a few rows.
+        """
+        # Only warehouses that are no worse on fixed cost and capacity can dominate w
+        possible = (self.fixed_costs[:, None] <= self.fixed_costs[None, :]) & \
+                   (self.capacities[:, None] >= self.capacities[None, :])
+        np.fill_diagonal(possible, False)
+        rivals, warehouses = np.nonzero(possible)
+        equal = np.ones(rivals.size, dtype=bool)  # the pair's costs are identical so far
+
+        start = 0
+        while rivals.size and start < self.instance.num_stores:
+            stop = min(self.instance.num_stores, start + max(1, CHUNK_BYTES // (8 * rivals.size)))
+            rows = self.costs[start:stop]
+            rival_costs, own_costs = rows[:, rivals], rows[:, warehouses]
+            keep = (rival_costs <= own_costs).all(axis=0)
+            equal = equal[keep] & (rival_costs[:, keep] == own_costs[:, keep]).all(axis=0)
+            rivals, warehouses = rivals[keep], warehouses[keep]
+            start = stop
+
+        # Identical warehouses: keep the lower id so one of them survives
+        same = (equal & (self.fixed_costs[rivals] == self.fixed_costs[warehouses])
+                & (self.capacities[rivals] == self.capacities[warehouses]))
+        return set(warehouses[~same | (rivals < warehouses)].tolist())
+
+    def build_preference_lists(self) -> List[List[int]]:
+        """Usable warehouses per store by increasing supply cost, non-dominated warehouses first."""
+        order = self.instance.cost_order()
+        is_dominated = np.zeros(self.instance.num_warehouses, dtype=bool)
+        is_dominated[list(self.dominated_warehouses)] = True
+
+        preference_lists = []
+        for store_id in range(self.instance.num_stores):
+            usable = order[store_id][~self.infeasible_pairs[store_id][order[store_id]]]
+            preferred = usable[~is_dominated[usable]]
+            fallback = usable[is_dominated[usable]]
+            preference_lists.append(np.concatenate([preferred, fallback]).tolist())
+        return preference_lists
+
+    def build_candidate_lists(self) -> List[List[int]]:
+        sizes = [min(self.k, len(p)) for p in self.preference_lists]
+
+        while True:
+            unplaced = self.greedy_unplaced(sizes)
+            widened = [s for s in unplaced if sizes[s] < len(self.preference_lists[s])]
+            if not widened:
+                break
+            for s in widened:
+                sizes[s] = min(max(1, 2 * sizes[s]), len(self.preference_lists[s]))
+
+        return [self.preference_lists[s][:sizes[s]] for s in range(self.instance.num_stores)]
+
+    def greedy_unplaced(self, sizes: List[int]) -> List[int]:
+        """Stores that a cheapest-first single-sourcing pass over the reduced graph cannot place."""
+        remaining = self.capacities.tolist()
+        assigned = [set() for _ in range(self.instance.num_warehouses)]
+        unplaced = []
+
+        for store in self.instance.stores:
+            incompatible = set(store.incompatible_stores)
+            for w_id in self.preference_lists[store.id][:sizes[store.id]]:
+                if remaining[w_id] >= store.demand and not (assigned[w_id] & incompatible):
+                    remaining[w_id] -= store.demand
+                    assigned[w_id].add(store.id)
+                    break
+            else:
+                unplaced.append(store.id)
+        return unplaced
+
+    def summary(self) -> str:
+        kept = sum(len(c) for c in self.candidates)
+        total = self.instance.num_stores * self.instance.num_warehouses
+        return (f"Candidate pairs: {kept} of {total} ({100.0 * kept / total:.1f}%)\n"
+                f"Max candidates per store: {max(len(c) for c in self.candidates)}\n"
+                f"Dominated warehouses: {len(self.dominated_warehouses)}\n"
+                f"Capacity-infeasible pairs: {int(self.infeasible_pairs.sum())}")
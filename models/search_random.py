@@ -0,0 +1,155 @@
+import bisect
+import copy
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+
+
+class SearchRandom:
+    """
+    Seeded random source shared by every search path, backed by numpy's Generator.
+    Uniform variates and store indices are drawn in batches, so a draw in the inner loop is a list lookup.
+    The random.Random methods the solvers use (random, randint, choice, sample, ...) are built on the uniform batch,
+    and getstate()/setstate() capture the buffers too, so a (seed, config) pair replays a run bit for bit.
+    """
+
+    def __init__(self, seed=None, batch_size: int = 4096):
+        if isinstance(seed, np.random.SeedSequence):
+            self.seed_sequence = seed
+        else:
+            self.seed_sequence = np.random.SeedSequence(seed)
+        self.generator = np.random.Generator(np.random.PCG64(self.seed_sequence))
+        self.batch_size = batch_size
+
+        # Batches are consumed through list iterators: next() is the cheapest per-draw access in Python
+        self._uniforms: List[float] = []
+        self._next_uniform = iter(self._uniforms).__next__
+        self._indices: List[int] = []
+        self._next_index = iter(self._indices).__next__
+        self._index_bound = None
+
+    def spawn(self) -> 'SearchRandom':
+        """Independent child stream, e.g. for a restart or a worker; deterministic given the parent's state."""
+        return SearchRandom(self.seed_sequence.spawn(1)[0], self.batch_size)
+
+    # Batched draws
+
+    def random(self) -> float:
+        """Uniform float in [0, 1)."""
+        try:
+            return self._next_uniform()
+        except StopIteration:
+            self._uniforms = self.generator.random(self.batch_size).tolist()
+            self._next_uniform = iter(self._uniforms).__next__
+            return self._next_uniform()
+
+    def store_index(self, num_stores: int) -> int:
+        """Uniform index in [0, num_stores), from a batch drawn for that bound."""
+        if num_stores == self._index_bound:
+            try:
+                return self._next_index()
+            except StopIteration:
+                pass
+        self._indices = self.generator.integers(0, num_stores, self.batch_size).tolist()
+        self._next_index = iter(self._indices).__next__
+        self._index_bound = num_stores
+        return self._next_index()
+
+    def uniforms(self, size: int) -> np.ndarray:
+        """Array of uniform floats in [0, 1), for vectorized code."""
+        return self.generator.random(size)
+
+    def bits(self, size: int) -> np.ndarray:
+        """Array of random 0/1 values."""
+        return self.generator.integers(0, 2, size)
+
+    # random.Random compatible helpers
+
+    def randbelow(self, n: int) -> int:
+        # Scaling a 53-bit uniform; the bias is far below anything a search can notice
+        return int(self.random() * n)
+
+    def randint(self, a: int, b: int) -> int:
+        return a + int(self.random() * (b - a + 1))
+
+    def randrange(self, start: int, stop: Optional[int] = None) -> int:
+        if stop is None:
+            start, stop = 0, start
+        if stop <= start:
+            raise ValueError(f"Empty range for randrange({start}, {stop})")
+        return start + self.randbelow(stop - start)
+
+    def choice(self, seq: Sequence) -> Any:
+        if not seq:
+            raise IndexError("Cannot choose from an empty sequence")
+        return seq[self.randbelow(len(seq))]
+
+    def choices(self, population: Sequence, weights: Optional[Sequence[float]] = None, k: int = 1) -> List:
+        if weights is None:
+            return [self.choice(population) for _ in range(k)]
+        cumulative = np.cumsum(weights).tolist()
+        total = cumulative[-1]
+        return [population[min(bisect.bisect(cumulative, self.random() * total), len(population) - 1)]
+                for _ in range(k)]
+
+    def shuffle(self, items: List) -> None:
+        """Fisher-Yates shuffle in place."""
+        for i in range(len(items) - 1, 0, -1):
+            j = self.randbelow(i + 1)
+            items[i], items[j] = items[j], items[i]
+
+    def sample(self, population: Sequence, k: int) -> List:
+        n = len(population)
+        if not 0 <= k <= n:
+            raise ValueError("Sample larger than population or is negative")
+        if 3 * k <= n:
+            # Few picks from a large population: rejection sampling, no copy of the population
+            selected = set()
+            result = []
+            while len(result) < k:
+                j = self.randbelow(n)
+                if j not in selected:
+                    selected.add(j)
+                    result.append(population[j])
+            return result
+
+        pool = list(population)
+        for i in range(k):
+            j = i + self.randbelow(n - i)
+            pool[i], pool[j] = pool[j], pool[i]
+        return pool[:k]
+
+    # State, used by checkpoints
+
+    def getstate(self):
+        # Unconsumed parts of the batches, so a restored generator continues with exactly the same values
+        uniforms = list(self._uniforms[len(self._uniforms) - self._next_uniform.__self__.__length_hint__():])
+        indices = list(self._indices[len(self._indices) - self._next_index.__self__.__length_hint__():])
+        return (self.generator.bit_generator.state, copy.deepcopy(self.seed_sequence),
+                uniforms, indices, self._index_bound)
+
+    def setstate(self, state) -> None:
+        bit_state, seed_sequence, uniforms, indices, self._index_bound = state
+        self.seed_sequence = copy.deepcopy(seed_sequence)
+        self.generator.bit_generator.state = bit_state
+        self._uniforms = list(uniforms)
+        self._next_uniform = iter(self._uniforms).__next__
+        self._indices = list(indices)
+        self._next_index = iter(self._indices).__next__
+
+
+_default: Optional[SearchRandom] = None
+
+
+def default_random() -> SearchRandom:
+    """Process-wide generator used when a caller does not pass one; seeded with 0 unless seed() was called."""
+    global _default
+    if _default is None:
+        _default = SearchRandom(0)
+    return _default
+
+
+def seed(value=None) -> None:
+    """Reseed the process-wide generator."""
+    global _default
+    _default = SearchRandom(value)
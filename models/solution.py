@@ -1,128 +1,299 @@
 import os
+from typing import Dict, List, Set
 
 import numpy as np
 
 from .instance_data import InstanceData
 
 class Solution:
+    """
+    An allocation of store demand to warehouses together with the search state derived from it
+    (remaining capacities, suppliers per store, stores per warehouse and the cost). The state is
+    kept in sync by assign/unassign, so moves are evaluated without recomputing the whole cost.
+    The constraint violations (capacity overflow, unmet demand, incompatible stores sharing a warehouse) are
+    maintained the same way, so a search may pass through infeasible solutions under a penalized objective.
+    """
+
     def __init__(self, problem=None):
         self.problem = problem
         self.fitness_score = None
 
-        # Your original allocation style (optional if you keep your current design)
         self.allocation = []
         self.open_warehouses = []
 
-        # New properties for tweak_store compatibility
-        self.stores = []             # list of Store objects
-        self.warehouses = []         # list of Warehouse objects
-        self.incompatible_pairs = set()
-        self.count_req = 0           # used in tweak_store
+        # Search state derived from the allocation
+        self.remaining_capacity: List[int] = []
+        self.store_suppliers: List[Dict[int, int]] = []   # store id -> {warehouse id: amount}
+        self.warehouse_stores: List[Set[int]] = []        # warehouse id -> ids of stores it supplies
+
+        # Constraint violations
+        self.overflow = 0                                 # units supplied beyond capacity, over all warehouses
+        self.unmet_demand = 0                             # units of demand not supplied, over all stores
+        self.violations = 0                               # incompatible store pairs sharing a warehouse
+        self.warehouse_violations: List[int] = []         # warehouse id -> incompatible pairs it supplies
 
         if problem is not None:
-            # Initialize allocation and open_warehouses if needed
             self.allocation = [[0] * problem.num_warehouses for _ in range(problem.num_stores)]
             self.open_warehouses = [False] * problem.num_warehouses
-            # You may want to initialize stores and warehouses here or separately
-
-        # Compute initial fitness
-        # self.fitness_score = self.fitness()
+            self.remaining_capacity = [w.capacity for w in problem.warehouses]
+            self.store_suppliers = [{} for _ in range(problem.num_stores)]
+            self.warehouse_stores = [set() for _ in range(problem.num_warehouses)]
+            self.fitness_score = 0
+            self.unmet_demand = sum(s.demand for s in problem.stores)
+            self.warehouse_violations = [0] * problem.num_warehouses
 
     @classmethod
     def from_solution_data(cls, solution_data: str, problem: InstanceData) -> 'Solution':
         """Create a Solution object from the parsed solution data."""
         solution = cls(problem)  # Create an instance with the problem
-        # Now we can populate the allocation from solution_data (as string or parsed list)
-        rows = solution_data.strip().split("\n")
-        for store_id, row in enumerate(rows):
-            allocations = row.strip()[1:-1].split(',')
-            for warehouse_id, allocation in enumerate(allocations):
-                solution.allocation[store_id][warehouse_id] = int(allocation)
+        allocation_np = cls.parse_allocation_text(solution_data, problem.num_stores, problem.num_warehouses)
+        solution.set_allocation(allocation_np)
         return solution
 
-    # def fitness(self) -> int:
-    #     total_fixed_cost = 0
-    #     total_supply_cost = 0
-    #     used_warehouses = set()
-    #
-    #     for store_id, allocations in enumerate(self.allocation):
-    #         for warehouse_id, amount in enumerate(allocations):
-    #             if amount > 0:
-    #                 used_warehouses.add(warehouse_id)
-    #                 supply_cost = self.problem.supply_costs_matrix[store_id][warehouse_id]
-    #                 total_supply_cost += amount * supply_cost
-    #
-    #     total_fixed_cost = sum(
-    #         self.problem.warehouses[w_id].fixed_cost for w_id in used_warehouses
-    #     )
-    #
-    #     self.fitness_score = total_fixed_cost + total_supply_cost
-    #     return self.fitness_score
+    @classmethod
+    def from_sparse(cls, file_path: str, problem: InstanceData) -> 'Solution':
+        """Load a solution written by export_sparse."""
+        with np.load(file_path) as data:
+            return cls.from_sparse_arrays(dict(data), problem)
 
-    def fitness(self) -> int:
-        # Convert allocation and supply_costs_matrix to numpy arrays
-        allocation_np = np.array(self.allocation)
-        supply_costs_np = np.array(self.problem.supply_costs_matrix)
+    @classmethod
+    def from_sparse_arrays(cls, arrays: dict, problem: InstanceData) -> 'Solution':
+        """Rebuild a solution from the arrays returned by to_sparse_arrays."""
+        shape = tuple(int(x) for x in arrays["shape"])
+        if shape != (problem.num_stores, problem.num_warehouses):
+            raise ValueError(f"Solution shape {shape} does not match instance "
+                             f"({problem.num_stores}, {problem.num_warehouses})")
+        allocation_np = np.zeros(shape, dtype=np.int64)
+        allocation_np[arrays["stores"], arrays["warehouses"]] = arrays["amounts"]
+
+        solution = cls(problem)
+        solution.set_allocation(allocation_np)
+        return solution
+
+    @staticmethod
+    def parse_allocation_text(solution_data: str, num_stores: int, num_warehouses: int) -> np.ndarray:
+        """Parse the '[(a,b,..)\n(..)]' text format into a (stores, warehouses) int64 matrix."""
+        text = solution_data.strip()
+        if text.startswith('[') and text.endswith(']'):
+            text = text[1:-1]
+
+        # Turn row delimiters into separators so the whole matrix is one comma separated list
+        text = text.replace('(', '').replace(')', ',').replace('\n', '')
+        values = np.fromstring(text, dtype=np.int64, sep=',')
+
+        if values.size != num_stores * num_warehouses:
+            raise ValueError(f"Expected {num_stores * num_warehouses} allocation values, got {values.size}")
+        return values.reshape(num_stores, num_warehouses)
+
+    @staticmethod
+    def format_allocation_text(allocation_np: np.ndarray) -> str:
+        """Format a (stores, warehouses) matrix in the '[(a,b,..)\n(..)]' text format."""
+        num_stores, num_warehouses = allocation_np.shape
+
+        # Allocations are sparse: start from an all-zero matrix string and splice in the non-zero cells
+        line = '(' + ','.join(['0'] * num_warehouses) + ')'
+        zero_text = '[' + '\n'.join([line] * num_stores) + ']'
+
+        rows, cols = np.nonzero(allocation_np)
+        offsets = (1 + rows * (len(line) + 1) + 1 + 2 * cols).tolist()
+        values = allocation_np[rows, cols].astype(str).tolist()
+
+        parts = []
+        prev = 0
+        for offset, value in zip(offsets, values):
+            parts.append(zero_text[prev:offset])
+            parts.append(value)
+            prev = offset + 1  # skip the '0' being replaced
+        parts.append(zero_text[prev:])
+        return ''.join(parts)
+
+    def set_allocation(self, allocation_np: np.ndarray) -> None:
+        """Replace the allocation with a numpy matrix and rebuild the search state from it."""
+        self.allocation = allocation_np.tolist()
+        self.open_warehouses = (allocation_np.sum(axis=0) > 0).tolist()
+
+        used = allocation_np.sum(axis=0)
+        self.remaining_capacity = [w.capacity - int(used[w.id]) for w in self.problem.warehouses]
+        self.store_suppliers = [{} for _ in range(self.problem.num_stores)]
+        self.warehouse_stores = [set() for _ in range(self.problem.num_warehouses)]
+
+        stores, warehouses = np.nonzero(allocation_np)
+        for store_id, w_id in zip(stores.tolist(), warehouses.tolist()):
+            self.store_suppliers[store_id][w_id] = self.allocation[store_id][w_id]
+            self.warehouse_stores[w_id].add(store_id)
+
+        self.fitness()
+
+    def conflicts(self, store_id: int, warehouse_id: int) -> bool:
+        """True if the warehouse already supplies a store that is incompatible with this one."""
+        return not self.warehouse_stores[warehouse_id].isdisjoint(self.problem.stores[store_id].incompatible_stores)
 
-        # Calculate total supply cost with element-wise multiplication and sum
-        total_supply_cost = np.sum(allocation_np * supply_costs_np)
+    def can_supply(self, store_id: int, warehouse_id: int, amount: int) -> bool:
+        return self.remaining_capacity[warehouse_id] >= amount and not self.conflicts(store_id, warehouse_id)
 
-        # Warehouses used: any warehouse with sum of allocated supply > 0
-        used_warehouses = np.where(np.sum(allocation_np, axis=0) > 0)[0]
+    def assign(self, store_id: int, warehouse_id: int, amount: int) -> None:
+        """Add amount units of the store's demand to the warehouse, updating state and cost."""
+        if amount <= 0:
+            return
 
-        # Sum fixed costs of used warehouses
-        total_fixed_cost = sum(self.problem.warehouses[w].fixed_cost for w in used_warehouses)
+        stores = self.warehouse_stores[warehouse_id]
+        if not stores:
+            self.open_warehouses[warehouse_id] = True
+            self.fitness_score += self.problem.warehouses[warehouse_id].fixed_cost
+
+        suppliers = self.store_suppliers[store_id]
+        if warehouse_id not in suppliers:
+            # The store joins the warehouse: count the incompatible stores already there
+            joined = len(stores.intersection(self.problem.stores[store_id].incompatible_stores))
+            if joined:
+                self.violations += joined
+                self.warehouse_violations[warehouse_id] += joined
+
+        remaining = self.remaining_capacity[warehouse_id]
+        if remaining < amount:
+            self.overflow += amount - max(remaining, 0)
+        self.unmet_demand -= amount
+
+        self.allocation[store_id][warehouse_id] += amount
+        self.remaining_capacity[warehouse_id] = remaining - amount
+        suppliers[warehouse_id] = suppliers.get(warehouse_id, 0) + amount
+        stores.add(store_id)
+        self.fitness_score += self.problem.supply_costs_matrix[store_id][warehouse_id] * amount
+
+    def unassign(self, store_id: int, warehouse_id: int, amount: int = None) -> int:
+        """Remove amount units (default: all) the warehouse supplies to the store; returns the amount removed."""
+        suppliers = self.store_suppliers[store_id]
+        current = suppliers.get(warehouse_id, 0)
+        amount = current if amount is None else min(amount, current)
+        if amount <= 0:
+            return 0
+
+        remaining = self.remaining_capacity[warehouse_id]
+        if remaining < 0:
+            self.overflow -= min(amount, -remaining)
+        self.unmet_demand += amount
+
+        self.allocation[store_id][warehouse_id] -= amount
+        self.remaining_capacity[warehouse_id] = remaining + amount
+        self.fitness_score -= self.problem.supply_costs_matrix[store_id][warehouse_id] * amount
+
+        if amount == current:
+            del suppliers[warehouse_id]
+            stores = self.warehouse_stores[warehouse_id]
+            stores.discard(store_id)
+            left = len(stores.intersection(self.problem.stores[store_id].incompatible_stores))
+            if left:
+                self.violations -= left
+                self.warehouse_violations[warehouse_id] -= left
+            if not stores:
+                self.open_warehouses[warehouse_id] = False
+                self.fitness_score -= self.problem.warehouses[warehouse_id].fixed_cost
+        else:
+            suppliers[warehouse_id] = current - amount
+        return amount
+
+    def release_store(self, store_id: int) -> Dict[int, int]:
+        """Remove the store from all its suppliers and return what they supplied, for restore_store."""
+        supplies = dict(self.store_suppliers[store_id])
+        for w_id in supplies:
+            self.unassign(store_id, w_id)
+        return supplies
+
+    def restore_store(self, store_id: int, supplies: Dict[int, int]) -> None:
+        for w_id, amount in supplies.items():
+            self.assign(store_id, w_id, amount)
+
+    def unassigned_demand(self, store_id: int) -> int:
+        return self.problem.stores[store_id].demand - sum(self.store_suppliers[store_id].values())
+
+    def fitness(self) -> int:
+        """Recompute the cost from scratch: fixed cost of used warehouses plus supply costs."""
+        # Gathered from the cost matrix as sparse triples, so a memory-mapped matrix is only read where supplied
+        stores = [store_id for store_id, suppliers in enumerate(self.store_suppliers) for _ in suppliers]
+        warehouses = [w_id for suppliers in self.store_suppliers for w_id in suppliers]
+        amounts = [amount for suppliers in self.store_suppliers for amount in suppliers.values()]
+        total_supply_cost = self.problem.supply_cost(np.array(stores, dtype=np.int64),
+                                                     np.array(warehouses, dtype=np.int64),
+                                                     np.array(amounts, dtype=np.int64))
+        total_fixed_cost = sum(
+            w.fixed_cost for w in self.problem.warehouses if self.warehouse_stores[w.id]
+        )
 
         self.fitness_score = total_fixed_cost + total_supply_cost
+        self.recompute_violations()
         return self.fitness_score
 
+    def recompute_violations(self) -> None:
+        """Rebuild the violation counters from scratch (assign/unassign keep them up to date)."""
+        self.overflow = sum(-r for r in self.remaining_capacity if r < 0)
+        self.unmet_demand = sum(self.unassigned_demand(s.id) for s in self.problem.stores)
+        self.warehouse_violations = [0] * self.problem.num_warehouses
+        for w_id, stores in enumerate(self.warehouse_stores):
+            for store_id in stores:
+                incompatible = self.problem.stores[store_id].incompatible_stores
+                # Each pair is seen from both stores
+                self.warehouse_violations[w_id] += len(stores.intersection(incompatible))
+            self.warehouse_violations[w_id] //= 2
+        self.violations = sum(self.warehouse_violations)
+
+    def is_feasible(self) -> bool:
+        """All demand supplied, no capacity exceeded and no incompatible stores together, from the counters."""
+        return self.overflow == 0 and self.unmet_demand == 0 and self.violations == 0
+
+    def penalized_cost(self, capacity_weight: float, demand_weight: float, conflict_weight: float) -> float:
+        """Cost plus weighted violations, the objective of searches allowed to leave the feasible region."""
+        return (self.fitness_score + capacity_weight * self.overflow + demand_weight * self.unmet_demand
+                + conflict_weight * self.violations)
+
     def export(self, file_path: str) -> None:
         """Export the solution to a file in the required matrix format, creating the directory if it doesn't exist."""
         # Get the directory from the file path
         directory = os.path.dirname(file_path)
 
-        # If the directory doesn't exist, create it
-        if directory and not os.path.exists(directory):
-            os.makedirs(directory)
+        # If the directory doesn't exist, create it (exist_ok: parallel runs may create it at the same time)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
 
-        # Open the file for writing
+        # Format the whole matrix at once and write it with a single call
+        text = self.format_allocation_text(np.asarray(self.allocation, dtype=np.int64))
         with open(file_path, 'w') as file:
-            file.write('[')  # Add opening bracket
-
-            # Write the solution rows in the required format
-            for store_id, warehouse_allocations in enumerate(self.allocation):
-                file.write(f"({','.join(map(str, warehouse_allocations))})")
-
-                # Add a newline after each line except the last one
-                if store_id < len(self.allocation) - 1:
-                    file.write('\n')
-
-            file.write(']')  # Add closing bracket
-
-    def shallow_copy(self):
-        """Returns a shallow copy of the current instance."""
-
-        # self.problem = problem
-        # self.fitness_score = None
-        #
-        # # Your original allocation style (optional if you keep your current design)
-        # self.allocation = []
-        # self.open_warehouses = []
-        #
-        # # New properties for tweak_store compatibility
-        # self.stores = []             # list of Store objects
-        # self.warehouses = []         # list of Warehouse objects
-        # self.incompatible_pairs = set()
-        # self.count_req = 0           # used in tweak_store
-        copy = self.__class__(self.problem)  # Create a new instance of the same class
+            file.write(text)
+
+    def to_sparse_arrays(self) -> dict:
+        """The allocation as (store, warehouse, amount) triples plus the matrix shape."""
+        allocation_np = np.asarray(self.allocation, dtype=np.int64)
+        stores, warehouses = np.nonzero(allocation_np)
+        return {
+            "shape": np.array(allocation_np.shape, dtype=np.int64),
+            "stores": stores.astype(np.int32),
+            "warehouses": warehouses.astype(np.int32),
+            "amounts": allocation_np[stores, warehouses],
+        }
+
+    def export_sparse(self, file_path: str) -> None:
+        """Export the solution as compact (store, warehouse, amount) triples in a .npz file."""
+        directory = os.path.dirname(file_path)
+        if directory:
+            # exist_ok: parallel runs may create the same directory at once
+            os.makedirs(directory, exist_ok=True)
+
+        with open(file_path, 'wb') as file:
+            np.savez(file, **self.to_sparse_arrays())
+
+    def copy(self) -> 'Solution':
+        """Independent copy of the solution and its search state; the problem instance is shared."""
+        copy = self.__class__.__new__(self.__class__)
         copy.problem = self.problem
-        copy.allocation = self.allocation.copy()
-        copy.open_warehouses = self.open_warehouses.copy()
         copy.fitness_score = self.fitness_score
-        copy.stores = self.stores.copy()
-        copy.warehouses = self.warehouses.copy()
-        copy.incompatible_pairs = self.incompatible_pairs.copy()
-        copy.count_req = self.count_req
+        copy.allocation = [row[:] for row in self.allocation]
+        copy.open_warehouses = self.open_warehouses[:]
+        copy.remaining_capacity = self.remaining_capacity[:]
+        copy.store_suppliers = [dict(suppliers) for suppliers in self.store_suppliers]
+        copy.warehouse_stores = [set(stores) for stores in self.warehouse_stores]
+        copy.overflow = self.overflow
+        copy.unmet_demand = self.unmet_demand
+        copy.violations = self.violations
+        copy.warehouse_violations = self.warehouse_violations[:]
         return copy
 
 # Example usage:
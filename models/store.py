@@ -1,16 +1,17 @@
-from typing import List
+from typing import List, Tuple
 
+from models.read_only import ReadOnly
 
-class Store:
-    def __init__(self, id: int, demand: int, supply_costs: List[int]):
+
+class Store(ReadOnly):
+    __slots__ = ('id', 'demand', 'supply_costs', 'incompatible_stores')
+
+    def __init__(self, id: int, demand: int, supply_costs: List[int], incompatible_stores: Tuple[int, ...] = ()):
         self.id = id
         self.demand = demand
         self.supply_costs = supply_costs
-        self.suppliers = []
-        self.warehouses_supply = []
-        self.supply = 0
-        self.incompatible_stores: List[int] = []
+        self.incompatible_stores: Tuple[int, ...] = tuple(incompatible_stores)
 
     def get_cost_from_warehouse(self, warehouse_id: int) -> int:
         """Get supply cost from a specific warehouse"""
-        return self.supply_costs[warehouse_id]
\ No newline at end of file
+        return self.supply_costs[warehouse_id]
@@ -1,4 +0,0 @@
-class SupplyReq:
-    def __init__(self, warehouse, supplyreq):
-        self.warehouse = warehouse
-        self.supplyreq = supplyreq
\ No newline at end of file
@@ -30,34 +30,19 @@ class InitialSolution:
                 return False
         return True
 
-    def generate_valid_solution(self) -> Solution:
+    def generate_valid_solution(self, order: str = "index") -> Solution:
+        self.instance.feasibility(single_source=True).raise_if_infeasible()
         solution = Solution(self.instance)
 
-        # Track current warehouse capacity used
-        warehouse_capacity_used = [0] * self.instance.num_warehouses
-
-        # Track which stores are assigned to which warehouses
-        warehouse_store_map = {w.id: set() for w in self.instance.warehouses}
-
-        for store in self.instance.stores:
+        for store_id in self.instance.store_order(order):
+            store = self.instance.stores[store_id]
             assigned = False
             # Try to assign to warehouses in order of increasing supply cost
-            sorted_warehouses = sorted(self.instance.warehouses, key=lambda w: store.get_cost_from_warehouse(w.id))
-
-            for warehouse in sorted_warehouses:
-                w_id = warehouse.id
-                # Check for incompatibility with already assigned stores in this warehouse
-                if any((store.id, other) in self.instance.incompatible_pairs or (
-                other, store.id) in self.instance.incompatible_pairs
-                       for other in warehouse_store_map[w_id]):
-                    continue
-
-                if warehouse_capacity_used[w_id] + store.demand <= warehouse.capacity:
+            for w_id in self.instance.candidate_warehouses(store.id):
+                # Check capacity and incompatibility with already assigned stores in this warehouse
+                if solution.can_supply(store.id, w_id, store.demand):
                     # Assign the entire store demand to this warehouse
-                    solution.allocation[store.id][w_id] = store.demand
-                    solution.open_warehouses[w_id] = True
-                    warehouse_capacity_used[w_id] += store.demand
-                    warehouse_store_map[w_id].add(store.id)
+                    solution.assign(store.id, w_id, store.demand)
                     assigned = True
                     break
 
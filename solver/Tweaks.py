@@ -1,363 +1,312 @@
 import math
-import random
-from typing import Optional
+import time
+from typing import Optional, Dict
+
+import numpy as np
 
 from models.instance_data import InstanceData
+from models.search_random import SearchRandom, default_random
 from models.solution import Solution
-from models.store import Store
-from models.supply_req import SupplyReq
-from models.warehouse import Warehouse
+from solver.alns import insertion_costs
+from solver.checkpoint import SearchCheckpoint, capture_solution, restore_solution
+from solver.trace import TraceRecorder
 
 
 class Tweaks:
     @staticmethod
     def try_shift_store(solution: Solution, store_id: int, from_w: int, to_w: int) -> bool:
         # Try moving allocation for a store from warehouse A to B
-        allocation = solution.allocation[store_id]
-        demand_shift = allocation[from_w]
+        demand_shift = solution.store_suppliers[store_id].get(from_w, 0)
         if demand_shift == 0:
             return False
 
         # Check capacity and incompatibility
-        if solution.problem.warehouses[to_w].capacity < demand_shift:
+        if not solution.can_supply(store_id, to_w, demand_shift):
             return False
 
         # Apply move if valid
-        allocation[to_w] += demand_shift
-        allocation[from_w] = 0
-        # update open_warehouses, capacities, etc.
+        solution.unassign(store_id, from_w)
+        solution.assign(store_id, to_w, demand_shift)
         return True
 
     def move_store_allocation(solution: Solution, instance: InstanceData) -> Optional[Solution]:
         for store in instance.stores:
-            current_alloc = solution.allocation[store.id]
-
-            for src_warehouse_id, amount in enumerate(current_alloc):
-                if amount == 0:
-                    continue
-
-                for dst_warehouse_id in range(instance.num_warehouses):
+            for src_warehouse_id, amount in list(solution.store_suppliers[store.id].items()):
+                for dst_warehouse_id in instance.candidate_warehouses(store.id):
                     if dst_warehouse_id == src_warehouse_id:
                         continue
 
-                    # Check capacity
-                    dst_capacity_used = sum(solution.allocation[s.id][dst_warehouse_id] for s in instance.stores)
-                    if dst_capacity_used + amount > instance.warehouses[dst_warehouse_id].capacity:
+                    # Check capacity and incompatibility
+                    if not solution.can_supply(store.id, dst_warehouse_id, amount):
                         continue
 
-                    # Check incompatibility
-                    if (store.id, dst_warehouse_id) in instance.incompatible_pairs or (
-                            dst_warehouse_id, store.id) in instance.incompatible_pairs:
-                        continue
-
-                    # Apply move to a new solution
-                    new_solution = solution.shallow_copy()
-                    new_solution.allocation[store.id][src_warehouse_id] -= amount
-                    new_solution.allocation[store.id][dst_warehouse_id] += amount
-                    new_solution.open_warehouses[src_warehouse_id] = any(
-                        new_solution.allocation[s.id][src_warehouse_id] > 0 for s in instance.stores
-                    )
-                    new_solution.open_warehouses[dst_warehouse_id] = True
-                    new_solution.fitness()
-                    if new_solution.fitness() < solution.fitness():
+                    # Delta cost of the move: supply cost difference plus opening/closing warehouses
+                    delta = amount * (store.supply_costs[dst_warehouse_id] - store.supply_costs[src_warehouse_id])
+                    if not solution.open_warehouses[dst_warehouse_id]:
+                        delta += instance.warehouses[dst_warehouse_id].fixed_cost
+                    if solution.warehouse_stores[src_warehouse_id] == {store.id}:
+                        delta -= instance.warehouses[src_warehouse_id].fixed_cost
+
+                    if delta < 0:
+                        # Apply move to a new solution
+                        new_solution = solution.copy()
+                        new_solution.unassign(store.id, src_warehouse_id)
+                        new_solution.assign(store.id, dst_warehouse_id, amount)
                         return new_solution
 
         return solution  # No better neighbor found
 
-    def tweak_warehouse(instance: InstanceData) -> Solution:
-        # Copy of the original state (as the old solution)
-        old_instance = InstanceData(
-            num_warehouses=instance.num_warehouses,
-            num_stores=instance.num_stores,
-            supply_costs_matrix=instance.supply_costs_matrix,
-            warehouses=[Warehouse(w.id, w.capacity, w.fixed_cost, w.supply_costs) for w in instance.warehouses],
-            stores=[Store(s.id, s.demand, s.supply_costs) for s in instance.stores],
-            incompatible_pairs=set(instance.incompatible_pairs)
-        )
+    def tweak_warehouse(sol: Solution, rnd: Optional[SearchRandom] = None) -> Solution:
+        rnd = rnd or default_random()
 
-        # Sort open warehouses by fixed cost (descending) and then by start capacity (ascending)
+        # Sort open warehouses by fixed cost (descending) and then by capacity (ascending)
         open_warehouses = sorted(
-            [w for w in instance.warehouses if w.open],
-            key=lambda w: (-w.fixed_cost, w.start_capacity)
+            [w for w in sol.problem.warehouses if sol.open_warehouses[w.id]],
+            key=lambda w: (-w.fixed_cost, w.capacity)
         )
+        # No feasible solution opens fewer warehouses than the pre-check bound, so closing one cannot succeed
+        if len(open_warehouses) <= sol.problem.min_open_warehouses():
+            return sol
 
-        # Randomly select one warehouse
-        rnd_warehouse = random.choice(open_warehouses)
-        old_warehouse = next((w for w in instance.warehouses if w.id == rnd_warehouse.id), None)
+        # Randomly select one warehouse and try to close it
+        old_warehouse = rnd.choice(open_warehouses)
+        stores_with_supplier = sorted(sol.warehouse_stores[old_warehouse.id])
 
-        stores_with_suppliers = [s for s in instance.stores if any(sup.id == old_warehouse.id for sup in s.suppliers)]
+        # Remember the original supplies so the move can be undone
+        old_supplies = {store_id: sol.release_store(store_id) for store_id in stores_with_supplier}
 
         all_supply_request = 0
 
-        # Loop through stores with the old warehouse as a supplier
-        for store in stores_with_suppliers:
+        # Loop through stores that had the old warehouse as a supplier
+        for store_id in stores_with_supplier:
+            store = sol.problem.stores[store_id]
             remaining_demand = store.demand
             all_supply_request += store.demand
 
-            if remaining_demand <= instance.num_warehouses:  # Compare demand with warehouse capacity
-                # Order and remove the previous supply costs
-                for idx, cost in enumerate(store.supply_costs):
-                    warehouse = next((w for w in instance.warehouses if w.id == idx), None)
-                    if warehouse:
-                        warehouse.supply_costs[idx] = cost  # Update supply cost to warehouse
-
-                # Filter warehouses that can potentially supply this store
-                eligible_warehouses = sorted(
-                    [w for w in instance.warehouses if not any(sup.id == w.id for sup in store.suppliers) and w.open],
-                    key=lambda w: (w.capacity, w.fixed_cost)
-                )
-
-                store.suppliers = []
-                store.warehouses_supply = []
-
-                for warehouse in eligible_warehouses:
-                    if remaining_demand == 0:
-                        break
-
-                    supply_amount = 0
-                    if warehouse.capacity > 0 and f"{warehouse.id},{store.id}" not in instance.incompatible_pairs:
-                        if warehouse.capacity >= remaining_demand:
-                            supply_amount = remaining_demand
-                        else:
-                            supply_amount = warehouse.capacity
-
-                        remaining_demand -= supply_amount
-                        all_supply_request -= supply_amount
-                        warehouse.capacity -= supply_amount
-
-                        store.suppliers.append(warehouse)
-                        store.warehouses_supply.append((warehouse, supply_amount))
-
-                        # Add incompatible pairs
-                        for incompatible_store in store.suppliers:
-                            instance.incompatible_pairs.add(f"{warehouse.id},{incompatible_store.id}")
-
-        if all_supply_request == 0:
-            # If all supply requests have been fulfilled, update incompatible pairs
-            for store in instance.stores:
-                for supplier in store.suppliers:
-                    for incompatible_store in store.suppliers:
-                        instance.incompatible_pairs.add(f"{supplier.id},{incompatible_store.id}")
-
-            old_warehouse.open = False
-
-            # Return a new Solution object with the updated problem state
-            sol = Solution(problem=instance)
-            sol.fitness()
-            return sol
-        else:
-            # Return a Solution object with the original problem state if supply wasn't fulfilled
-            sol = Solution(problem=old_instance)
-            sol.fitness()
-            return sol
-
-    def tweak_store(sol: Solution) -> Solution:
-        # Deep copy the solution (like new ProSolution with copied fields)
-        oldsol = sol.shallow_copy()
-
-        rnd = random.Random()
-        random_index = rnd.randint(0, len(sol.problem.stores) - 1)
-        store = sol.problem.stores[random_index]
-
-        ncost = sol.fitness()
-
-        # Return capacity from current suppliers of store
-        for w in store.suppliers:
-            # Find the supplyreq for this warehouse in store.warehouses_supply
-            supplyreq_obj = next((x for x in store.warehouses_supply if x.warehouse.id == w.id), None)
-            if supplyreq_obj is None:
-                continue
-            supplyreq = supplyreq_obj.supplyreq
-
-            # Find corresponding warehouse in solution
-            wr = next((x for x in sol.problem.warehouses if x.id == w.id), None)
-            if wr:
-                wr.capacity += supplyreq
-                ncost -= store.supply_costs[w.id] * supplyreq
-
-                if wr.capacity == wr.start_capacity:
-                    wr.open = False
-                    # Subtract fixed cost if warehouse closed
-                    orig_wr = next((x for x in oldsol.warehouses if x.id == wr.id), None)
-                    if orig_wr:
-                        ncost -= orig_wr.fixed_cost
-
-        # Extract incompatible pairs for this store only
-        storeinc = {p for p in sol.problem.incompatible_pairs if str(store.id) in p}
-
-        # Clear incompatible pairs in solution to rebuild
-        sol.incompatible_pairs = set()
-
-        # Update supply_for_store for warehouses based on this store's supply costs
-        for wid, cost_val in enumerate(store.supply_costs):
-            wr = next((w for w in sol.problem.warehouses if w.id == wid), None)
-            if wr:
-                wr.supply_for_store = int(cost_val)
-
-        # Get warehouses sorted by supply_for_store and exclude those already supplying store and those closed
-        warehouses = sorted(
-            [w for w in sol.problem.warehouses if w.open and w.id not in {s.id for s in store.suppliers}],
-            key=lambda w: w.supply_for_store
-        )
-
-        req = int(store.demand)
+            # Open warehouses that can potentially supply this store, tightest remaining capacity first
+            eligible_warehouses = sorted(
+                [w for w in sol.problem.warehouses if sol.open_warehouses[w.id] and w.id != old_warehouse.id],
+                key=lambda w: (sol.remaining_capacity[w.id], w.fixed_cost)
+            )
 
-        # Reset suppliers and warehouses_supply for this store
-        store.suppliers = []
-        store.warehouses_supply = []
+            for warehouse in eligible_warehouses:
+                if remaining_demand == 0:
+                    break
 
-        # Prepare requests list (only one request as per your original code)
-        request_list = [int(store.demand)]  # could be randomized if needed
+                if sol.remaining_capacity[warehouse.id] > 0 and not sol.conflicts(store_id, warehouse.id):
+                    supply_amount = min(remaining_demand, sol.remaining_capacity[warehouse.id])
+                    sol.assign(store_id, warehouse.id, supply_amount)
 
-        sol.count_req = int(store.demand)
+                    remaining_demand -= supply_amount
+                    all_supply_request -= supply_amount
 
-        for request in request_list:
-            for wr in warehouses[:]:  # copy of list so we can remove
-                # Skip incompatible warehouse-store pair
-                if f"{wr.id},{store.id}" in storeinc:
-                    continue
+        if all_supply_request != 0:
+            # Supply wasn't fulfilled: put every store back where it was
+            for store_id, supplies in old_supplies.items():
+                sol.release_store(store_id)
+                sol.restore_store(store_id, supplies)
 
-                if wr.capacity >= request:
-                    wr.capacity -= request
-                    store.supply = store.supply_costs[wr.id]
-                    store.suppliers.append(wr)
-                    store.warehouses_supply.append(SupplyReq(wr, request))
+        return sol
 
-                    sol.count_req -= request
-                    req -= request
+    @staticmethod
+    def reassign_store(sol: Solution, store_id: int, allow_closed: bool = False) -> Optional[Dict[int, int]]:
+        """
+        Move the store to its cheapest other candidate warehouse that has room and no incompatible store.
+        Returns the store's previous supplies so the caller can undo the move, or None if no move was possible.
+        """
+        store = sol.problem.stores[store_id]
+        old_supplies = sol.release_store(store_id)
+
+        for w_id in sol.problem.candidate_warehouses(store_id):
+            if w_id in old_supplies:
+                continue
+            if not allow_closed and not sol.open_warehouses[w_id]:
+                continue
 
-                    # Add all incompatible pairs for this store
-                    for incompatible_store in store.incompatible_stores:
-                        sol.incompatible_pairs.add(f"{wr.id},{incompatible_store}")
+            if sol.can_supply(store_id, w_id, store.demand):
+                sol.assign(store_id, w_id, store.demand)
+                return old_supplies
 
-                    warehouses.remove(wr)
-                    break
+        sol.restore_store(store_id, old_supplies)
+        return None
 
-        # Rebuild incompatible pairs for all stores and their suppliers
-        for s in sol.stores:
-            for wrs in s.suppliers:
-                for incompatible_store in s.incompatible_stores:
-                    sol.incompatible_pairs.add(f"{wrs.id},{incompatible_store}")
+    def tweak_store(sol: Solution, rnd: Optional[SearchRandom] = None) -> Solution:
+        rnd = rnd or default_random()
+        random_index = rnd.store_index(len(sol.problem.stores))
 
-        # If request not fulfilled, return old solution and cost
-        if req != 0:
-            return oldsol
-        else:
-            # Calculate new cost by adding supply costs for this store's suppliers
-            for i in range(len(store.suppliers)):
-                w = store.suppliers[i]
-                supplyreq_obj = next((x for x in store.warehouses_supply if x.warehouse.id == w.id), None)
-                if supplyreq_obj:
-                    ncost += store.supply_costs[w.id] * supplyreq_obj.supplyreq
-
-            sol.fitness()
-            return sol
+        # Moves the store in place; the solution is left unchanged if no other open warehouse fits
+        Tweaks.reassign_store(sol, random_index)
+        return sol
 
     @staticmethod
-    def tweak_with_iterations(solution: Solution, data: InstanceData, iterations=1000) -> Solution:
-        for i in range(iterations - 1):
-            solution_copy = solution.shallow_copy()
-            tweaked = Tweaks.tweak_store(solution_copy)
-
-            if tweaked.fitness_score >= solution.fitness_score:
-                solution = tweaked
+    def tweak_with_iterations(solution: Solution, data: InstanceData, iterations=1000, time_limit=None,
+                              rnd: Optional[SearchRandom] = None,
+                              checkpoint: Optional[SearchCheckpoint] = None,
+                              trace: Optional[TraceRecorder] = None) -> Solution:
+        rnd = rnd or default_random()
+        start_iteration = 0
+        elapsed = 0.0
+
+        state = checkpoint.load("tweak_with_iterations", solution.problem) if checkpoint else None
+        if state is not None:
+            # Continue exactly where the interrupted search stopped, with the time it had left
+            solution = restore_solution(state["current"], solution.problem)
+            rnd.setstate(state["rng_state"])
+            start_iteration = state["iteration"]
+            elapsed = state["elapsed"]
+        else:
+            solution = solution.copy()
+
+        start = time.perf_counter()
+        deadline = start + time_limit - elapsed if time_limit is not None else None
+        for i in range(start_iteration, iterations - 1):
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+            if checkpoint and checkpoint.due():
+                checkpoint.save({
+                    "method": "tweak_with_iterations",
+                    "instance": solution.problem.content_hash(),
+                    "iteration": i,
+                    "elapsed": elapsed + time.perf_counter() - start,
+                    "current": capture_solution(solution),
+                    "rng_state": rnd.getstate(),
+                })
+
+            old_cost = solution.fitness_score
+            store_id = rnd.store_index(len(solution.problem.stores))
+            old_supplies = Tweaks.reassign_store(solution, store_id)
+
+            # Keep non-worsening moves, undo the others
+            if old_supplies is not None and solution.fitness_score > old_cost:
+                solution.release_store(store_id)
+                solution.restore_store(store_id, old_supplies)
+
+            if trace is not None:
+                trace.record(i, solution.fitness_score, solution.fitness_score, "reassign_store")
 
         return solution
 
-    def tweak_store1(sol: Solution, max_store_tweaks: int = 3) -> Solution:
-        # Deep copy the original solution for rollback
-        oldsol = sol.shallow_copy()
-        rnd = random.Random()
+    def tweak_store1(sol: Solution, max_store_tweaks: int = 3, rnd: Optional[SearchRandom] = None) -> Solution:
+        rnd = rnd or default_random()
 
         store_indices = rnd.sample(range(len(sol.problem.stores)), k=min(max_store_tweaks, len(sol.problem.stores)))
-        ncost = sol.fitness_score
+        moved = []
 
         for idx in store_indices:
-            store = sol.problem.stores[idx]
-
-            # Release supply from current suppliers
-            for w in store.suppliers:
-                supplyreq_obj = next((x for x in store.warehouses_supply if x.warehouse.id == w.id), None)
-                if supplyreq_obj:
-                    wr = next((x for x in sol.problem.warehouses if x.id == w.id), None)
-                    if wr:
-                        wr.capacity += supplyreq_obj.supplyreq
-                        ncost -= store.supply_costs[w.id] * supplyreq_obj.supplyreq
-
-                        if wr.capacity == wr.start_capacity:
-                            wr.open = False
-                            ncost -= wr.fixed_cost
-
-            # Clear store assignments
-            store.suppliers = []
-            store.warehouses_supply = []
-
-            # Extract incompatible pairs for this store
-            storeinc = {p for p in sol.problem.incompatible_pairs if str(store.id) in p}
-
-            # Rebuild supply cost ranking
-            for wid, cost_val in enumerate(store.supply_costs):
-                wr = next((w for w in sol.problem.warehouses if w.id == wid), None)
-                if wr:
-                    wr.supply_for_store = int(cost_val)
-
             # Allow both open and closed warehouses for reallocation
-            warehouses = sorted(
-                [w for w in sol.problem.warehouses if w.id not in {s.id for s in store.suppliers}],
-                key=lambda w: w.supply_for_store
-            )
+            old_supplies = Tweaks.reassign_store(sol, idx, allow_closed=True)
 
-            req = int(store.demand)
-            sol.count_req = req
+            # If demand wasn't satisfied, rollback immediately
+            if old_supplies is None:
+                for store_id, supplies in reversed(moved):
+                    sol.release_store(store_id)
+                    sol.restore_store(store_id, supplies)
+                return sol
 
-            # Reallocate demand
-            for wr in warehouses[:]:
-                if f"{wr.id},{store.id}" in storeinc:
-                    continue
+            moved.append((idx, old_supplies))
 
-                if wr.capacity >= req:
-                    wr.capacity -= req
-                    wr.open = True
-                    store.supply = store.supply_costs[wr.id]
-                    store.suppliers.append(wr)
-                    store.warehouses_supply.append(SupplyReq(wr, req))
-                    ncost += store.supply_costs[wr.id] * req
-                    if wr.capacity + req == wr.start_capacity:
-                        ncost += wr.fixed_cost
+        return sol
 
-                    # Add incompatibilities
-                    for incompatible_store in store.incompatible_stores:
-                        sol.incompatible_pairs.add(f"{wr.id},{incompatible_store}")
+    @staticmethod
+    def tweak_with_iterations1(solution: Solution, data: InstanceData, iterations=1000, time_limit=None,
+                               rnd: Optional[SearchRandom] = None,
+                               checkpoint: Optional[SearchCheckpoint] = None,
+                               trace: Optional[TraceRecorder] = None,
+                               temperature: float = 100.0, cooling: float = 0.995) -> Solution:
+        rnd = rnd or default_random()
+        current = solution.copy()
+        best = solution.copy()
+        temp = temperature
+        start_iteration = 0
+        elapsed = 0.0
+
+        state = checkpoint.load("tweak_with_iterations1", solution.problem) if checkpoint else None
+        if state is not None:
+            # Continue exactly where the interrupted search stopped, with the time it had left
+            current = restore_solution(state["current"], solution.problem)
+            best = restore_solution(state["best"], solution.problem)
+            temp = state["temperature"]
+            rnd.setstate(state["rng_state"])
+            start_iteration = state["iteration"]
+            elapsed = state["elapsed"]
+
+        start = time.perf_counter()
+        deadline = start + time_limit - elapsed if time_limit is not None else None
+
+        for i in range(start_iteration, iterations):
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+            if checkpoint and checkpoint.due():
+                checkpoint.save({
+                    "method": "tweak_with_iterations1",
+                    "instance": solution.problem.content_hash(),
+                    "iteration": i,
+                    "elapsed": elapsed + time.perf_counter() - start,
+                    "current": capture_solution(current),
+                    "best": capture_solution(best),
+                    "temperature": temp,
+                    "rng_state": rnd.getstate(),
+                })
+
+            old_cost = current.fitness_score
+            store_id = rnd.store_index(len(current.problem.stores))
+            old_supplies = Tweaks.reassign_store(current, store_id)
+
+            if old_supplies is not None:
+                delta = current.fitness_score - old_cost
+
+                # Accept candidate if better or probabilistically, otherwise undo the move
+                if not (delta <= 0 or math.exp(-delta / temp) > rnd.random()):
+                    current.release_store(store_id)
+                    current.restore_store(store_id, old_supplies)
 
-                    break
+            # Update best if improved
+            if current.fitness_score < best.fitness_score:
+                best = current.copy()
 
-            # If demand wasn't satisfied, rollback immediately
-            if not store.suppliers:
-                return oldsol
+            if trace is not None:
+                trace.record(i, current.fitness_score, best.fitness_score, "reassign_store")
 
-        sol.fitness_score = ncost
-        return sol
+            # Cool down temperature
+            temp *= cooling
 
-    @staticmethod
-    def tweak_with_iterations1(solution: Solution, data: InstanceData, iterations=1000) -> Solution:
-        current = solution
-        best = solution
-        temp = 100.0
+        return best
 
-        for i in range(iterations):
-            candidate = Tweaks.tweak_store(current.shallow_copy())
+    @staticmethod
+    def relocate_descent(solution: Solution, stores=None, max_passes: int = 2) -> Solution:
+        """
+        Best-improvement relocation of single-sourced stores, applied in place: each store moves to the
+        candidate warehouse that lowers the cost most, counting fixed costs of opened and closed warehouses.
+        """
+        problem = solution.problem
+        stores = list(range(problem.num_stores)) if stores is None else list(stores)
+
+        for _ in range(max_passes):
+            improved = False
+            for store_id in stores:
+                suppliers = solution.store_suppliers[store_id]
+                if len(suppliers) != 1:
+                    continue
+                (src_id, amount), = suppliers.items()
 
-            delta = candidate.fitness_score - current.fitness_score
+                # Cost the store adds now, including the fixed cost if it is the only store in its warehouse
+                current = amount * problem.supply_costs_matrix[store_id][src_id]
+                if len(solution.warehouse_stores[src_id]) == 1:
+                    current += problem.warehouses[src_id].fixed_cost
 
-            # Accept candidate if better or probabilistically
-            if delta > 0 or math.exp(delta / temp) > random.random():
-                current = candidate
+                solution.unassign(store_id, src_id)
+                warehouses, costs = insertion_costs(solution, store_id)
+                best = int(np.argmin(costs)) if warehouses.size else None
 
-            # Update best if improved
-            if current.fitness_score > best.fitness_score:
-                best = current
+                if best is not None and costs[best] < current:
+                    solution.assign(store_id, int(warehouses[best]), amount)
+                    improved = True
+                else:
+                    solution.assign(store_id, src_id, amount)
 
-            # Cool down temperature
-            temp *= 0.995
+            if not improved:
+                break
 
-        return best
+        return solution
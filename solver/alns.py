@@ -0,0 +1,264 @@
+import math
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.instance_data import InstanceData
+from models.search_random import SearchRandom, default_random
+from models.solution import Solution
+from solver.trace import TraceRecorder
+
+
+def insertion_costs(solution: Solution, store_id: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Feasible warehouses for placing the whole demand of the store and the cost increase of each
+    (supply cost plus the fixed cost if the warehouse is still closed), restricted to the store's candidates.
+    """
+    problem = solution.problem
+    store = problem.stores[store_id]
+    candidates = np.asarray(problem.candidate_warehouses(store_id), dtype=np.int64)
+
+    remaining = np.asarray(solution.remaining_capacity, dtype=np.int64)[candidates]
+    is_open = np.asarray(solution.open_warehouses, dtype=bool)[candidates]
+    costs = (store.demand * problem.costs[store_id, candidates].astype(np.int64)
+             + np.where(is_open, 0, problem.fixed_costs[candidates]))
+
+    feasible = remaining >= store.demand
+    # Warehouses already supplying an incompatible store
+    blocked = {w_id for other in store.incompatible_stores for w_id in solution.store_suppliers[other]}
+    if blocked:
+        feasible &= ~np.isin(candidates, list(blocked))
+
+    return candidates[feasible], costs[feasible]
+
+
+class DestroyOperators:
+    """Each operator picks the ids of the stores to remove; the search releases them from the solution."""
+
+    @staticmethod
+    def random_stores(solution: Solution, rnd: SearchRandom, size: int) -> List[int]:
+        return rnd.sample(range(solution.problem.num_stores), size)
+
+    @staticmethod
+    def worst_cost_stores(solution: Solution, rnd: SearchRandom, size: int) -> List[int]:
+        """Stores with the highest cost, counting their share of the fixed cost of the warehouses they use."""
+        problem = solution.problem
+        load = [w.capacity - solution.remaining_capacity[w.id] for w in problem.warehouses]
+
+        store_costs = []
+        for store_id, suppliers in enumerate(solution.store_suppliers):
+            cost = sum(amount * (problem.supply_costs_matrix[store_id][w_id]
+                                 + problem.warehouses[w_id].fixed_cost / load[w_id])
+                       for w_id, amount in suppliers.items())
+            # Randomized so repeated calls do not always pick the same stores
+            store_costs.append((cost * (0.8 + 0.4 * rnd.random()), store_id))
+
+        return [store_id for _, store_id in sorted(store_costs, reverse=True)[:size]]
+
+    @staticmethod
+    def warehouse_stores(solution: Solution, rnd: SearchRandom, size: int) -> List[int]:
+        """All stores of one open warehouse, which gives the repair a chance to close it."""
+        open_warehouses = [w_id for w_id, is_open in enumerate(solution.open_warehouses) if is_open]
+        if len(open_warehouses) <= solution.problem.min_open_warehouses():
+            # Already at the lower bound: no warehouse can close, destroy random stores instead
+            return DestroyOperators.random_stores(solution, rnd, size)
+
+        w_id = rnd.choice(open_warehouses)
+        return sorted(solution.warehouse_stores[w_id])
+
+    @staticmethod
+    def conflict_related_stores(solution: Solution, rnd: SearchRandom, size: int) -> List[int]:
+        """A random store plus stores it conflicts with, expanding through the conflict graph."""
+        graph = solution.problem.conflict_graph
+        seed = rnd.store_index(solution.problem.num_stores)
+        stores = [seed]
+        selected = {seed}
+        frontier = [seed]
+
+        while frontier and len(stores) < size:
+            store_id = frontier.pop(0)
+            neighbors = graph.neighbors(store_id).tolist()
+            rnd.shuffle(neighbors)
+            for other in neighbors:
+                if other not in selected and len(stores) < size:
+                    selected.add(other)
+                    stores.append(other)
+                    frontier.append(other)
+
+        return stores
+
+
+class RepairOperators:
+    """Each operator reinserts the removed stores; returns False if some store could not be placed."""
+
+    @staticmethod
+    def greedy(solution: Solution, stores: List[int], rnd: SearchRandom) -> bool:
+        # Largest demand first, random tie breaking
+        order = sorted(stores, key=lambda s: (-solution.problem.stores[s].demand, rnd.random()))
+        for store_id in order:
+            warehouses, costs = insertion_costs(solution, store_id)
+            if warehouses.size == 0:
+                return False
+            best = int(np.argmin(costs))
+            solution.assign(store_id, int(warehouses[best]), solution.problem.stores[store_id].demand)
+        return True
+
+    @staticmethod
+    def regret(solution: Solution, stores: List[int], rnd: SearchRandom) -> bool:
+        """Regret-2 insertion: place first the store that loses most if its best warehouse is taken."""
+        problem = solution.problem
+
+        def best_two(store_id):
+            warehouses, costs = insertion_costs(solution, store_id)
+            if warehouses.size == 0:
+                return None
+            order = np.argsort(costs, kind='stable')[:2]
+            options = [(int(costs[i]), int(warehouses[i])) for i in order]
+            if len(options) == 1:
+                options.append((math.inf, -1))  # only one option left, place it before it disappears
+            return options
+
+        options = {store_id: best_two(store_id) for store_id in stores}
+
+        while options:
+            if any(o is None for o in options.values()):
+                return False
+
+            store_id = max(options, key=lambda s: (options[s][1][0] - options[s][0][0], rnd.random()))
+            w_id = options.pop(store_id)[0][1]
+            solution.assign(store_id, w_id, problem.stores[store_id].demand)
+
+            # Only the insertion cost at w_id changed for the other stores
+            for other, best in options.items():
+                store = problem.stores[other]
+                if w_id in (best[0][1], best[1][1]) or other in problem.stores[store_id].incompatible_stores:
+                    options[other] = best_two(other)
+                elif ((problem.reduction is None or w_id in problem.candidate_warehouses(other))
+                      and solution.can_supply(other, w_id, store.demand)):
+                    cost = store.demand * store.supply_costs[w_id]  # w_id is open now
+                    if cost < best[1][0]:
+                        options[other] = sorted([best[0], (cost, w_id)])
+        return True
+
+
+class ALNS:
+    """
+    Adaptive large neighborhood search. Every iteration destroys part of the solution with one operator and
+    repairs it with another, both picked by roulette wheel. Operator weights follow the cost improvement they
+    produce per CPU second, so the effort goes to the operators that pay off on the instance at hand.
+    With effort="stores" the cost of a call is the number of stores it touched instead, which does not depend on
+    machine load, so a seeded run is reproducible.
+    """
+
+    def __init__(self, problem: InstanceData,
+                 destroy_operators: Optional[Dict[str, Callable]] = None,
+                 repair_operators: Optional[Dict[str, Callable]] = None,
+                 iterations: int = 1000, time_limit: Optional[float] = None,
+                 min_destroy: int = 2, max_destroy_fraction: float = 0.05, max_destroy: int = 40,
+                 reaction: float = 0.2, new_best_bonus: float = 2.0, min_probability: float = 0.05,
+                 temperature: float = 100.0, cooling: float = 0.995, effort: str = "cpu",
+                 rnd: Optional[SearchRandom] = None, trace: Optional[TraceRecorder] = None):
+        if effort not in ("cpu", "stores"):
+            raise ValueError(f"Unknown effort measure '{effort}', expected 'cpu' or 'stores'")
+        self.problem = problem
+        self.destroy_operators = destroy_operators or {
+            "random": DestroyOperators.random_stores,
+            "worst_cost": DestroyOperators.worst_cost_stores,
+            "warehouse": DestroyOperators.warehouse_stores,
+            "conflict_related": DestroyOperators.conflict_related_stores,
+        }
+        self.repair_operators = repair_operators or {
+            "greedy": RepairOperators.greedy,
+            "regret": RepairOperators.regret,
+        }
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.min_destroy = min_destroy
+        self.max_destroy = max(min_destroy, min(max_destroy, int(max_destroy_fraction * problem.num_stores)))
+        self.reaction = reaction
+        self.new_best_bonus = new_best_bonus
+        self.min_probability = min_probability
+        self.temperature = temperature
+        self.cooling = cooling
+        self.effort = effort
+        self.rnd = rnd or default_random()
+        self.trace = trace
+
+        self.destroy_weights = {name: 1.0 for name in self.destroy_operators}
+        self.repair_weights = {name: 1.0 for name in self.repair_operators}
+        self.stats = {name: {"calls": 0, "improvements": 0, "cpu": 0.0}
+                      for name in list(self.destroy_operators) + list(self.repair_operators)}
+
+    def select(self, weights: Dict[str, float]) -> str:
+        # Roulette wheel mixed with a uniform floor so no operator is starved by an early lucky streak
+        names = list(weights)
+        total = sum(weights.values())
+        if total <= 0:
+            return self.rnd.choice(names)
+        floor = self.min_probability
+        probabilities = [(1 - floor * len(names)) * weights[n] / total + floor for n in names]
+        return self.rnd.choices(names, weights=probabilities)[0]
+
+    def update_weight(self, weights: Dict[str, float], name: str, reward: float, effort: float) -> None:
+        # Relative improvement per unit of effort (CPU second or store touched), exponentially smoothed
+        score = reward / max(effort, 1e-6)
+        weights[name] = (1 - self.reaction) * weights[name] + self.reaction * score
+
+    def run(self, solution: Solution) -> Solution:
+        current = solution.copy()
+        best = current.copy()
+        temp = self.temperature
+        deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else None
+
+        for iteration in range(self.iterations):
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+            destroy_name = self.select(self.destroy_weights)
+            repair_name = self.select(self.repair_weights)
+            size = min(self.rnd.randint(self.min_destroy, self.max_destroy), self.problem.num_stores)
+            old_cost = current.fitness_score
+
+            cpu_start = time.process_time()
+            removed = self.destroy_operators[destroy_name](current, self.rnd, size)
+            old_supplies = {store_id: current.release_store(store_id) for store_id in removed}
+            cpu_destroy = time.process_time()
+            repaired = self.repair_operators[repair_name](current, removed, self.rnd)
+            cpu_end = time.process_time()
+
+            delta = current.fitness_score - old_cost
+            accepted = repaired and (delta <= 0 or math.exp(-delta / temp) > self.rnd.random())
+
+            if not accepted:
+                # Undo: take the touched stores out again and put back their old supplies
+                for store_id in removed:
+                    current.release_store(store_id)
+                for store_id in removed:
+                    current.restore_store(store_id, old_supplies[store_id])
+
+            reward = 0.0
+            if accepted and delta < 0:
+                reward = -delta / old_cost
+                if current.fitness_score < best.fitness_score:
+                    reward *= self.new_best_bonus
+                    best = current.copy()
+
+            if self.effort == "stores":
+                destroy_effort = repair_effort = len(removed)
+            else:
+                destroy_effort, repair_effort = cpu_destroy - cpu_start, cpu_end - cpu_destroy
+            self.update_weight(self.destroy_weights, destroy_name, reward, destroy_effort)
+            self.update_weight(self.repair_weights, repair_name, reward, repair_effort)
+            for name, cpu in ((destroy_name, cpu_destroy - cpu_start), (repair_name, cpu_end - cpu_destroy)):
+                self.stats[name]["calls"] += 1
+                self.stats[name]["improvements"] += int(reward > 0)
+                self.stats[name]["cpu"] += cpu
+
+            if self.trace is not None:
+                self.trace.record(iteration, current.fitness_score, best.fitness_score,
+                                  f"{destroy_name}+{repair_name}")
+
+            temp *= self.cooling
+
+        return best
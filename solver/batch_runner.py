@@ -0,0 +1,316 @@
+import csv
+import glob
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+
+from models.instance_data import InstanceData
+from models.parser import Parser
+from models.search_random import SearchRandom
+from models.solution import Solution
+from solver.InitialSolution import InitialSolution
+from solver.Tweaks import Tweaks
+from solver.alns import ALNS
+from solver.best_fit import BestFitDecreasing
+from solver.branch_and_bound import BranchAndBound
+from solver.checkpoint import SearchCheckpoint
+from solver.decomposition import Decomposition
+from solver.ejection_chain import ejection_chain_search
+from solver.parallel_neighborhood import ParallelNeighborhood
+from solver.path_relinking import ElitePathRelinking
+from solver.penalty import penalized_annealing
+from solver.solution_store import SolutionStore
+from solver.solver import Solver
+from solver.split_transfer import split_transfer_search
+from solver.trace import TraceRecorder
+from solver.tuned_config import TunedConfig
+from solver.validator import Validator
+from solver.warehouse_ga import WarehouseGA
+
+
+# Construction heuristics selectable from the command line
+CONSTRUCTORS = {
+    "initial_solution": lambda instance: Solver.initial_solution(instance),
+    "initial_solution1": lambda instance: Solver.initial_solution1(instance),
+    "initial_solution2": lambda instance: Solver.initial_solution2(instance),
+    "solve": lambda instance: Solver(instance).solve(),
+    "generate_valid_solution": lambda instance: InitialSolution(instance).generate_valid_solution(),
+    # Same heuristics placing the most conflicting stores first
+    "initial_solution_dsatur": lambda instance: Solver.initial_solution(instance, order="dsatur"),
+    "solve_dsatur": lambda instance: Solver(instance).solve(order="dsatur"),
+    "generate_valid_solution_dsatur":
+        lambda instance: InitialSolution(instance).generate_valid_solution(order="dsatur"),
+    # Packs stores by decreasing demand, opening a warehouse only when its share of the fixed cost pays off
+    "best_fit_decreasing": lambda instance: BestFitDecreasing(instance).run(),
+    # Warm start from the best known solution; execute_run loads it from the solution store when there is one
+    "best_known": lambda instance: Solver.initial_solution(instance),
+}
+
+
+def parallel_descent(solution: Solution, instance: InstanceData, iterations: int, time_limit,
+                     trace: TraceRecorder = None, workers: int = None) -> Solution:
+    # The worker pool and shared memory live only for the duration of one descent
+    with ParallelNeighborhood(instance, workers=workers) as neighborhood:
+        return neighborhood.descend(solution, max_steps=iterations, time_limit=time_limit, trace=trace)
+
+
+# Improvement methods, all called as fn(solution, instance, iterations, time_limit, rnd, checkpoint, trace).
+# Only the RESUMABLE ones below use the checkpoint.
+# ALNS weighs operators by stores touched rather than CPU time so that a (seed, config) pair replays exactly.
+# Methods with tunable parameters (see solver.tuned_config) also take them as keyword arguments.
+IMPROVEMENTS = {
+    "none": lambda solution, instance, iterations, time_limit, rnd, checkpoint, trace: solution,
+    "tweak_with_iterations": lambda solution, instance, iterations, time_limit, rnd, checkpoint, trace:
+        Tweaks.tweak_with_iterations(solution, instance, iterations=iterations, time_limit=time_limit,
+                                     rnd=rnd, checkpoint=checkpoint, trace=trace),
+    "tweak_with_iterations1": lambda solution, instance, iterations, time_limit, rnd, checkpoint, trace, **params:
+        Tweaks.tweak_with_iterations1(solution, instance, iterations=iterations, time_limit=time_limit,
+                                      rnd=rnd, checkpoint=checkpoint, trace=trace, **params),
+    "move_store_allocation": lambda solution, instance, iterations, time_limit, rnd, checkpoint, trace:
+        Tweaks.move_store_allocation(solution, instance),
+    "alns": lambda solution, instance, iterations, time_limit, rnd, checkpoint, trace:
+        ALNS(instance, iterations=iterations, time_limit=time_limit, effort="stores", rnd=rnd,
+             trace=trace).run(solution),
+    "alns_pr": lambda solution, instance, iterations, time_limit, rnd, checkpoint, trace:
+        ElitePathRelinking(instance, iterations=iterations, time_limit=time_limit, effort="stores",
+                           rnd=rnd, trace=trace).run(solution),
+    "parallel_descent": lambda solution, instance, iterations, time_limit, rnd, checkpoint, trace, workers=None:
+        parallel_descent(solution, instance, iterations, time_limit, trace, workers),
+    "penalized_annealing": lambda solution, instance, iterations, time_limit, rnd, checkpoint, trace:
+        penalized_annealing(solution, instance, iterations=iterations, time_limit=time_limit, rnd=rnd, trace=trace),
+    "ejection_chains": lambda solution, instance, iterations, time_limit, rnd, checkpoint, trace:
+        ejection_chain_search(solution, instance, iterations=iterations, time_limit=time_limit, rnd=rnd, trace=trace),
+    "split_transfer": lambda solution, instance, iterations, time_limit, rnd, checkpoint, trace:
+        split_transfer_search(solution, instance, iterations=iterations, time_limit=time_limit, rnd=rnd, trace=trace),
+    # Iterations and time limit per subproblem; keeps the input solution if that is cheaper
+    "decomposition": lambda solution, instance, iterations, time_limit, rnd, checkpoint, trace, workers=None:
+        min(solution, Decomposition(instance, iterations=iterations, time_limit=time_limit, workers=workers,
+                                    rnd=rnd).run(),
+            key=lambda s: s.fitness_score),
+    # Exact search from the input solution, iterations is the node limit; keeps the input if nothing better is found
+    "branch_and_bound": lambda solution, instance, iterations, time_limit, rnd, checkpoint, trace:
+        BranchAndBound(instance, incumbent=solution, max_nodes=iterations, time_limit=time_limit).run().solution,
+    # One generation per iteration
+    "warehouse_ga": lambda solution, instance, iterations, time_limit, rnd, checkpoint, trace, **params:
+        WarehouseGA(instance, generations=iterations, time_limit=time_limit, rnd=rnd, trace=trace,
+                    **params).run(solution),
+}
+
+# Improvements running a process pool of their own; inside a batch they get a `workers` share of the CPUs
+NESTED_POOLS = {"parallel_descent", "decomposition"}
+
+# Improvements that save and restore their state through a SearchCheckpoint; the others are passed
+# checkpoint=None and start over when a sweep is resumed
+RESUMABLE = {"tweak_with_iterations", "tweak_with_iterations1"}
+
+
+RESULT_FIELDS = ["run_id", "instance", "constructor", "improvement", "seed", "iterations", "time_limit",
+                 "reduce_k", "initial_cost", "cost", "valid", "wall_time", "solution_path", "skipped", "error"]
+
+
+def instance_name(instance_path: str) -> str:
+    """Short instance name, e.g. 'wlp02' for 'parsed_instances/wlp02.dzn.json'."""
+    return os.path.basename(instance_path).split('.')[0]
+
+
+def run_id(run: Dict) -> str:
+    """Stable key of a run inside a sweep, used to resume partially completed sweeps."""
+    key = (f"{instance_name(run['instance'])}__{run['constructor']}__{run['improvement']}"
+           f"__s{run['seed']}__i{run['iterations']}__t{run['time_limit']}")
+    # Only reduced runs carry the suffix, so the ids of full-graph runs stay resumable
+    return key + f"__k{run['reduce_k']}" if run.get("reduce_k") else key
+
+
+def execute_run(run: Dict, output_dir: str, checkpoint_interval: float = 60.0, resume: bool = False,
+                config_path: str = None, store_path: str = None, cost_dir: str = None,
+                inner_workers: int = None) -> Dict:
+    """Solve a single (instance, config) pair. Runs inside a worker process.
+    With a tuned config file, the method's parameters for the instance's size class replace the defaults.
+    With a solution store, a run whose instance already has a solution at or below the run's target cost is
+    skipped, and every valid result is offered to the store.
+    With a cost directory, the supply cost matrix is memory-mapped from there (see Parser).
+    With run["reduce_k"], constructors and improvements search the reduced graph of Instance.reduce(k).
+    Improvements with a pool of their own (NESTED_POOLS) get `inner_workers` processes.
+    Only RESUMABLE improvements checkpoint; on resume, any other improvement runs again from the start."""
+    # Everything random in the run draws from this one generator, so the seed alone fixes the result
+    rnd = SearchRandom(run["seed"])
+    result = {field: run.get(field) for field in RESULT_FIELDS}
+    result["run_id"] = run_id(run)
+
+    # Convergence trace, flushed with every checkpoint and at the end of the run
+    trace = TraceRecorder(os.path.join(output_dir, "traces", f"{result['run_id']}.csv"))
+    checkpoint = SearchCheckpoint(os.path.join(output_dir, "checkpoints", f"{result['run_id']}.pkl"),
+                                  interval=checkpoint_interval, trace=trace)
+    if not resume or run["improvement"] not in RESUMABLE:
+        # A run that cannot continue from a checkpoint starts a fresh trace
+        checkpoint.clear()
+        trace.clear()
+        if run["improvement"] not in RESUMABLE:
+            checkpoint = None
+
+    start = time.perf_counter()
+    store = SolutionStore(store_path) if store_path else None
+    try:
+        instance: InstanceData = Parser(cost_dir).parse_instance(run["instance"])
+        if run.get("reduce_k"):
+            instance = instance.reduce(run["reduce_k"])
+
+        best_cost = store.best_cost(instance) if store is not None else None
+        if run.get("target") is not None and best_cost is not None and best_cost <= run["target"]:
+            result.update(cost=best_cost, valid=True, skipped=True)
+            result["wall_time"] = round(time.perf_counter() - start, 3)
+            return result
+
+        solution = store.best(instance) if store is not None and run["constructor"] == "best_known" else None
+        if solution is None:
+            solution = CONSTRUCTORS[run["constructor"]](instance)
+        if solution.fitness_score is None:
+            solution.fitness()
+        result["initial_cost"] = int(solution.fitness_score)
+
+        params = TunedConfig.load(config_path).params(run["improvement"], instance) if config_path else {}
+        iterations = params.pop("iterations", run["iterations"])
+        result["iterations"] = iterations
+
+        # A RESUMABLE improvement continues from the checkpoint an earlier attempt left behind
+        pool = {"workers": inner_workers} if run["improvement"] in NESTED_POOLS else {}
+        improved = IMPROVEMENTS[run["improvement"]](solution, instance, iterations, run["time_limit"],
+                                                    rnd, checkpoint, trace, **params, **pool)
+        if improved.fitness_score is None:
+            improved.fitness()
+
+        result["cost"] = int(improved.fitness_score)
+        result["valid"] = Validator(instance, improved).validate()
+
+        solution_path = os.path.join(output_dir, "solutions", f"{result['run_id']}.txt")
+        improved.export(solution_path)
+        result["solution_path"] = solution_path
+        trace.flush()
+        if checkpoint is not None:
+            checkpoint.clear()
+
+        if store is not None and result["valid"]:
+            config = {key: run[key] for key in ("constructor", "improvement", "seed", "time_limit")}
+            config.update(params, iterations=iterations)
+            store.submit(instance, improved, config, round(time.perf_counter() - start, 3),
+                         instance_name(run["instance"]))
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if store is not None:
+            store.close()
+
+    result["wall_time"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+class BatchRunner:
+    def __init__(self, instance_patterns: List[str], constructors: List[str], improvements: List[str],
+                 seeds: List[int], iterations: int = 1000, time_limit=None, workers=None,
+                 output_dir: str = "output", checkpoint_interval: float = 60.0, config_path: str = None,
+                 store_path: str = None, targets: Dict[str, int] = None, cost_dir: str = None,
+                 reduce_k: int = None):
+        self.instance_paths = sorted({path for pattern in instance_patterns for path in glob.glob(pattern)})
+        self.constructors = constructors
+        self.improvements = improvements
+        self.seeds = seeds
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.workers = workers
+        self.output_dir = output_dir
+        self.checkpoint_interval = checkpoint_interval
+        self.config_path = config_path
+        self.store_path = store_path
+        self.cost_dir = cost_dir
+        self.reduce_k = reduce_k  # candidate warehouses per store in the reduced graph, None for the full one
+        self.targets = targets or {}  # instance name -> target cost, skipped once the store holds a solution as good
+        self.csv_path = os.path.join(output_dir, "results.csv")
+        self.json_path = os.path.join(output_dir, "results.json")
+
+        for name in constructors:
+            if name not in CONSTRUCTORS:
+                raise ValueError(f"Unknown constructor '{name}', expected one of {sorted(CONSTRUCTORS)}")
+        for name in improvements:
+            if name not in IMPROVEMENTS:
+                raise ValueError(f"Unknown improvement '{name}', expected one of {sorted(IMPROVEMENTS)}")
+
+    def build_runs(self) -> List[Dict]:
+        """Cartesian product of instances and solver configurations, largest instances first."""
+        # File size is a cheap proxy for S*W that does not require parsing every instance up front
+        instance_paths = sorted(self.instance_paths, key=os.path.getsize, reverse=True)
+
+        runs = []
+        for path, constructor, improvement, seed in itertools.product(
+                instance_paths, self.constructors, self.improvements, self.seeds):
+            runs.append({
+                "instance": path,
+                "constructor": constructor,
+                "improvement": improvement,
+                "seed": seed,
+                "iterations": self.iterations,
+                "time_limit": self.time_limit,
+                "reduce_k": self.reduce_k,
+                "target": self.targets.get(instance_name(path)),
+            })
+        return runs
+
+    def load_results(self) -> List[Dict]:
+        """Results of already completed runs, read back from the results CSV."""
+        if not os.path.exists(self.csv_path):
+            return []
+        with open(self.csv_path, 'r', newline='') as file:
+            return list(csv.DictReader(file))
+
+    def append_result(self, result: Dict) -> None:
+        """Append one finished run to the CSV so an interrupted sweep keeps its progress."""
+        write_header = not os.path.exists(self.csv_path)
+        with open(self.csv_path, 'a', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS)
+            if write_header:
+                writer.writeheader()
+            writer.writerow(result)
+
+    def write_json(self, results: List[Dict]) -> None:
+        tmp_path = self.json_path + ".tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(results, file, indent=2)
+        os.replace(tmp_path, self.json_path)
+
+    def run(self, resume: bool = False) -> List[Dict]:
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        results = self.load_results() if resume else []
+        done = {r["run_id"] for r in results if not r.get("error")}
+        # Failed runs are retried on resume, so drop their old rows from the summary
+        results = [r for r in results if r["run_id"] in done]
+        if os.path.exists(self.csv_path):
+            os.remove(self.csv_path)
+        for result in results:
+            self.append_result(result)
+
+        pending = [run for run in self.build_runs() if run_id(run) not in done]
+        total = len(results) + len(pending)
+        print(f"{len(pending)} runs pending, {len(done)} already completed")
+
+        # One process budget for both levels: the batch workers split the CPUs among their nested pools
+        cpus = os.cpu_count() or 1
+        workers = self.workers or cpus
+        inner_workers = max(1, cpus // workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(execute_run, run, self.output_dir, self.checkpoint_interval, resume,
+                                       self.config_path, self.store_path, self.cost_dir, inner_workers): run
+                       for run in pending}
+            for future in as_completed(futures):
+                result = future.result()
+                self.append_result(result)
+                results.append(result)
+                status = result["error"] or f"cost={result['cost']} valid={result['valid']}"
+                if result.get("skipped"):
+                    status += " (best known meets the target, skipped)"
+                print(f"[{len(results)}/{total}] {result['run_id']}: {status}")
+
+        self.write_json(results)
+        return results
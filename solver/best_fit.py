@@ -0,0 +1,159 @@
+from bisect import bisect_left, insort
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from models.instance_data import InstanceData
+from models.solution import Solution
+from solver.penalty import place_demand
+
+
+class ResidualIndex:
+    """
+    Open warehouses as (residual capacity, id) pairs in a bucketed sorted list: sorted buckets of at most
+    2 * `bucket_size` entries plus the largest entry of each. Finding the tightest fit is two bisections,
+    O(log W), and an update only shifts entries within one bucket (and the bucket list when one splits or
+    empties).
+    """
+
+    def __init__(self, bucket_size: int = 32):
+        self.bucket_size = bucket_size
+        self.buckets: List[List[Tuple[int, int]]] = []
+        self.maxes: List[Tuple[int, int]] = []
+
+    def add(self, w_id: int, residual: int) -> None:
+        entry = (residual, w_id)
+        if not self.buckets:
+            self.buckets.append([entry])
+            self.maxes.append(entry)
+            return
+        i = min(bisect_left(self.maxes, entry), len(self.buckets) - 1)
+        bucket = self.buckets[i]
+        insort(bucket, entry)
+        self.maxes[i] = bucket[-1]
+        if len(bucket) > 2 * self.bucket_size:
+            self.buckets[i:i + 1] = [bucket[:self.bucket_size], bucket[self.bucket_size:]]
+            self.maxes[i:i + 1] = [bucket[self.bucket_size - 1], bucket[-1]]
+
+    def remove(self, w_id: int, residual: int) -> None:
+        entry = (residual, w_id)
+        i = bisect_left(self.maxes, entry)
+        bucket = self.buckets[i]
+        del bucket[bisect_left(bucket, entry)]
+        if bucket:
+            self.maxes[i] = bucket[-1]
+        else:
+            del self.buckets[i], self.maxes[i]
+
+    def update(self, w_id: int, old: int, new: int) -> None:
+        self.remove(w_id, old)
+        self.add(w_id, new)
+
+    def fits(self, demand: int) -> Iterator[Tuple[int, int]]:
+        """(residual, id) of the open warehouses with room for the demand, tightest first."""
+        key = (demand, -1)
+        i = bisect_left(self.maxes, key)
+        if i == len(self.buckets):
+            return
+        yield from self.buckets[i][bisect_left(self.buckets[i], key):]
+        for bucket in self.buckets[i + 1:]:
+            yield from bucket
+
+
+class BestFitDecreasing:
+    """
+    Single-source construction that packs instead of taking the cheapest warehouse with room. Stores are
+    placed by decreasing demand, the most conflicting first among equal demands.
+
+    For each store, at most 2 * `window` open warehouses are scored: the `window` tightest conflict-free
+    fits from the ResidualIndex, and whichever of the store's `window` cheapest warehouses are open with
+    room. Each is scored by supply cost plus `fit_weight` per unit of room left unused. window=None scores
+    every open warehouse that fits.
+
+    Opening a closed warehouse is scored by supply cost plus `open_weight` times the share of its fixed
+    cost the store uses (demand / capacity). It wins only if that beats every open warehouse. A store that
+    fits nowhere whole is split like penalty.place_demand does.
+    """
+
+    def __init__(self, instance: InstanceData, window: Optional[int] = 32, fit_weight: float = 0.1,
+                 open_weight: float = 1.0):
+        self.instance = instance
+        self.window = window
+        self.fit_weight = fit_weight
+        self.open_weight = open_weight
+        self.capacities = np.array([w.capacity for w in instance.warehouses], dtype=np.int64)
+        self.unit_fixed = instance.fixed_costs / np.maximum(self.capacities, 1)
+        # Unbounded, the tightest fits already cover every open warehouse
+        self.cheapest = instance.cost_order()[:, :window] if window is not None else None
+
+    def store_order(self) -> List[int]:
+        degrees = self.instance.conflict_graph.degrees
+        return sorted(range(self.instance.num_stores),
+                      key=lambda s: (-self.instance.stores[s].demand, -int(degrees[s]), s))
+
+    def best_open(self, solution: Solution, index: ResidualIndex, store_id: int,
+                  demand: int) -> Tuple[float, Optional[int]]:
+        costs = self.instance.supply_costs_matrix[store_id]
+        best, best_w = np.inf, None
+
+        def consider(w_id: int, residual: int) -> None:
+            nonlocal best, best_w
+            score = demand * costs[w_id] + self.fit_weight * (residual - demand)
+            if score < best:
+                best, best_w = score, w_id
+
+        seen = 0
+        for residual, w_id in index.fits(demand):
+            if seen == self.window:
+                break
+            if not solution.conflicts(store_id, w_id):
+                consider(w_id, residual)
+                seen += 1
+        # The tightest fits can all be expensive: also try the store's cheapest warehouses that are open
+        for w_id in self.cheapest[store_id].tolist() if self.cheapest is not None else ():
+            if solution.open_warehouses[w_id] and solution.can_supply(store_id, w_id, demand):
+                consider(w_id, solution.remaining_capacity[w_id])
+        return best, best_w
+
+    def best_new(self, solution: Solution, store_id: int, demand: int) -> Tuple[float, Optional[int]]:
+        is_closed = ~np.asarray(solution.open_warehouses, dtype=bool)
+        closed = np.nonzero(is_closed & (self.capacities >= demand))[0]
+        if not closed.size:
+            return np.inf, None
+        scores = (demand * self.instance.costs[store_id, closed].astype(np.int64)
+                  + self.open_weight * self.unit_fixed[closed] * demand)
+        i = int(np.argmin(scores))
+        return float(scores[i]), int(closed[i])
+
+    def run(self) -> Solution:
+        instance = self.instance
+        instance.feasibility().raise_if_infeasible()
+        solution = Solution(instance)
+        index = ResidualIndex()
+
+        for store_id in self.store_order():
+            demand = instance.stores[store_id].demand
+            open_score, open_w = self.best_open(solution, index, store_id, demand)
+            new_score, new_w = self.best_new(solution, store_id, demand)
+
+            if open_w is not None and open_score <= new_score:
+                before = solution.remaining_capacity[open_w]
+                solution.assign(store_id, open_w, demand)
+                index.update(open_w, before, solution.remaining_capacity[open_w])
+            elif new_w is not None:
+                solution.assign(store_id, new_w, demand)
+                index.add(new_w, solution.remaining_capacity[new_w])
+            else:
+                # No warehouse takes the store whole: split it, then re-index the warehouses it went to
+                before = {w_id: solution.remaining_capacity[w_id] for w_id, is_open
+                          in enumerate(solution.open_warehouses) if is_open}
+                if place_demand(solution, store_id, demand):
+                    raise ValueError(f"Could not fully satisfy store {store_id}'s demand.")
+                for w_id in solution.store_suppliers[store_id]:
+                    if w_id in before:
+                        index.update(w_id, before[w_id], solution.remaining_capacity[w_id])
+                    else:
+                        index.add(w_id, solution.remaining_capacity[w_id])
+
+        solution.fitness()
+        return solution
@@ -0,0 +1,539 @@
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from models.cost_matrix import row_chunks
+from models.instance_data import InstanceData
+from models.solution import Solution
+from solver.penalty import repair
+from solver.solver import Solver
+
+# Warehouse status in a node
+FREE, CLOSED, OPEN = -1, 0, 1
+
+# Worker context (relaxation, shared incumbent cost and node counter, limits), set by _init_worker in every
+# worker process and in the parent for serial exploration
+_context: Dict = {}
+
+
+class Node:
+    """
+    A subproblem: every warehouse is free, closed (supplies nothing) or open (supplies something and pays its fixed
+    cost), and some store-warehouse cells are forbidden by conflict branching. `bound` is the parent's bound for it
+    and `multipliers` the Lagrange multipliers to start from.
+    """
+    __slots__ = ('status', 'forbidden', 'multipliers', 'bound')
+
+    def __init__(self, status: np.ndarray, forbidden: FrozenSet[Tuple[int, int]], multipliers: np.ndarray,
+                 bound: float):
+        self.status = status
+        self.forbidden = forbidden
+        self.multipliers = multipliers
+        self.bound = bound
+
+
+class Relaxation:
+    """
+    Bounds and branching for the nodes of the exact search.
+
+    Lower bound: Lagrangian relaxation of the demand constraints. For multipliers λ, each usable warehouse solves
+    its own problem: supply the stores whose λ exceeds their supply cost there, within capacity and with no two
+    incompatible stores. That is a continuous knapsack, computed for all warehouses at once with one sort; only the
+    warehouses whose greedy fill picks incompatible stores get an exact knapsack with conflicts. The warehouses to
+    open are then those with a negative value, at least `min_open_warehouses` of them. λ follows subgradient steps.
+
+    A warehouse whose opening (or closing) alone would lift the bound past the incumbent is fixed the other way;
+    otherwise the search branches on the free warehouse whose two children have the highest smaller bound. With
+    every warehouse fixed, the open ones get an exact min-cost transportation (conflicts ignored); if it puts two
+    incompatible stores in a warehouse, the node branches on which of the two is forbidden there, and the
+    transportation with its conflicts repaired is offered as a new incumbent.
+    """
+
+    def __init__(self, problem: InstanceData):
+        self.problem = problem
+        self.costs = np.asarray(problem.costs)  # a view in the stored dtype: columns are cast where they are used
+        self.demands = np.array([s.demand for s in problem.stores], dtype=np.int64)
+        self.capacities = np.array([w.capacity for w in problem.warehouses], dtype=np.int64)
+        self.fixed = problem.fixed_costs.astype(np.float64)
+        self.total_demand = int(self.demands.sum())
+        self.min_open = problem.min_open_warehouses()
+        self.incompatible = [frozenset(s.incompatible_stores) for s in problem.stores]
+
+    def initial_multipliers(self) -> np.ndarray:
+        """Cheapest supply cost plus fixed cost per unit of capacity, over all warehouses."""
+        unit_fixed = (self.fixed / np.maximum(self.capacities, 1))[None, :]
+        S, W = self.costs.shape
+        return np.concatenate([(self.costs[start:stop] + unit_fixed).min(axis=1) for start, stop in row_chunks(S, W)])
+
+    def blocked(self, forbidden: FrozenSet[Tuple[int, int]]) -> Optional[np.ndarray]:
+        if not forbidden:
+            return None
+        mask = np.zeros(self.costs.shape, dtype=bool)
+        stores, warehouses = zip(*forbidden)
+        mask[list(stores), list(warehouses)] = True
+        return mask
+
+    @staticmethod
+    def prunable(bound: float, upper: float) -> bool:
+        """Costs are integers, so a node is only worth exploring if it may hold a solution of cost upper - 1."""
+        return bound - 1e-6 * abs(bound) > upper - 1
+
+    # --- Lagrangian bound ------------------------------------------------------------------------------------
+
+    def conflict_knapsack(self, stores: np.ndarray, benefits: np.ndarray, capacity: int) -> Tuple[float, list]:
+        """
+        Most valuable supply of the stores (sorted by decreasing benefit per unit) within the capacity when no two
+        incompatible stores may both be supplied. Depth-first with the continuous knapsack as bound.
+        Returns the value and the (store, amount) pairs.
+        """
+        demands = self.demands[stores].tolist()
+        benefits = benefits.tolist()
+        index = {s: i for i, s in enumerate(stores.tolist())}
+        conflicts = [sum(1 << index[t] for t in self.incompatible[s] if t in index) for s in stores.tolist()]
+        n = len(demands)
+        best_value, best_taken = 0.0, 0
+
+        def fill(i: int, room: int, banned: int) -> float:
+            value = 0.0
+            for j in range(i, n):
+                if room <= 0:
+                    break
+                if not banned >> j & 1:
+                    amount = min(demands[j], room)
+                    value += benefits[j] * amount
+                    room -= amount
+            return value
+
+        def visit(i: int, room: int, value: float, taken: int, banned: int) -> None:
+            nonlocal best_value, best_taken
+            if value > best_value:
+                best_value, best_taken = value, taken
+            if i == n or room <= 0 or value + fill(i, room, banned) <= best_value + 1e-9:
+                return
+            if not banned >> i & 1:
+                amount = min(demands[i], room)
+                visit(i + 1, room - amount, value + benefits[i] * amount, taken | 1 << i, banned | conflicts[i])
+            visit(i + 1, room, value, taken, banned | 1 << i)
+
+        visit(0, capacity, 0.0, 0, 0)
+        chosen, room = [], capacity
+        for i in range(n):
+            if best_taken >> i & 1:
+                amount = min(demands[i], room)
+                chosen.append((int(stores[i]), amount))
+                room -= amount
+        return best_value, chosen
+
+    def warehouse_values(self, multipliers: np.ndarray, usable: np.ndarray,
+                         blocked: Optional[np.ndarray]) -> Tuple[np.ndarray, Dict[int, list]]:
+        """Fixed cost minus the best knapsack value of every usable warehouse (inf if not usable), and the fills."""
+        columns = np.nonzero(usable)[0]
+        values = np.empty(len(columns))
+        fills = {}
+        # Column blocks: the float benefits and the sort keep to CHUNK_BYTES instead of a dense float copy
+        for start, stop in row_chunks(len(columns), len(self.demands)):
+            block = columns[start:stop]
+            benefits = multipliers[:, None] - self.costs[:, block]
+            if blocked is not None:
+                benefits[blocked[:, block]] = 0
+            order = np.argsort(-benefits, axis=0, kind='stable')
+            sorted_benefits = np.take_along_axis(benefits, order, axis=0)
+            sorted_demands = self.demands[order]
+            before = np.cumsum(sorted_demands, axis=0) - sorted_demands
+            taken = np.clip(np.minimum(sorted_demands, self.capacities[block][None, :] - before), 0, None)
+            taken[sorted_benefits <= 0] = 0
+            values[start:stop] = (sorted_benefits * taken).sum(axis=0)
+
+            for j, w_id in enumerate(block.tolist()):
+                rows = np.nonzero(taken[:, j])[0]
+                stores = order[rows, j]
+                chosen = set(stores.tolist())
+                if any(not self.incompatible[s].isdisjoint(chosen) for s in chosen):
+                    positive = order[sorted_benefits[:, j] > 0, j]
+                    values[start + j], fills[w_id] = self.conflict_knapsack(positive, benefits[positive, j],
+                                                                            int(self.capacities[w_id]))
+                else:
+                    fills[w_id] = list(zip(stores.tolist(), taken[rows, j].tolist()))
+
+        g = np.full(len(usable), np.inf)
+        g[columns] = self.fixed[columns] - values
+        return g, fills
+
+    def choose_open(self, status: np.ndarray, g: np.ndarray) -> Optional[np.ndarray]:
+        """Warehouses the Lagrangian subproblem opens: fixed open, free with g < 0, topped up to the minimum count."""
+        open_mask = (status == OPEN) | ((status == FREE) & (g < 0))
+        missing = self.min_open - int(open_mask.sum())
+        if missing > 0:
+            extra = np.nonzero((status == FREE) & ~open_mask)[0]
+            if extra.size < missing:
+                return None
+            open_mask[extra[np.argsort(g[extra], kind='stable')[:missing]]] = True
+        return open_mask
+
+    def lagrangian(self, status: np.ndarray, blocked: Optional[np.ndarray], multipliers: np.ndarray, upper: float,
+                   iterations: int) -> Tuple[float, np.ndarray, np.ndarray]:
+        """Best bound over `iterations` subgradient steps: (bound, its multipliers, its warehouse values g)."""
+        usable = status != CLOSED
+        if int(self.capacities[usable].sum()) < self.total_demand:
+            return math.inf, multipliers, np.full(len(status), np.inf)
+        best = (-math.inf, multipliers, None)
+        multipliers = multipliers.copy()
+        step, stall = 2.0, 0
+        for _ in range(iterations):
+            g, fills = self.warehouse_values(multipliers, usable, blocked)
+            open_mask = self.choose_open(status, g)
+            if open_mask is None:
+                return math.inf, multipliers, g
+            bound = float(multipliers @ self.demands + g[open_mask].sum())
+            if bound > best[0]:
+                best, stall = (bound, multipliers.copy(), g), 0
+            else:
+                stall += 1
+                if stall >= 5:
+                    step, stall = step / 2, 0
+            if self.prunable(best[0], upper) or step < 1e-3:
+                break
+
+            unmet = self.demands.astype(np.float64)
+            for w_id in np.nonzero(open_mask)[0].tolist():
+                for store_id, amount in fills[w_id]:
+                    unmet[store_id] -= amount
+            norm = float(unmet @ unmet)
+            if norm == 0:
+                break  # the relaxed solution meets every demand exactly: the bound cannot improve
+            gap = (upper if math.isfinite(upper) else 1.05 * abs(bound) + 1) - bound
+            multipliers += step * max(gap, 1.0) / norm * unmet
+        return best
+
+    def child_bound(self, status: np.ndarray, g: np.ndarray, base: float, w_id: int, value: int) -> float:
+        """Bound of the node with one more warehouse fixed, for the same multipliers."""
+        child = status.copy()
+        child[w_id] = value
+        open_mask = self.choose_open(child, g)
+        if open_mask is None or int(self.capacities[child != CLOSED].sum()) < self.total_demand:
+            return math.inf
+        return base + float(g[open_mask].sum())
+
+    # --- leaves ----------------------------------------------------------------------------------------------
+
+    def transport(self, open_ids: np.ndarray, blocked: Optional[np.ndarray]) -> Optional[Tuple[int, np.ndarray]]:
+        """
+        Min-cost transportation of all demand to the open warehouses (incompatibilities ignored) by successive
+        shortest paths. Stores are eliminated from the residual graph: an arc k -> k' through store s moves a unit
+        of s from k to k', so Bellman-Ford runs on the warehouses only. Returns (supply cost, flows) or None.
+        """
+        costs = self.costs[:, open_ids].astype(np.float64)
+        if blocked is not None:
+            costs = np.where(blocked[:, open_ids], np.inf, costs)
+        K = len(open_ids)
+        flows = np.zeros((len(self.demands), K), dtype=np.int64)
+        need = self.demands.copy()
+        room = self.capacities[open_ids].copy()
+        if room.sum() < need.sum():
+            return None
+        columns = np.arange(K)
+
+        while need.any():
+            sources = np.nonzero(need > 0)[0]
+            source_costs = costs[sources]
+            dist = source_costs.min(axis=0)
+            pred = np.full(K, -1)
+
+            # arcs[k, k']: cheapest move of a unit from k to k' over the stores k supplies
+            from_k, stores = np.nonzero(flows.T)
+            arcs = np.full((K, K), np.inf)
+            if stores.size:
+                moves = costs[stores] - costs[stores, from_k][:, None]
+                starts = np.flatnonzero(np.r_[True, from_k[1:] != from_k[:-1]])
+                arcs[from_k[starts]] = np.minimum.reduceat(moves, starts, axis=0)
+            arcs[columns, columns] = np.inf
+
+            for _ in range(K):
+                candidates = dist[:, None] + arcs
+                best_from = np.argmin(candidates, axis=0)
+                new = candidates[best_from, columns]
+                better = new < dist
+                if not better.any():
+                    break
+                dist = np.where(better, new, dist)
+                pred = np.where(better, best_from, pred)
+
+            targets = np.nonzero((room > 0) & np.isfinite(dist))[0]
+            if not targets.size:
+                return None
+            k = int(targets[np.argmin(dist[targets])])
+            path = []  # (from warehouse or -1 for a source store, store, to warehouse), target first
+            while len(path) <= K:
+                src = int(pred[k])
+                if src < 0:
+                    path.append((src, int(sources[np.argmin(source_costs[:, k])]), k))
+                    break
+                rows = np.nonzero(flows[:, src])[0]
+                path.append((src, int(rows[np.argmin(costs[rows, k] - costs[rows, src])]), k))
+                k = src
+
+            target, source = path[0][2], path[-1][1]
+            amount = min(int(room[target]), int(need[source]))
+            for src, store_id, _ in path:
+                if src >= 0:
+                    amount = min(amount, int(flows[store_id, src]))
+            for src, store_id, dst in path:
+                flows[store_id, dst] += amount
+                if src >= 0:
+                    flows[store_id, src] -= amount
+            need[source] -= amount
+            room[target] -= amount
+
+        return int((flows * self.costs[:, open_ids].astype(np.int64)).sum()), flows
+
+    def conflict_in(self, open_ids: np.ndarray, flows: np.ndarray) -> Optional[Tuple[int, int, int]]:
+        """An incompatible pair supplied by the same warehouse, (store, store, warehouse), or None."""
+        for k, w_id in enumerate(open_ids.tolist()):
+            stores = set(np.nonzero(flows[:, k])[0].tolist())
+            for store_id in sorted(stores):
+                clash = self.incompatible[store_id].intersection(stores)
+                if clash:
+                    return store_id, min(clash), w_id
+        return None
+
+    # --- node expansion --------------------------------------------------------------------------------------
+
+    def expand(self, node: Node, upper: float, iterations: int,
+               leaf_iterations: int) -> Tuple[List[Node], Optional[list]]:
+        """
+        Bound the node and return its children, best first, and a feasible solution as (store, warehouse, amount)
+        triples if one better than `upper` was found there. Nodes with every warehouse fixed get
+        `leaf_iterations` more subgradient steps before the transportation problem is solved.
+        """
+        blocked = self.blocked(node.forbidden)
+        bound, multipliers, g = self.lagrangian(node.status, blocked, node.multipliers, upper, iterations)
+        if self.prunable(bound, upper):
+            return [], None
+
+        # Fix warehouses whose other choice cannot beat the incumbent, then branch on the most balanced one
+        status = node.status.copy()
+        base = bound - float(g[self.choose_open(node.status, g)].sum())
+        branch, branch_bounds, best_score = None, None, -math.inf
+        changed = True
+        while changed:
+            changed, branch, best_score = False, None, -math.inf
+            for w_id in np.nonzero(status == FREE)[0].tolist():
+                opened = self.child_bound(status, g, base, w_id, OPEN)
+                closed = self.child_bound(status, g, base, w_id, CLOSED)
+                if self.prunable(opened, upper) and self.prunable(closed, upper):
+                    return [], None
+                if self.prunable(opened, upper) or self.prunable(closed, upper):
+                    status[w_id] = CLOSED if self.prunable(opened, upper) else OPEN
+                    changed = True
+                elif min(opened, closed) > best_score:
+                    branch, branch_bounds, best_score = w_id, (opened, closed), min(opened, closed)
+
+        if branch is not None:
+            children = []
+            for value, child_bound in zip((OPEN, CLOSED), branch_bounds):
+                child = status.copy()
+                child[branch] = value
+                children.append(Node(child, node.forbidden, multipliers, max(bound, child_bound)))
+            return sorted(children, key=lambda c: c.bound), None
+
+        # Every warehouse is fixed: the bound with conflicts is much tighter than the transportation cost, so
+        # settle it first, then solve the transportation and branch on a conflict it leaves
+        open_ids = np.nonzero(status == OPEN)[0]
+        if len(open_ids) < self.min_open:
+            return [], None
+        if leaf_iterations:
+            leaf_bound, multipliers, _ = self.lagrangian(status, blocked, multipliers, upper, leaf_iterations)
+            bound = max(bound, leaf_bound)
+            if self.prunable(bound, upper):
+                return [], None
+        result = self.transport(open_ids, blocked)
+        if result is None:
+            return [], None
+        supply_cost, flows = result
+        bound = max(bound, supply_cost + float(self.fixed[open_ids].sum()))
+        if self.prunable(bound, upper):
+            return [], None
+
+        stores, columns = np.nonzero(flows)
+        triples = list(zip(stores.tolist(), open_ids[columns].tolist(), flows[stores, columns].tolist()))
+        conflict = self.conflict_in(open_ids, flows)
+        if conflict is None:
+            return [], triples
+        first, second, w_id = conflict
+        children = [Node(status, node.forbidden | {(store_id, w_id)}, multipliers, bound)
+                    for store_id in (first, second)]
+        return children, self.repaired(triples, upper)
+
+    def repaired(self, triples: list, upper: float) -> Optional[list]:
+        """The transportation with its conflicts repaired, as triples, if that beats the incumbent."""
+        solution = Solution.from_sparse_arrays(_arrays_of(triples, self.problem), self.problem)
+        if not repair(solution) or solution.fitness_score >= upper:
+            return None
+        return [(store_id, w_id, amount) for store_id, suppliers in enumerate(solution.store_suppliers)
+                for w_id, amount in suppliers.items()]
+
+
+def _init_worker(problem: InstanceData, incumbent, node_count, max_nodes: Optional[int], deadline: Optional[float],
+                 iterations: int, leaf_iterations: int) -> None:
+    _context.update(relaxation=Relaxation(problem), incumbent=incumbent, node_count=node_count,
+                    max_nodes=max_nodes, deadline=deadline, iterations=iterations, leaf_iterations=leaf_iterations)
+
+
+def explore_subtree(root: Node) -> dict:
+    """
+    Depth-first search of the subtree, sharing the incumbent cost and the node count with the other workers.
+    Returns the best solution found in it (triples, or None), the nodes expanded and the lowest bound of the
+    nodes left unexplored when a limit stopped it (inf if it was searched completely).
+    """
+    relaxation: Relaxation = _context["relaxation"]
+    incumbent, node_count = _context["incumbent"], _context["node_count"]
+    max_nodes, deadline = _context["max_nodes"], _context["deadline"]
+    best_cost, best_triples, nodes = None, None, 0
+
+    stack = [root]
+    while stack:
+        if ((deadline is not None and time.time() >= deadline)
+                or (max_nodes is not None and node_count.value >= max_nodes)):
+            return {"cost": best_cost, "triples": best_triples, "nodes": nodes,
+                    "lower_bound": min(node.bound for node in stack)}
+
+        node = stack.pop()
+        if relaxation.prunable(node.bound, incumbent.value):
+            continue
+        with node_count.get_lock():
+            node_count.value += 1
+        nodes += 1
+
+        children, triples = relaxation.expand(node, incumbent.value, _context["iterations"],
+                                              _context["leaf_iterations"])
+        if triples is not None:
+            cost = Solution.from_sparse_arrays(_arrays_of(triples, relaxation.problem), relaxation.problem).fitness()
+            with incumbent.get_lock():
+                if cost < incumbent.value:
+                    incumbent.value = cost
+                    best_cost, best_triples = cost, triples
+        stack.extend(reversed(children))
+
+    return {"cost": best_cost, "triples": best_triples, "nodes": nodes, "lower_bound": math.inf}
+
+
+def _arrays_of(triples: list, problem: InstanceData) -> dict:
+    stores, warehouses, amounts = zip(*triples)
+    return {"shape": np.array([problem.num_stores, problem.num_warehouses], dtype=np.int64),
+            "stores": np.array(stores, dtype=np.int64), "warehouses": np.array(warehouses, dtype=np.int64),
+            "amounts": np.array(amounts, dtype=np.int64)}
+
+
+class BranchAndBoundResult:
+    """Best solution found, the proven lower bound on the optimum and whether the two meet."""
+
+    def __init__(self, solution: Optional[Solution], upper_bound: float, lower_bound: float, nodes: int,
+                 wall_time: float):
+        self.solution = solution
+        self.upper_bound = upper_bound
+        self.lower_bound = lower_bound
+        self.nodes = nodes
+        self.wall_time = wall_time
+
+    @property
+    def proven(self) -> bool:
+        return self.solution is not None and self.lower_bound >= self.upper_bound
+
+    @property
+    def gap(self) -> float:
+        if self.solution is None:
+            return math.inf
+        return max(0.0, (self.upper_bound - self.lower_bound) / max(abs(self.upper_bound), 1))
+
+    def summary(self) -> str:
+        status = "optimal" if self.proven else f"gap {100 * self.gap:.2f}%"
+        return (f"upper bound {self.upper_bound}, lower bound {math.ceil(self.lower_bound - 1e-6)} ({status}), "
+                f"{self.nodes} nodes, {self.wall_time:.1f}s")
+
+
+class BranchAndBound:
+    """
+    Exact solver for small instances: branch-and-bound on which warehouses open (see Relaxation for the bound and
+    the branching). The search starts from an incumbent, by default the constructive heuristic's solution, so a
+    good heuristic result prunes most of the tree.
+
+    The root is expanded breadth-first until there are `subtrees_per_worker` open subtrees per worker; the
+    subtrees are then searched depth-first in worker processes that share the incumbent cost and the node count.
+    With a node or time limit the result carries the best solution and a lower bound instead of a proof.
+    """
+
+    def __init__(self, problem: InstanceData, incumbent: Optional[Solution] = None, max_nodes: Optional[int] = None,
+                 time_limit: Optional[float] = None, workers: int = 1, root_iterations: int = 200,
+                 node_iterations: int = 20, leaf_iterations: int = 100, subtrees_per_worker: int = 4):
+        self.problem = problem
+        self.incumbent = incumbent
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.workers = workers
+        self.root_iterations = root_iterations
+        self.node_iterations = node_iterations
+        self.leaf_iterations = leaf_iterations
+        self.subtrees_per_worker = subtrees_per_worker
+
+    def initial_incumbent(self) -> Optional[Solution]:
+        if self.incumbent is not None:
+            return self.incumbent
+        try:
+            return Solver.initial_solution(self.problem)
+        except ValueError:
+            return None
+
+    def run(self) -> BranchAndBoundResult:
+        start = time.time()
+        deadline = start + self.time_limit if self.time_limit is not None else None
+        best = self.initial_incumbent()
+        upper = best.fitness() if best is not None else math.inf
+
+        incumbent = multiprocessing.Value('d', upper)
+        node_count = multiprocessing.Value('q', 0)
+        limits = (self.max_nodes, deadline, self.node_iterations, self.leaf_iterations)
+        _init_worker(self.problem, incumbent, node_count, *limits)
+        relaxation: Relaxation = _context["relaxation"]
+
+        root = Node(np.full(self.problem.num_warehouses, FREE, dtype=np.int8), frozenset(),
+                    relaxation.initial_multipliers(), -math.inf)
+        results = []
+        try:
+            # Root bound with more subgradient steps, then breadth-first until there is work for every worker
+            frontier, iterations = [root], self.root_iterations
+            target = self.subtrees_per_worker * self.workers if self.workers > 1 else 0
+            while frontier and (iterations == self.root_iterations or len(frontier) < target):
+                node = frontier.pop(0)
+                if relaxation.prunable(node.bound, incumbent.value):
+                    continue
+                node_count.value += 1
+                children, triples = relaxation.expand(node, incumbent.value, iterations, self.leaf_iterations)
+                iterations = self.node_iterations
+                if triples is not None:
+                    solution = Solution.from_sparse_arrays(_arrays_of(triples, self.problem), self.problem)
+                    incumbent.value = min(incumbent.value, solution.fitness())
+                    results.append({"cost": solution.fitness_score, "triples": triples, "nodes": 0,
+                                    "lower_bound": math.inf})
+                frontier.extend(children)
+
+            if self.workers > 1 and len(frontier) > 1:
+                with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                         initargs=(self.problem, incumbent, node_count, *limits)) as executor:
+                    results.extend(executor.map(explore_subtree, frontier))
+            else:
+                results.extend(explore_subtree(node) for node in frontier)
+        finally:
+            _context.clear()
+
+        for result in results:
+            if result["triples"] is not None:
+                solution = Solution.from_sparse_arrays(_arrays_of(result["triples"], self.problem), self.problem)
+                if best is None or solution.fitness() < best.fitness_score:
+                    best = solution
+        upper = best.fitness_score if best is not None else math.inf
+        lower = min([upper] + [result["lower_bound"] for result in results])
+        return BranchAndBoundResult(best, upper, lower, node_count.value, time.time() - start)
@@ -0,0 +1,82 @@
+import os
+import pickle
+import time
+from typing import Optional
+
+from models.instance_data import InstanceData
+from models.solution import Solution
+from solver.trace import TraceRecorder
+
+
+class SearchCheckpoint:
+    """
+    Periodic, atomic snapshots of a running search so it can be resumed after an interruption.
+    If a trace is attached it is flushed with every snapshot, so the trace file and the checkpoint stay in step.
+    """
+
+    def __init__(self, path: str, interval: float = 60.0, trace: Optional[TraceRecorder] = None):
+        self.path = path
+        self.interval = interval
+        self.trace = trace
+        self.last_save = time.perf_counter()
+        self.last_write_seconds = 0.0
+
+    def due(self) -> bool:
+        return time.perf_counter() - self.last_save >= self.interval
+
+    def save(self, state: dict) -> None:
+        """Write the state to a temp file and atomically replace the previous checkpoint."""
+        start = time.perf_counter()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            # exist_ok: parallel runs may create the same directory at once
+            os.makedirs(directory, exist_ok=True)
+
+        if self.trace is not None:
+            state = dict(state, trace_time=self.trace.elapsed())
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+        if self.trace is not None:
+            self.trace.flush()
+
+        self.last_save = time.perf_counter()
+        self.last_write_seconds = self.last_save - start
+
+    def load(self, method: Optional[str] = None, problem: Optional[InstanceData] = None) -> Optional[dict]:
+        """
+        The last snapshot, or None if there is none. With a method and/or instance, a snapshot written by another
+        method or for another instance (see InstanceData.content_hash) raises ValueError instead of being resumed.
+        """
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'rb') as file:
+            state = pickle.load(file)
+        if method is not None and state.get("method") != method:
+            raise ValueError(f"Checkpoint {self.path} was written by {state.get('method')}, not {method}.")
+        if problem is not None and state.get("instance") != problem.content_hash():
+            raise ValueError(f"Checkpoint {self.path} was written for another instance.")
+        if self.trace is not None:
+            # Trace timestamps continue from the interrupted run
+            self.trace.start = time.perf_counter()
+            self.trace.time_offset = state.get("trace_time", 0.0)
+        return state
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def capture_solution(solution: Solution) -> dict:
+    return {"allocation": solution.to_sparse_arrays(), "fitness_score": solution.fitness_score}
+
+
+def restore_solution(data: dict, problem: InstanceData) -> Solution:
+    solution = Solution.from_sparse_arrays(data["allocation"], problem)
+    solution.fitness_score = data["fitness_score"]
+    return solution
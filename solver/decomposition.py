@@ -0,0 +1,206 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from models.cost_matrix import row_chunks
+from models.instance_data import InstanceData
+from models.parser import Parser
+from models.search_random import SearchRandom, default_random
+from models.solution import Solution
+from solver.Tweaks import Tweaks
+from solver.penalty import repair
+
+
+def solve_subproblem(data: dict, constructor: str, improvement: str, iterations: int, time_limit,
+                     seed: int) -> Optional[dict]:
+    """
+    Build and solve one cluster's instance with a batch runner constructor and improvement. Runs in a worker
+    process. Returns the solution as sparse arrays in the subproblem's ids, or None if the constructor failed.
+    """
+    # Imported here: the batch runner registers the decomposition as an improvement itself
+    from solver.batch_runner import CONSTRUCTORS, IMPROVEMENTS
+
+    instance = Parser.instance_from_data(data)
+    try:
+        solution = CONSTRUCTORS[constructor](instance)
+    except ValueError:
+        return None
+    rnd = SearchRandom(seed)
+    improved = IMPROVEMENTS[improvement](solution, instance, iterations, time_limit, rnd, None, None)
+    return improved.to_sparse_arrays()
+
+
+class Decomposition:
+    """
+    Solves a large instance as independent subproblems:
+    - stores are clustered by k-means on their rows of the supply cost matrix, then stores move to the cluster
+      holding most of their incompatible stores when it is nearly as close;
+    - each cluster gets the warehouses with the lowest per-unit cost (centroid supply cost plus fixed cost per
+      unit of capacity) until they hold `capacity_slack` times its demand; a warehouse picked by several clusters
+      is shared in proportion to their demand, and so is its fixed cost;
+    - the subproblems are solved in parallel processes by a constructor and an improvement of the batch runner;
+    - the parts are merged, so capacity shares cannot overflow, conflicts across clusters at shared warehouses
+      and demand of failed subproblems are fixed by the penalty repair, and a global relocation pass polishes.
+    The time limit applies to each subproblem.
+    """
+
+    def __init__(self, problem: InstanceData, cluster_size: int = 500, capacity_slack: float = 2.0,
+                 conflict_tolerance: float = 0.1, kmeans_iterations: int = 10,
+                 constructor: str = "initial_solution", improvement: str = "tweak_with_iterations",
+                 iterations: int = 1000, time_limit: Optional[float] = None, polish_passes: int = 1,
+                 workers: Optional[int] = None, rnd: Optional[SearchRandom] = None):
+        self.problem = problem
+        self.cluster_size = cluster_size
+        self.capacity_slack = capacity_slack
+        self.conflict_tolerance = conflict_tolerance
+        self.kmeans_iterations = kmeans_iterations
+        self.constructor = constructor
+        self.improvement = improvement
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.polish_passes = polish_passes
+        self.workers = workers
+        self.rnd = rnd or default_random()
+
+        self.costs = np.asarray(problem.costs)  # a view in the stored dtype, read in row blocks as float32
+        self.demands = np.array([s.demand for s in problem.stores], dtype=np.int64)
+        self.capacities = np.array([w.capacity for w in problem.warehouses], dtype=np.int64)
+
+    def distances(self, centres: np.ndarray) -> np.ndarray:
+        """Euclidean distances of every store's cost row to the centres, in row blocks."""
+        squared_centres = (centres ** 2).sum(axis=1)
+        result = np.empty((self.problem.num_stores, len(centres)), dtype=np.float32)
+        for start, stop in row_chunks(self.problem.num_stores, self.problem.num_warehouses, 4):
+            block = self.costs[start:stop].astype(np.float32)
+            squared = (block ** 2).sum(axis=1)[:, None] - 2 * block @ centres.T + squared_centres[None, :]
+            result[start:stop] = np.sqrt(np.maximum(squared, 0))
+        return result
+
+    def cluster_means(self, labels: np.ndarray, k: int) -> np.ndarray:
+        """Mean cost row of every cluster (zeros for an empty one), summed over row blocks."""
+        sums = np.zeros((k, self.problem.num_warehouses))
+        clusters = np.arange(k)[:, None]
+        for start, stop in row_chunks(self.problem.num_stores, self.problem.num_warehouses, 4):
+            members = (labels[None, start:stop] == clusters).astype(np.float32)
+            sums += members @ self.costs[start:stop].astype(np.float32)
+        sizes = np.bincount(labels, minlength=k)
+        return (sums / np.maximum(sizes, 1)[:, None]).astype(np.float32)
+
+    def cluster_stores(self) -> np.ndarray:
+        """Cluster label per store; `cluster_size` is the mean cluster size."""
+        num_stores = self.problem.num_stores
+        k = max(1, math.ceil(num_stores / self.cluster_size))
+        if k == 1:
+            return np.zeros(num_stores, dtype=np.int64)
+
+        centres = self.costs[sorted(self.rnd.sample(range(num_stores), k))].astype(np.float32)
+        for _ in range(self.kmeans_iterations):
+            distances = self.distances(centres)
+            labels = np.argmin(distances, axis=1)
+            sizes = np.bincount(labels, minlength=k)
+            centres = self.cluster_means(labels, k)
+            for c in np.nonzero(sizes == 0)[0].tolist():
+                # Empty cluster: restart it at the store farthest from its centre
+                far = int(np.argmax(distances[np.arange(num_stores), labels]))
+                centres[c] = self.costs[far]
+
+        distances = self.distances(centres)
+        labels = np.argmin(distances, axis=1)
+        return self.keep_conflicts_together(labels, distances)
+
+    def keep_conflicts_together(self, labels: np.ndarray, distances: np.ndarray) -> np.ndarray:
+        """Move each store to the cluster of most of its incompatible stores if that costs little distance."""
+        graph = self.problem.conflict_graph
+        labels = labels.copy()
+        for store_id in np.nonzero(graph.degrees)[0].tolist():
+            neighbor_labels = labels[graph.neighbors(store_id)]
+            target = int(np.bincount(neighbor_labels).argmax())
+            own = labels[store_id]
+            limit = (1 + self.conflict_tolerance) * distances[store_id, own]
+            if target != own and distances[store_id, target] <= limit:
+                labels[store_id] = target
+        return labels
+
+    def warehouse_shares(self, labels: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """Per cluster: its stores, its warehouses, and the capacity and fixed cost share it gets of each."""
+        k = int(labels.max()) + 1
+        members = [np.nonzero(labels == c)[0] for c in range(k)]
+        cluster_demand = np.array([self.demands[m].sum() for m in members], dtype=np.float64)
+
+        # Warehouses by per-unit cost for each cluster
+        unit_fixed = self.problem.fixed_costs / np.maximum(self.capacities, 1)
+        means = self.cluster_means(labels, k)
+        rankings = [np.argsort(means[c] + unit_fixed, kind='stable') if members[c].size else np.arange(0)
+                    for c in range(k)]
+        covered = [np.cumsum(self.capacities[order]) for order in rankings]
+        counts = [min(len(order), max(2, int(np.searchsorted(cum, self.capacity_slack * d)) + 1))
+                  for order, cum, d in zip(rankings, covered, cluster_demand)]
+
+        for _ in range(20):
+            # Demand of all clusters picking each warehouse, to split its capacity
+            picked_demand = np.zeros(self.problem.num_warehouses)
+            for c in range(k):
+                picked_demand[rankings[c][:counts[c]]] += cluster_demand[c]
+            shares = [cluster_demand[c] / picked_demand[rankings[c][:counts[c]]] for c in range(k)]
+
+            # Clusters whose shares got too thin take more warehouses
+            short = [c for c in range(k) if counts[c] < len(rankings[c])
+                     and (self.capacities[rankings[c][:counts[c]]] * shares[c]).sum() < 1.2 * cluster_demand[c]]
+            if not short:
+                break
+            for c in short:
+                counts[c] = min(len(rankings[c]), math.ceil(counts[c] * 1.25))
+
+        parts = []
+        for c in range(k):
+            if not members[c].size:
+                continue  # emptied by keep_conflicts_together
+            warehouses = np.sort(rankings[c][:counts[c]])
+            share = cluster_demand[c] / picked_demand[warehouses]
+            capacity = np.floor(self.capacities[warehouses] * share).astype(np.int64)
+            fixed_cost = np.rint(self.problem.fixed_costs[warehouses] * share).astype(np.int64)
+            parts.append((members[c], warehouses, capacity, fixed_cost))
+        return parts
+
+    def subproblem(self, stores: np.ndarray, warehouses: np.ndarray, capacity: np.ndarray,
+                   fixed_cost: np.ndarray) -> dict:
+        """The cluster's instance in the dict layout of Parser.parse_dzn."""
+        local = {int(s): i for i, s in enumerate(stores.tolist())}
+        pairs = [[local[a] + 1, local[b] + 1] for a, b in self.problem.incompatible_pairs
+                 if a in local and b in local]
+        return {
+            "Warehouses": len(warehouses),
+            "Stores": len(stores),
+            "Capacity": capacity.tolist(),
+            "FixedCost": fixed_cost.tolist(),
+            "Goods": self.demands[stores].tolist(),
+            "SupplyCost": self.problem.costs[np.ix_(stores, warehouses)].tolist(),
+            "IncompatiblePairs": pairs,
+        }
+
+    def run(self) -> Solution:
+        parts = self.warehouse_shares(self.cluster_stores())
+        seeds = [self.rnd.randbelow(2 ** 31) for _ in parts]
+        jobs = [(self.subproblem(*part), self.constructor, self.improvement, self.iterations, self.time_limit, seed)
+                for part, seed in zip(parts, seeds)]
+
+        if self.workers == 1 or len(jobs) == 1:
+            results = [solve_subproblem(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(solve_subproblem, *zip(*jobs)))
+
+        # Merge: ids back to the full instance
+        solution = Solution(self.problem)
+        for (stores, warehouses, _, _), arrays in zip(parts, results):
+            if arrays is None:
+                continue  # left as unmet demand for the repair
+            for s, w, amount in zip(arrays["stores"].tolist(), arrays["warehouses"].tolist(),
+                                    arrays["amounts"].tolist()):
+                solution.assign(int(stores[s]), int(warehouses[w]), amount)
+
+        if not solution.is_feasible() and not repair(solution):
+            raise ValueError("Decomposition could not merge the subproblem solutions into a feasible solution")
+        return Tweaks.relocate_descent(solution, max_passes=self.polish_passes)
@@ -0,0 +1,168 @@
+import time
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from models.instance_data import InstanceData
+from models.search_random import SearchRandom, default_random
+from models.solution import Solution
+from solver.trace import TraceRecorder
+
+
+class EjectionChain:
+    """
+    Chains of relocations s1 -> w2 evicting s2 -> w3 evicting s3 -> ... found by a bounded depth-first search.
+    Every tentative move is applied to the solution and undone, so capacities, conflicts and the cost delta
+    (including opened and closed warehouses) come from the solution's maintained state. A store is only
+    evicted if that alone makes room for the incoming one (capacity, and it is the only incompatible store
+    there). Only single-sourced stores take part.
+
+    Branches are pruned by a lower bound on any chain completing them: the partial cost plus the cheapest cost
+    of the pending store, minus what the evictions still allowed could recover. An eviction takes a store out
+    of a warehouse that stays open (the incoming store takes its place) and the evicted store costs at least its
+    cheapest cost wherever it goes, so it recovers at most its regret, its current supply cost minus that
+    cheapest cost; the remaining depth recovers at most the sum of the largest regrets.
+    """
+
+    def __init__(self, solution: Solution, max_depth: int = 3, max_branch: int = 6):
+        self.solution = solution
+        self.problem = solution.problem
+        self.max_depth = max_depth
+        self.max_branch = max_branch
+        # Cheapest possible supply cost of each store, the bound for a store still waiting for a warehouse
+        self.min_cost = [s.demand * int(self.problem.costs[s.id].min()) for s in self.problem.stores]
+
+        self.base_cost = 0
+        self.best_delta = 0
+        self.best_moves: Optional[List[Tuple[int, int, int]]] = None
+        self.moves: List[Tuple[int, int, int]] = []   # (store, from warehouse, to warehouse) of the current chain
+        self.visited = set()                          # warehouses a store was evicted from in the current chain
+        self.chain_stores = set()
+        self.applied = Counter()                      # chain length -> number of chains applied
+
+        self.regrets = np.zeros(self.problem.num_stores, dtype=np.int64)
+        self.recoverable = np.zeros(max_depth + 1, dtype=np.int64)  # evictions left -> largest possible saving
+        self.update_regrets(range(self.problem.num_stores))
+
+    def update_regrets(self, stores) -> None:
+        """Refresh the regrets of the stores (0 unless single-sourced) and the recoverable savings."""
+        costs = self.problem.supply_costs_matrix
+        for store_id in stores:
+            suppliers = self.solution.store_suppliers[store_id]
+            if len(suppliers) == 1:
+                (w_id, amount), = suppliers.items()
+                self.regrets[store_id] = amount * costs[store_id][w_id] - self.min_cost[store_id]
+            else:
+                self.regrets[store_id] = 0
+        count = min(self.max_depth, len(self.regrets))
+        largest = -np.sort(-np.partition(self.regrets, len(self.regrets) - count)[len(self.regrets) - count:])
+        self.recoverable[1:count + 1] = np.cumsum(np.maximum(largest, 0))
+        self.recoverable[count + 1:] = self.recoverable[count]
+
+    def lower_bound(self, store_id: int, depth: int) -> int:
+        """Lowest cost any chain completing the current one can reach, with the store still to place."""
+        return self.solution.fitness_score + self.min_cost[store_id] - int(self.recoverable[self.max_depth - depth])
+
+    def evictable(self, store_id: int, w_id: int) -> List[int]:
+        """Stores of the warehouse whose removal alone lets the store in, most expensive there first."""
+        solution = self.solution
+        demand = self.problem.stores[store_id].demand
+        members = solution.warehouse_stores[w_id]
+        conflicting = members.intersection(self.problem.stores[store_id].incompatible_stores)
+        if len(conflicting) > 1:
+            return []
+        candidates = conflicting if conflicting else members
+
+        missing = demand - solution.remaining_capacity[w_id]
+        costs = self.problem.supply_costs_matrix
+        result = [other for other in candidates
+                  if len(solution.store_suppliers[other]) == 1 and other not in self.chain_stores
+                  and solution.store_suppliers[other][w_id] >= missing]
+        result.sort(key=lambda other: (-costs[other][w_id], other))
+        return result[:self.max_branch]
+
+    def extend(self, store_id: int, from_w: int, depth: int) -> None:
+        """Place the pending store (already unassigned from from_w), directly or by evicting another one."""
+        solution = self.solution
+        demand = self.problem.stores[store_id].demand
+
+        for w_id in self.problem.candidate_warehouses(store_id)[:self.max_branch]:
+            if w_id == from_w or w_id in self.visited:
+                continue
+            # No chain from here can beat the best one, even recovering the most the remaining evictions could
+            if self.lower_bound(store_id, depth) - self.base_cost >= self.best_delta:
+                return
+
+            if solution.can_supply(store_id, w_id, demand):
+                solution.assign(store_id, w_id, demand)
+                delta = solution.fitness_score - self.base_cost
+                if delta < self.best_delta:
+                    self.best_delta = delta
+                    self.best_moves = self.moves + [(store_id, from_w, w_id)]
+                solution.unassign(store_id, w_id)
+
+            elif depth < self.max_depth:
+                self.visited.add(w_id)
+                for evicted in self.evictable(store_id, w_id):
+                    solution.unassign(evicted, w_id)
+                    if solution.can_supply(store_id, w_id, demand):
+                        solution.assign(store_id, w_id, demand)
+                        self.moves.append((store_id, from_w, w_id))
+                        self.chain_stores.add(evicted)
+                        self.extend(evicted, w_id, depth + 1)
+                        self.chain_stores.discard(evicted)
+                        self.moves.pop()
+                        solution.unassign(store_id, w_id)
+                    solution.assign(evicted, w_id, self.problem.stores[evicted].demand)
+                self.visited.discard(w_id)
+
+    def search(self, store_id: int) -> Optional[List[Tuple[int, int, int]]]:
+        """Best improving chain starting with the store, or None. The solution is left unchanged."""
+        suppliers = self.solution.store_suppliers[store_id]
+        if len(suppliers) != 1:
+            return None
+        (from_w, amount), = suppliers.items()
+
+        self.base_cost = self.solution.fitness_score
+        self.best_delta = 0
+        self.best_moves = None
+        self.visited = set()
+        self.chain_stores = {store_id}
+
+        self.solution.unassign(store_id, from_w)
+        self.extend(store_id, from_w, 1)
+        self.solution.assign(store_id, from_w, amount)
+        return self.best_moves
+
+    def apply(self, moves: List[Tuple[int, int, int]]) -> None:
+        for store_id, from_w, _ in moves:
+            self.solution.unassign(store_id, from_w)
+        for store_id, _, to_w in moves:
+            self.solution.assign(store_id, to_w, self.problem.stores[store_id].demand)
+        self.update_regrets([store_id for store_id, _, _ in moves])
+        self.applied[len(moves)] += 1
+
+
+def ejection_chain_search(solution: Solution, data: InstanceData, iterations=1000, time_limit=None,
+                          rnd: Optional[SearchRandom] = None, max_depth: int = 3, max_branch: int = 6,
+                          trace: Optional[TraceRecorder] = None) -> Solution:
+    """Descent that tries an ejection chain from a random store each iteration and applies improving ones."""
+    rnd = rnd or default_random()
+    solution = solution.copy()
+    chains = EjectionChain(solution, max_depth, max_branch)
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+
+    for i in range(iterations):
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+
+        moves = chains.search(rnd.store_index(data.num_stores))
+        if moves is not None:
+            chains.apply(moves)
+
+        if trace is not None:
+            trace.record(i, solution.fitness_score, solution.fitness_score, f"chain{len(moves) if moves else 0}")
+
+    return solution
+
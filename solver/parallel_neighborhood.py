@@ -0,0 +1,310 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.cost_matrix import open_cost_matrix
+from models.instance_data import InstanceData
+from models.solution import Solution
+from solver.trace import TraceRecorder
+
+RELOCATE, SWAP = 0, 1
+NO_MOVE = np.iinfo(np.int64).max
+
+# A move is (delta, kind, store_id, target): target is a warehouse for RELOCATE and the other store for SWAP.
+# Comparing moves as tuples gives the same winner however the stores are split into blocks.
+Move = Tuple[int, int, int, int]
+
+# (store ids sorted, warehouse ids) of every supply of the stores with several suppliers; they never move here
+Splits = Tuple[np.ndarray, np.ndarray]
+
+# Numpy views on the shared state, set in every worker by _attach (and in the parent for serial evaluation)
+_arrays: Dict[str, np.ndarray] = {}
+_segments: List[shared_memory.SharedMemory] = []
+
+
+def _attach(spec: Dict[str, Tuple[str, tuple, str]], files: Dict[str, str]) -> None:
+    """Worker initializer: map the parent's shared memory blocks and .npy files without copying them."""
+    for key, (name, shape, dtype) in spec.items():
+        segment = shared_memory.SharedMemory(name=name)
+        _segments.append(segment)
+        _arrays[key] = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+    for key, path in files.items():
+        _arrays[key] = np.asarray(open_cost_matrix(path))
+
+
+def _csr_entries(stores: np.ndarray, indptr: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(index into stores, position in the CSR values) of every entry in the rows of the stores."""
+    starts = indptr[stores]
+    lengths = indptr[stores + 1] - starts
+    rows = np.repeat(np.arange(stores.size), lengths)
+    positions = np.arange(int(lengths.sum())) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return rows, positions
+
+
+def _count(rows: np.ndarray, values: np.ndarray, num_rows: int, warehouses: np.ndarray) -> np.ndarray:
+    """counts[i, j]: how often warehouses[j] occurs among the values of row i."""
+    unique, inverse = np.unique(warehouses, return_inverse=True)
+    column = np.full(len(_arrays["fixed_costs"]), -1, dtype=np.int64)
+    column[unique] = np.arange(unique.size)
+    columns = column[values]
+    keep = columns >= 0
+    counts = np.bincount(rows[keep] * unique.size + columns[keep], minlength=num_rows * unique.size)
+    return counts.reshape(num_rows, unique.size)[:, inverse]
+
+
+def conflict_counts(stores: np.ndarray, warehouses: np.ndarray, splits: Splits) -> np.ndarray:
+    """counts[i, j]: stores incompatible with stores[i] that warehouses[j] supplies, from the CSR graph."""
+    a = _arrays
+    rows, positions = _csr_entries(stores, a["indptr"])
+    neighbors = a["indices"][positions]
+    suppliers = a["assigned"][neighbors]
+    single = suppliers >= 0
+    rows_of, values = [rows[single]], [suppliers[single]]
+
+    split_stores, split_warehouses = splits
+    if split_stores.size and not single.all():
+        # Expand the neighbours with several suppliers into one entry per supplying warehouse
+        neighbors, rows = neighbors[~single], rows[~single]
+        first = np.searchsorted(split_stores, neighbors, side='left')
+        lengths = np.searchsorted(split_stores, neighbors, side='right') - first
+        rows_of.append(np.repeat(rows, lengths))
+        values.append(split_warehouses[np.arange(int(lengths.sum()))
+                                       + np.repeat(first - (np.cumsum(lengths) - lengths), lengths)])
+    return _count(np.concatenate(rows_of), np.concatenate(values), stores.size, warehouses)
+
+
+def candidate_mask(stores: np.ndarray, warehouses: np.ndarray) -> Optional[np.ndarray]:
+    """mask[i, j]: warehouses[j] is a candidate of stores[i] (see InstanceData.candidate_warehouses), None if all are."""
+    if "candidate_indptr" not in _arrays:
+        return None
+    rows, positions = _csr_entries(stores, _arrays["candidate_indptr"])
+    return _count(rows, _arrays["candidate_indices"][positions], stores.size, warehouses) > 0
+
+
+def evaluate_block(start: int, stop: int, splits: Splits) -> Optional[Move]:
+    """
+    Best improving relocate or swap move for the stores start..stop-1, or None. Only single-sourced stores move,
+    and only to their candidate warehouses; a swap pairs a block store with any higher-numbered store, so every
+    pair is evaluated exactly once. Conflict counts are gathered for the block from the CSR graph.
+    """
+    a = _arrays
+    costs, fixed, demand = a["costs"], a["fixed_costs"], a["demand"]
+    assigned, remaining, is_open, loads = a["assigned"], a["remaining"], a["open"], a["loads"]
+
+    stores = np.arange(start, stop)
+    stores = stores[assigned[stores] >= 0]
+    if stores.size == 0:
+        return None
+    rows = np.arange(stores.size)
+    src = assigned[stores]
+    d = demand[stores]
+    current = costs[stores, src].astype(np.int64)  # costs may be stored unsigned and narrow
+    closes = np.where(loads[src] == 1, fixed[src], 0)  # leaving a warehouse as its only store closes it
+    best: Optional[Move] = None
+
+    # Relocate: store -> any other warehouse with room and no incompatible store
+    delta = (d[:, None] * (costs[stores] - current[:, None]) + np.where(is_open, 0, fixed)[None, :]
+             - closes[:, None])
+    warehouses = np.arange(len(fixed))
+    feasible = (remaining[None, :] >= d[:, None]) & (conflict_counts(stores, warehouses, splits) == 0)
+    candidates = candidate_mask(stores, warehouses)
+    if candidates is not None:
+        feasible &= candidates
+    feasible[rows, src] = False
+    delta = np.where(feasible, delta, NO_MOVE)
+    i, w = np.unravel_index(int(np.argmin(delta)), delta.shape)
+    if delta[i, w] < 0:
+        best = (int(delta[i, w]), RELOCATE, int(stores[i]), int(w))
+
+    # Swap: exchange the warehouses of two single-sourced stores; no warehouse opens or closes
+    others = np.nonzero(assigned >= 0)[0]
+    others = others[others > stores[0]]
+    if others.size:
+        dst = assigned[others]
+        d_other = demand[others]
+
+        # Pairs in conflict are counted in each other's conflict totals, discount them
+        column = np.full(len(assigned), -1, dtype=np.int64)
+        column[others] = np.arange(others.size)
+        adjacent = np.zeros((stores.size, others.size), dtype=np.int32)
+        for r, s in enumerate(stores.tolist()):
+            cols = column[a["indices"][a["indptr"][s]:a["indptr"][s + 1]]]
+            adjacent[r, cols[cols >= 0]] = 1
+
+        other_current = costs[others, dst].astype(np.int64)
+        delta = (d[:, None] * (costs[np.ix_(stores, dst)] - current[:, None])
+                 + (d_other[None, :] * (costs[np.ix_(others, src)] - other_current[:, None]).T))
+        feasible = ((others[None, :] > stores[:, None]) & (dst[None, :] != src[:, None])
+                    & (remaining[dst][None, :] + d_other[None, :] >= d[:, None])
+                    & (remaining[src][:, None] + d[:, None] >= d_other[None, :])
+                    & (conflict_counts(stores, dst, splits) - adjacent == 0)
+                    & (conflict_counts(others, src, splits).T - adjacent == 0))
+        candidates = candidate_mask(stores, dst)
+        if candidates is not None:
+            feasible &= candidates & candidate_mask(others, src).T
+        delta = np.where(feasible, delta, NO_MOVE)
+        i, j = np.unravel_index(int(np.argmin(delta)), delta.shape)
+        if delta[i, j] < 0:
+            move = (int(delta[i, j]), SWAP, int(stores[i]), int(others[j]))
+            best = move if best is None else min(best, move)
+
+    return best
+
+
+class ParallelNeighborhood:
+    """
+    Best-improvement relocate/swap descent whose neighborhood evaluation is split into store blocks across a
+    persistent process pool. Instance data and the search state live in shared memory, so workers only receive
+    block bounds and send back their best move. The parent applies the overall best move, which is the same move
+    a serial sweep picks, so the trajectory does not depend on the number of workers.
+    The shared state is O(S + W) plus the conflict graph (and candidate lists of a reduced instance); conflict
+    counts are gathered per block, so nothing besides the cost matrix is S x W.
+    """
+
+    def __init__(self, problem: InstanceData, workers: Optional[int] = None, block_size: Optional[int] = None):
+        self.problem = problem
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        S, W = problem.num_stores, problem.num_warehouses
+        # Blocks small enough that the swap matrices (block x stores) stay a few MB, and several per worker
+        self.block_size = block_size or max(1, min(256, 1_000_000 // max(S, 1), -(-S // (4 * self.workers))))
+
+        self.segments: List[shared_memory.SharedMemory] = []
+        self.spec: Dict[str, Tuple[str, tuple, str]] = {}
+        self.files: Dict[str, str] = {}  # key -> .npy file the workers map themselves
+        self.arrays: Dict[str, np.ndarray] = {}
+        graph = problem.conflict_graph
+        # The cost matrix is never copied: serial evaluation reads it in place and workers map a matrix that is
+        # memory-mapped from disk (see Parser cost_dir) from its file; only an in-memory one goes to shared memory
+        if self.workers == 1:
+            self.arrays["costs"] = np.asarray(problem.costs)
+        elif isinstance(problem.costs, np.memmap) and problem.costs.filename:
+            self.files["costs"] = problem.costs.filename
+            self.arrays["costs"] = np.asarray(problem.costs)
+        else:
+            self._share("costs", problem.costs)
+        self._share("fixed_costs", problem.fixed_costs)
+        self._share("demand", np.array([s.demand for s in problem.stores], dtype=np.int64))
+        self._share("indptr", graph.indptr)
+        self._share("indices", graph.indices)
+        self._share("assigned", np.full(S, -1, dtype=np.int64))
+        self._share("remaining", np.zeros(W, dtype=np.int64))
+        self._share("open", np.zeros(W, dtype=bool))
+        self._share("loads", np.zeros(W, dtype=np.int64))
+        if problem.reduction is not None:
+            # Candidate lists in CSR form, like the conflict graph
+            candidates = problem.reduction.candidates
+            self._share("candidate_indptr", np.concatenate([[0], np.cumsum([len(c) for c in candidates])]))
+            self._share("candidate_indices", np.array([w for c in candidates for w in c], dtype=np.int64))
+        self.splits: Splits = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))  # set by load
+
+        self.pool = None
+        if self.workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_attach,
+                                            initargs=(self.spec, self.files))
+        else:
+            _arrays.update(self.arrays)
+
+    def _share(self, key: str, array: np.ndarray) -> None:
+        segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)
+        view[...] = array
+        self.segments.append(segment)
+        self.spec[key] = (segment.name, array.shape, array.dtype.str)
+        self.arrays[key] = view
+
+    def load(self, solution: Solution) -> None:
+        """Copy the solution's state into shared memory."""
+        a = self.arrays
+        a["remaining"][:] = solution.remaining_capacity
+        a["open"][:] = solution.open_warehouses
+        a["loads"][:] = [len(stores) for stores in solution.warehouse_stores]
+        a["assigned"][:] = [next(iter(suppliers)) if len(suppliers) == 1 else -1
+                            for suppliers in solution.store_suppliers]
+        # Sent along with every block: tiny unless many stores are split, and fixed for the whole descent
+        pairs = np.array([(store_id, w_id) for store_id, suppliers in enumerate(solution.store_suppliers)
+                          if len(suppliers) > 1 for w_id in suppliers], dtype=np.int64).reshape(-1, 2)
+        self.splits = (pairs[:, 0], pairs[:, 1])
+
+    def best_move(self) -> Optional[Move]:
+        S = self.problem.num_stores
+        blocks = [(start, min(start + self.block_size, S)) for start in range(0, S, self.block_size)]
+        if self.pool is None:
+            results = [evaluate_block(start, stop, self.splits) for start, stop in blocks]
+        else:
+            starts, stops = zip(*blocks)
+            results = list(self.pool.map(evaluate_block, starts, stops, [self.splits] * len(blocks)))
+        moves = [move for move in results if move is not None]
+        return min(moves) if moves else None
+
+    def _move_store(self, solution: Solution, store_id: int, src: int, dst: int) -> None:
+        # Shared state only; the solution is updated by the caller
+        a = self.arrays
+        a["assigned"][store_id] = dst
+        for w_id in (src, dst):
+            a["remaining"][w_id] = solution.remaining_capacity[w_id]
+            a["open"][w_id] = solution.open_warehouses[w_id]
+            a["loads"][w_id] = len(solution.warehouse_stores[w_id])
+
+    def apply(self, solution: Solution, move: Move) -> None:
+        """Apply the move to the solution and mirror it in shared memory."""
+        _, kind, store_id, target = move
+        src = int(self.arrays["assigned"][store_id])
+        amount = self.problem.stores[store_id].demand
+
+        if kind == RELOCATE:
+            solution.unassign(store_id, src)
+            solution.assign(store_id, target, amount)
+            self._move_store(solution, store_id, src, target)
+        else:
+            dst = int(self.arrays["assigned"][target])
+            solution.unassign(store_id, src)
+            solution.unassign(target, dst)
+            solution.assign(store_id, dst, amount)
+            solution.assign(target, src, self.problem.stores[target].demand)
+            self._move_store(solution, store_id, src, dst)
+            self._move_store(solution, target, dst, src)
+
+    def descend(self, solution: Solution, max_steps: Optional[int] = None, time_limit: Optional[float] = None,
+                trace: Optional[TraceRecorder] = None) -> Solution:
+        """Apply the best improving move until none is left (or the step/time limit is hit) on a copy of the solution."""
+        solution = solution.copy()
+        self.load(solution)
+        deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        steps = 0
+
+        while max_steps is None or steps < max_steps:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            move = self.best_move()
+            if move is None:
+                break
+            self.apply(solution, move)
+            steps += 1
+            if trace is not None:
+                trace.record(steps, solution.fitness_score, solution.fitness_score,
+                             "relocate" if move[1] == RELOCATE else "swap")
+
+        return solution
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        elif _arrays.get("costs") is self.arrays.get("costs"):
+            _arrays.clear()
+        # Views must be dropped before their buffers can be released
+        self.arrays = {}
+        for segment in self.segments:
+            segment.close()
+            segment.unlink()
+        self.segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,180 @@
+import time
+from typing import List, Optional, Tuple
+
+from models.instance_data import InstanceData
+from models.search_random import SearchRandom, default_random
+from models.solution import Solution
+from solver.Tweaks import Tweaks
+from solver.alns import ALNS
+from solver.trace import TraceRecorder
+
+
+def assignment_distance(a: Solution, b: Solution) -> int:
+    """Number of stores whose suppliers (warehouses and amounts) differ between the two solutions."""
+    return sum(1 for sa, sb in zip(a.store_suppliers, b.store_suppliers) if sa != sb)
+
+
+class ElitePool:
+    """
+    Bounded pool of good, mutually different solutions, cheapest first. A candidate closer than min_distance
+    to a member only replaces that member if it is cheaper; otherwise it replaces the worst member when full.
+    """
+
+    def __init__(self, capacity: int = 10, min_distance: int = 2):
+        self.capacity = capacity
+        self.min_distance = min_distance
+        self.solutions: List[Solution] = []
+
+    def __len__(self):
+        return len(self.solutions)
+
+    def best(self) -> Optional[Solution]:
+        return self.solutions[0] if self.solutions else None
+
+    def add(self, solution: Solution) -> bool:
+        """Offer a solution to the pool (a copy is stored); returns True if it was accepted."""
+        closest, closest_distance = None, None
+        for member in self.solutions:
+            distance = assignment_distance(solution, member)
+            if closest_distance is None or distance < closest_distance:
+                closest, closest_distance = member, distance
+
+        if closest is not None and closest_distance < self.min_distance:
+            # Too similar to a member: keep only the cheaper of the two
+            if solution.fitness_score >= closest.fitness_score:
+                return False
+            self.solutions.remove(closest)
+        elif len(self.solutions) >= self.capacity:
+            if solution.fitness_score >= self.solutions[-1].fitness_score:
+                return False
+            self.solutions.pop()
+
+        self.solutions.append(solution.copy())
+        self.solutions.sort(key=lambda s: s.fitness_score)
+        return True
+
+    def pairs(self) -> List[Tuple[Solution, Solution]]:
+        """All (initiating, guiding) pairs of members, cheapest guiding solutions first."""
+        return [(a, b) for b in self.solutions for a in self.solutions if a is not b]
+
+
+def path_relink(initiating: Solution, guiding: Solution, rnd: SearchRandom,
+                max_candidates: int = 50, polish_count: int = 2,
+                deadline: Optional[float] = None) -> Optional[Solution]:
+    """
+    Walk from the initiating solution toward the guiding one, one store at a time. Each step gives one differing
+    store (out of a sample of at most max_candidates) its supplies in the guiding solution, choosing the cheapest
+    feasible step; steps are evaluated incrementally by applying and undoing them. The local minima met along
+    the path are polished with a relocation descent and the best one is returned (None if there was none).
+    The walk stops early at the perf_counter deadline, if given.
+    """
+    current = initiating.copy()
+    differing = [s for s in range(current.problem.num_stores)
+                 if current.store_suppliers[s] != guiding.store_suppliers[s]]
+
+    local_minima: List[Solution] = []
+    descending = False
+
+    while len(differing) > 1:  # the last step would reach the guiding solution itself
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+
+        sample = differing if len(differing) <= max_candidates else rnd.sample(differing, max_candidates)
+        best_delta, best_store = None, None
+
+        for store_id in sample:
+            old_cost = current.fitness_score
+            old_supplies = current.release_store(store_id)
+            target = guiding.store_suppliers[store_id]
+
+            if all(current.can_supply(store_id, w_id, amount) for w_id, amount in target.items()):
+                current.restore_store(store_id, target)
+                delta = current.fitness_score - old_cost
+                if best_delta is None or delta < best_delta:
+                    best_delta, best_store = delta, store_id
+                current.release_store(store_id)
+
+            current.restore_store(store_id, old_supplies)
+
+        # The path turns upward (or is blocked by capacity and conflicts) right after a descent
+        if descending and (best_delta is None or best_delta > 0):
+            local_minima.append(current.copy())
+        if best_delta is None:
+            break
+
+        current.release_store(best_store)
+        current.restore_store(best_store, guiding.store_suppliers[best_store])
+        differing.remove(best_store)
+        descending = best_delta < 0 or (descending and best_delta == 0)
+
+    if descending:
+        local_minima.append(current)
+
+    best = None
+    for candidate in sorted(local_minima, key=lambda s: s.fitness_score)[:polish_count]:
+        Tweaks.relocate_descent(candidate)
+        if best is None or candidate.fitness_score < best.fitness_score:
+            best = candidate
+    return best
+
+
+class ElitePathRelinking:
+    """
+    ALNS restarts fill an elite pool with good, diverse solutions; the remaining budget relinks pairs of elite
+    solutions and offers the results back to the pool, until no new pair is left, the time runs out or
+    `max_relinks` relinks were made. Without a time limit max_relinks defaults to the number of ordered pairs
+    of a full pool, since accepted relinks keep creating new pairs.
+    """
+
+    def __init__(self, problem: InstanceData, pool_size: int = 10, min_distance: int = 2, restarts: int = 3,
+                 relink_fraction: float = 0.4, iterations: int = 1000, time_limit: Optional[float] = None,
+                 max_candidates: int = 50, effort: str = "cpu", rnd: Optional[SearchRandom] = None,
+                 trace: Optional[TraceRecorder] = None, max_relinks: Optional[int] = None):
+        self.problem = problem
+        self.pool = ElitePool(pool_size, min_distance)
+        self.restarts = restarts
+        self.relink_fraction = relink_fraction
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.max_candidates = max_candidates
+        if max_relinks is None and time_limit is None:
+            max_relinks = pool_size * (pool_size - 1)
+        self.max_relinks = max_relinks
+        self.effort = effort
+        self.rnd = rnd or default_random()
+        self.trace = trace
+        self.relinks = 0
+
+    def run(self, solution: Solution) -> Solution:
+        deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else None
+        self.pool.add(solution)
+
+        # Phase 1: independent ALNS runs, each on a child stream of the shared generator
+        restart_time = None
+        if self.time_limit is not None:
+            restart_time = self.time_limit * (1 - self.relink_fraction) / self.restarts
+        for _ in range(self.restarts):
+            alns = ALNS(self.problem, iterations=max(1, self.iterations // self.restarts), time_limit=restart_time,
+                        effort=self.effort, rnd=self.rnd.spawn(), trace=self.trace)
+            self.pool.add(alns.run(solution))
+
+        # Phase 2: relink every pair of pool members once, including pairs created by earlier relinks
+        done = set()  # identity pairs; holding the references keeps evicted members' ids from being reused
+        while deadline is None or time.perf_counter() < deadline:
+            if self.max_relinks is not None and self.relinks >= self.max_relinks:
+                break
+            pending = [(a, b) for a, b in self.pool.pairs() if (a, b) not in done]
+            if not pending:
+                break
+
+            initiating, guiding = pending[0]
+            done.add((initiating, guiding))
+            result = path_relink(initiating, guiding, self.rnd, self.max_candidates, deadline=deadline)
+            self.relinks += 1
+            if result is not None:
+                self.pool.add(result)
+            if self.trace is not None:
+                self.trace.record(self.relinks, result.fitness_score if result is not None else guiding.fitness_score,
+                                  self.pool.best().fitness_score, "path_relink")
+
+        return self.pool.best().copy()
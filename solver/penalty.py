@@ -0,0 +1,180 @@
+import math
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from models.instance_data import InstanceData
+from models.search_random import SearchRandom, default_random
+from models.solution import Solution
+from solver.trace import TraceRecorder
+
+
+class PenaltyWeights:
+    """
+    Weights of the violations in the penalized objective (per unit of overflow, per unit of unmet demand, per
+    incompatible pair sharing a warehouse). Adapted during the search: a weight grows while its constraint is
+    violated and shrinks while it holds, so the search stays near the boundary of the feasible region.
+    """
+
+    def __init__(self, capacity: float, demand: float, conflict: float,
+                 increase: float = 1.2, decrease: float = 0.9, min_weight: float = 1.0, max_weight: float = 1e9):
+        self.capacity = capacity
+        self.demand = demand
+        self.conflict = conflict
+        self.increase = increase
+        self.decrease = decrease
+        self.min_weight = min_weight
+        self.max_weight = max_weight
+
+    @staticmethod
+    def for_instance(problem: InstanceData) -> 'PenaltyWeights':
+        # A unit supplied elsewhere costs at most the largest supply cost plus a share of a fixed cost,
+        # and separating two incompatible stores costs about one more open warehouse
+        capacities = np.array([w.capacity for w in problem.warehouses], dtype=np.float64)
+        unit = float(problem.costs.max() + (problem.fixed_costs / np.maximum(capacities, 1)).max())
+        return PenaltyWeights(unit, unit, float(problem.fixed_costs.mean()) + unit)
+
+    def cost(self, solution: Solution) -> float:
+        return solution.penalized_cost(self.capacity, self.demand, self.conflict)
+
+    def update(self, solution: Solution) -> None:
+        def adapt(weight, violated):
+            weight *= self.increase if violated else self.decrease
+            return min(max(weight, self.min_weight), self.max_weight)
+
+        self.capacity = adapt(self.capacity, solution.overflow > 0)
+        self.demand = adapt(self.demand, solution.unmet_demand > 0)
+        self.conflict = adapt(self.conflict, solution.violations > 0)
+
+
+def place_demand(solution: Solution, store_id: int, amount: int) -> int:
+    """
+    Assign `amount` more units of the store without breaking a constraint: the cheapest warehouse that takes it
+    in one piece (supply cost plus the fixed cost if closed), otherwise split over the warehouses with room,
+    cheapest per unit first. Returns the amount that could not be placed.
+    """
+    problem = solution.problem
+    store = problem.stores[store_id]
+    remaining = np.asarray(solution.remaining_capacity, dtype=np.int64)
+    is_open = np.asarray(solution.open_warehouses, dtype=bool)
+
+    # Warehouses supplying an incompatible store are out; those already supplying this store are not
+    allowed = np.ones(problem.num_warehouses, dtype=bool)
+    for other in store.incompatible_stores:
+        for w_id in solution.store_suppliers[other]:
+            allowed[w_id] = False
+    allowed &= remaining > 0
+
+    whole = np.nonzero(allowed & (remaining >= amount))[0]
+    if whole.size:
+        costs = (amount * problem.costs[store_id, whole].astype(np.int64)
+                 + np.where(is_open[whole], 0, problem.fixed_costs[whole]))
+        solution.assign(store_id, int(whole[np.argmin(costs)]), amount)
+        return 0
+
+    split = np.nonzero(allowed)[0]
+    unit_costs = problem.costs[store_id, split] + np.where(is_open[split], 0,
+                                                           problem.fixed_costs[split] / remaining[split])
+    for w_id in split[np.argsort(unit_costs, kind='stable')].tolist():
+        if amount == 0:
+            break
+        supplied = min(amount, solution.remaining_capacity[w_id])
+        solution.assign(store_id, w_id, supplied)
+        amount -= supplied
+    return amount
+
+
+def repair(solution: Solution) -> bool:
+    """
+    Make the solution feasible in place, touching only the violating part: separate incompatible stores,
+    take the most expensive supplies out of overfull warehouses, then place all unmet demand with place_demand.
+    Returns whether the solution is feasible afterwards.
+    """
+    problem = solution.problem
+    displaced = set()
+
+    for w_id in range(problem.num_warehouses):
+        if not solution.warehouse_violations[w_id]:
+            continue
+        stores = solution.warehouse_stores[w_id]
+        while solution.warehouse_violations[w_id]:
+            # Take out the store in the most conflicts here, the smaller supply on ties
+            store_id = max(stores, key=lambda s: (len(stores.intersection(problem.stores[s].incompatible_stores)),
+                                                  -solution.store_suppliers[s][w_id], -s))
+            solution.unassign(store_id, w_id)
+            displaced.add(store_id)
+
+    for w_id in range(problem.num_warehouses):
+        if solution.remaining_capacity[w_id] >= 0:
+            continue
+        # Most expensive units first
+        by_cost = sorted(solution.warehouse_stores[w_id], key=lambda s: (-problem.supply_costs_matrix[s][w_id], s))
+        for store_id in by_cost:
+            overflow = -solution.remaining_capacity[w_id]
+            if overflow <= 0:
+                break
+            solution.unassign(store_id, w_id, min(overflow, solution.store_suppliers[store_id][w_id]))
+            displaced.add(store_id)
+
+    if solution.unmet_demand > 0:
+        short: List[int] = [s for s in displaced if solution.unassigned_demand(s) > 0]
+        if sum(solution.unassigned_demand(s) for s in short) < solution.unmet_demand:
+            # Demand was already unmet before the repair: find every short store
+            short = [s.id for s in problem.stores if solution.unassigned_demand(s.id) > 0]
+        for store_id in sorted(short, key=lambda s: (-solution.unassigned_demand(s), s)):
+            place_demand(solution, store_id, solution.unassigned_demand(store_id))
+
+    return solution.is_feasible()
+
+
+def penalized_annealing(solution: Solution, data: InstanceData, iterations=1000, time_limit=None,
+                        rnd: Optional[SearchRandom] = None, weights: Optional[PenaltyWeights] = None,
+                        temperature: float = 100.0, cooling: float = 0.995, update_every: int = 50,
+                        trace: Optional[TraceRecorder] = None) -> Solution:
+    """
+    Simulated annealing on the penalized objective: a move sends the whole demand of a random store to one of its
+    candidate warehouses regardless of capacity and conflicts, so the search can cross infeasible regions.
+    The weights adapt every `update_every` iterations. Feasibility is read from the violation counters, and the
+    final solution is repaired, so only the returned solution needs the Validator.
+    """
+    rnd = rnd or default_random()
+    weights = weights or PenaltyWeights.for_instance(data)
+    current = solution.copy()
+    best = current.copy() if current.is_feasible() else None
+    temp = temperature
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+
+    for i in range(iterations):
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+
+        store_id = rnd.store_index(data.num_stores)
+        target = rnd.choice(data.candidate_warehouses(store_id))
+        if target in current.store_suppliers[store_id]:
+            continue
+
+        old_cost = weights.cost(current)
+        old_supplies = current.release_store(store_id)
+        current.assign(store_id, target, data.stores[store_id].demand)
+        delta = weights.cost(current) - old_cost
+
+        if not (delta <= 0 or math.exp(-delta / temp) > rnd.random()):
+            current.release_store(store_id)
+            current.restore_store(store_id, old_supplies)
+
+        if current.is_feasible() and (best is None or current.fitness_score < best.fitness_score):
+            best = current.copy()
+
+        if (i + 1) % update_every == 0:
+            weights.update(current)
+
+        if trace is not None:
+            trace.record(i, current.fitness_score, best.fitness_score if best is not None else -1, "relocate")
+
+        temp *= cooling
+
+    if not current.is_feasible() and repair(current):
+        if best is None or current.fitness_score < best.fitness_score:
+            best = current
+    return best if best is not None else current
@@ -0,0 +1,99 @@
+import io
+import json
+import os
+import sqlite3
+import time
+from typing import Optional
+
+import numpy as np
+
+from models.instance_data import InstanceData
+from models.solution import Solution
+from solver.validator import Validator
+
+
+class SolutionStore:
+    """
+    Best known solution per instance in a SQLite file, keyed by InstanceData.content_hash. A row holds the
+    solution as compact (store, warehouse, amount) triples, its cost, the config of the run that found it and
+    the run's wall time.
+
+    Parallel workers each open their own connection. A submission is a single upsert that only replaces a row
+    with a strictly cheaper solution, so concurrent writers cannot overwrite a better result with a worse one;
+    SQLite serializes the writes and busy writers wait up to `timeout` seconds.
+    """
+
+    def __init__(self, path: str = "output/best_known.sqlite", timeout: float = 60.0):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(path, timeout=timeout)
+        # Write-ahead log: readers never block the writer and a crash cannot leave a half written row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS best_known (
+                    instance_hash TEXT PRIMARY KEY,
+                    instance_name TEXT,
+                    cost INTEGER NOT NULL,
+                    solution BLOB NOT NULL,
+                    config TEXT,
+                    wall_time REAL,
+                    updated_at REAL
+                )""")
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> 'SolutionStore':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def submit(self, instance: InstanceData, solution: Solution, config: Optional[dict] = None,
+               wall_time: Optional[float] = None, instance_name: str = "") -> bool:
+        """Store the solution if it is valid and cheaper than the stored one; returns whether it was stored."""
+        if not Validator(instance, solution).validate():
+            return False
+        cost = int(solution.fitness())
+
+        buffer = io.BytesIO()
+        np.savez(buffer, **solution.to_sparse_arrays())
+        with self.connection:
+            cursor = self.connection.execute("""
+                INSERT INTO best_known (instance_hash, instance_name, cost, solution, config, wall_time, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (instance_hash) DO UPDATE SET
+                    instance_name = excluded.instance_name, cost = excluded.cost, solution = excluded.solution,
+                    config = excluded.config, wall_time = excluded.wall_time, updated_at = excluded.updated_at
+                WHERE excluded.cost < best_known.cost""",
+                (instance.content_hash(), instance_name, cost, buffer.getvalue(),
+                 json.dumps(config, default=str) if config is not None else None, wall_time, time.time()))
+        return cursor.rowcount > 0
+
+    def record(self, instance: InstanceData) -> Optional[dict]:
+        """The stored row of the instance without the solution (cost, config, wall time), or None."""
+        row = self.connection.execute(
+            "SELECT instance_name, cost, config, wall_time, updated_at FROM best_known WHERE instance_hash = ?",
+            (instance.content_hash(),)).fetchone()
+        if row is None:
+            return None
+        name, cost, config, wall_time, updated_at = row
+        return {"instance_name": name, "cost": cost, "config": json.loads(config) if config else None,
+                "wall_time": wall_time, "updated_at": updated_at}
+
+    def best_cost(self, instance: InstanceData) -> Optional[int]:
+        record = self.record(instance)
+        return record["cost"] if record is not None else None
+
+    def best(self, instance: InstanceData) -> Optional[Solution]:
+        """The stored best solution, ready to warm-start a search, or None if the instance was never solved."""
+        row = self.connection.execute("SELECT solution FROM best_known WHERE instance_hash = ?",
+                                      (instance.content_hash(),)).fetchone()
+        if row is None:
+            return None
+        with np.load(io.BytesIO(row[0])) as data:
+            return Solution.from_sparse_arrays(dict(data), instance)
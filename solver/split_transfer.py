@@ -0,0 +1,141 @@
+import time
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from models.instance_data import InstanceData
+from models.search_random import SearchRandom, default_random
+from models.solution import Solution
+from solver.trace import TraceRecorder
+
+# (cost delta, store, from warehouse, to warehouse, amount)
+Transfer = Tuple[int, int, int, int, int]
+
+
+class SplitTransfer:
+    """
+    Moves for solutions where a store's demand is split over several warehouses:
+    - transfer: δ units of a store's supply from one of its warehouses to another (one of its other suppliers or a
+      new one). The cost is linear in δ apart from opening the destination and closing the source, so the best δ
+      is closed form: all the destination's residual capacity allows if it is cheaper per unit, otherwise the whole
+      supply, and only if that closes the source for more than it costs;
+    - consolidation: close a warehouse by spreading every supply it makes over the other open warehouses, cheapest
+      first and split as residual capacities allow, when the fixed cost saved exceeds the extra supply cost.
+    """
+
+    def __init__(self, solution: Solution):
+        self.solution = solution
+        self.problem = solution.problem
+        self.applied = Counter()  # move kind -> number applied
+
+    def best_transfer(self, store_id: int) -> Optional[Transfer]:
+        """Most improving transfer of the store over all its suppliers and candidate warehouses, or None."""
+        solution, problem = self.solution, self.problem
+        suppliers = solution.store_suppliers[store_id]
+        if not suppliers:
+            return None
+
+        candidates = np.union1d(np.asarray(problem.candidate_warehouses(store_id), dtype=np.int64),
+                                np.fromiter(suppliers, dtype=np.int64, count=len(suppliers)))
+        costs = problem.costs[store_id, candidates].astype(np.int64)
+        remaining = np.maximum(np.asarray(solution.remaining_capacity, dtype=np.int64)[candidates], 0)
+        opening = np.where(np.asarray(solution.open_warehouses, dtype=bool)[candidates], 0,
+                           problem.fixed_costs[candidates])
+        # Warehouses supplying an incompatible store cannot take any of its demand
+        blocked = {w_id for other in problem.stores[store_id].incompatible_stores
+                   for w_id in solution.store_suppliers[other]}
+        allowed = ~np.isin(candidates, list(blocked)) & (remaining > 0)
+
+        best: Optional[Transfer] = None
+        for from_w, amount in suppliers.items():
+            unit = costs - problem.supply_costs_matrix[store_id][from_w]
+            closing = problem.warehouses[from_w].fixed_cost if len(solution.warehouse_stores[from_w]) == 1 else 0
+            whole = remaining >= amount
+            delta = np.where(whole, amount * unit + opening - closing,
+                             np.where(unit < 0, remaining * unit + opening, 0))
+            delta[~allowed | (candidates == from_w)] = 0
+
+            i = int(np.argmin(delta))
+            if delta[i] < 0 and (best is None or delta[i] < best[0]):
+                moved = amount if whole[i] else int(remaining[i])
+                best = (int(delta[i]), store_id, from_w, int(candidates[i]), moved)
+        return best
+
+    def apply(self, transfer: Transfer) -> None:
+        _, store_id, from_w, to_w, amount = transfer
+        self.solution.unassign(store_id, from_w, amount)
+        self.solution.assign(store_id, to_w, amount)
+        self.applied["transfer"] += 1
+
+    def consolidate(self, w_id: int) -> bool:
+        """Close the warehouse if its supplies fit elsewhere in open warehouses at a lower total cost."""
+        solution, problem = self.solution, self.problem
+        if not solution.warehouse_stores[w_id]:
+            return False
+
+        before = solution.fitness_score
+        released = [(store_id, solution.store_suppliers[store_id][w_id])
+                    for store_id in sorted(solution.warehouse_stores[w_id])]
+        for store_id, _ in released:
+            solution.unassign(store_id, w_id)
+
+        placed: List[Tuple[int, int, int]] = []
+        complete = True
+        for store_id, amount in sorted(released, key=lambda item: (-item[1], item[0])):
+            for to_w in problem.candidate_warehouses(store_id):
+                if amount == 0:
+                    break
+                if (to_w == w_id or not solution.open_warehouses[to_w] or solution.remaining_capacity[to_w] <= 0
+                        or solution.conflicts(store_id, to_w)):
+                    continue
+                supplied = min(amount, solution.remaining_capacity[to_w])
+                solution.assign(store_id, to_w, supplied)
+                placed.append((store_id, to_w, supplied))
+                amount -= supplied
+            if amount:
+                complete = False
+                break
+
+        if complete and solution.fitness_score < before:
+            self.applied["consolidate"] += 1
+            return True
+
+        for store_id, to_w, supplied in reversed(placed):
+            solution.unassign(store_id, to_w, supplied)
+        for store_id, amount in released:
+            solution.assign(store_id, w_id, amount)
+        return False
+
+
+def split_transfer_search(solution: Solution, data: InstanceData, iterations=1000, time_limit=None,
+                          rnd: Optional[SearchRandom] = None, consolidate_every: int = 10,
+                          trace: Optional[TraceRecorder] = None) -> Solution:
+    """
+    Descent applying the best transfer of a random store each iteration, and trying to consolidate a random open
+    warehouse every `consolidate_every` iterations.
+    """
+    rnd = rnd or default_random()
+    solution = solution.copy()
+    moves = SplitTransfer(solution)
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+
+    for i in range(iterations):
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+
+        kind = "none"
+        transfer = moves.best_transfer(rnd.store_index(data.num_stores))
+        if transfer is not None:
+            moves.apply(transfer)
+            kind = "transfer"
+
+        if consolidate_every and (i + 1) % consolidate_every == 0:
+            open_ids = [w_id for w_id, is_open in enumerate(solution.open_warehouses) if is_open]
+            if open_ids and moves.consolidate(rnd.choice(open_ids)):
+                kind = "consolidate"
+
+        if trace is not None:
+            trace.record(i, solution.fitness_score, solution.fitness_score, kind)
+
+    return solution
@@ -0,0 +1,142 @@
+import csv
+import os
+import time
+import warnings
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+_clock = time.perf_counter
+
+TRACE_FIELDS = ["time", "iteration", "current", "best", "operator"]
+TRACE_DTYPE = np.dtype([("time", np.float64), ("iteration", np.int64), ("current", np.int64),
+                        ("best", np.int64), ("operator", "S24")])
+
+
+class TraceRecorder:
+    """
+    Convergence trace of a search: (seconds since start, iteration, current cost, best cost, operator) records.
+    Records go into a preallocated ring buffer, so recording is a clock read and one slot assignment
+    (raw clock values are converted to elapsed seconds at flush time). flush() appends the records written
+    since the last flush to a .csv or .npy file. If more than `capacity` (rounded up to a power of two) records
+    are written between two flushes the oldest are overwritten and counted in `dropped`.
+    """
+
+    def __init__(self, path: Optional[str] = None, capacity: int = 1 << 16, every: int = 1):
+        self.path = path
+        self.capacity = 1 << max(0, capacity - 1).bit_length()
+        self.mask = self.capacity - 1
+        self.every = every  # keep one record in `every` (records of a new best are always kept)
+        self.buffer: List[Optional[tuple]] = [None] * self.capacity
+        self.written = 0  # records ever written to the buffer
+        self.flushed = 0  # records already written to the file
+        self.dropped = 0
+        self.calls = 0
+        self.start = time.perf_counter()
+        self.time_offset = 0.0  # elapsed time of the interrupted run when resuming from a checkpoint
+        self.last_best = None
+
+    def record(self, iteration: int, current: int, best: int, operator: str = "") -> None:
+        if self.every > 1:
+            self.calls += 1
+            if self.calls % self.every and best == self.last_best:
+                return
+            self.last_best = best
+        self.buffer[self.written & self.mask] = (_clock(), iteration, current, best, operator)
+        self.written += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start + self.time_offset
+
+    def pending(self) -> List[tuple]:
+        """Records not flushed yet, oldest first, with elapsed seconds as the timestamp."""
+        first = max(self.flushed, self.written - self.capacity)
+        self.dropped += first - self.flushed
+        offset = self.time_offset - self.start
+        records = [self.buffer[i & self.mask] for i in range(first, self.written)]
+        return [(record[0] + offset,) + record[1:] for record in records]
+
+    def to_array(self, records: Sequence[tuple]) -> np.ndarray:
+        array = np.empty(len(records), dtype=TRACE_DTYPE)
+        for i, (t, iteration, current, best, operator) in enumerate(records):
+            array[i] = (t, iteration, current, best, operator.encode())
+        return array
+
+    def flush(self, path: Optional[str] = None) -> None:
+        """Append the pending records to the trace file; the format follows the extension (.csv or .npy)."""
+        path = path or self.path
+        if path is None:
+            return
+        records = self.pending()
+        self.flushed = self.written
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if path.endswith(".npy"):
+            # .npy cannot be appended to, rewrite it atomically; flushes are rare (checkpoints, end of run)
+            array = self.to_array(records)
+            if os.path.exists(path):
+                array = np.concatenate([np.load(path), array])
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as file:
+                np.save(file, array)
+            os.replace(tmp_path, path)
+        else:
+            write_header = not os.path.exists(path)
+            with open(path, "a", newline="") as file:
+                writer = csv.writer(file)
+                if write_header:
+                    writer.writerow(TRACE_FIELDS)
+                writer.writerows((f"{t:.6f}", iteration, current, best, operator)
+                                 for t, iteration, current, best, operator in records)
+
+    def clear(self) -> None:
+        """Remove the trace file of a previous run."""
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def load_trace(path: str) -> np.ndarray:
+    """Read a trace written by TraceRecorder.flush into a structured array."""
+    if path.endswith(".npy"):
+        return np.load(path)
+    with open(path, newline="") as file:
+        rows = list(csv.DictReader(file))
+    array = np.empty(len(rows), dtype=TRACE_DTYPE)
+    for i, row in enumerate(rows):
+        array[i] = (float(row["time"]), int(row["iteration"]), int(row["current"]), int(row["best"]),
+                    row["operator"].encode())
+    return array
+
+
+def summary_curve(traces: Sequence[np.ndarray], axis: str = "time", points: int = 100) -> Dict[str, np.ndarray]:
+    """
+    Best cost of several runs sampled on a common grid of `axis` ('time' or 'iteration') values.
+    Each run's best cost is carried forward between records; grid points before a run's first record are NaN.
+    The axis must not decrease within a trace: time always qualifies, iterations do not for restarting searches.
+    Returns the grid and the min, median, mean and max over runs.
+    """
+    traces = [t for t in traces if len(t)]
+    if not traces:
+        raise ValueError("No trace records to summarize")
+    end = max(float(t[axis][-1]) for t in traces)
+    grid = np.linspace(0.0, end, points)
+
+    curves = np.full((len(traces), points), np.nan)
+    for row, trace in enumerate(traces):
+        positions = np.searchsorted(trace[axis], grid, side="right") - 1
+        known = positions >= 0
+        curves[row, known] = trace["best"][positions[known]]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # grid points no run has reached yet
+        return {
+            axis: grid,
+            "runs": np.sum(~np.isnan(curves), axis=0),
+            "min": np.nanmin(curves, axis=0),
+            "median": np.nanmedian(curves, axis=0),
+            "mean": np.nanmean(curves, axis=0),
+            "max": np.nanmax(curves, axis=0),
+        }
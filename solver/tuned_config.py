@@ -0,0 +1,53 @@
+import json
+import os
+from typing import Dict, Optional
+
+# Instance size classes by S*W, upper bounds inclusive; the last class takes everything larger
+SIZE_CLASSES = [("small", 30_000), ("medium", 250_000), ("large", None)]
+
+# Defaults of the tunable parameters, as hard-coded in the solvers
+DEFAULT_PARAMS = {
+    "tweak_with_iterations1": {"temperature": 100.0, "cooling": 0.995, "iterations": 1000},
+    "warehouse_ga": {"mutation_rate": 0.02, "tournament_size": 3},
+}
+
+
+def size_class(num_stores: int, num_warehouses: int) -> str:
+    size = num_stores * num_warehouses
+    for name, upper in SIZE_CLASSES:
+        if upper is None or size <= upper:
+            return name
+    return SIZE_CLASSES[-1][0]
+
+
+class TunedConfig:
+    """
+    Solver parameters chosen by the tuning harness (benchmarks/tune.py), per improvement method and size class.
+    Stored as JSON: {"size_classes": [...], "methods": {method: {size class: {parameter: value}}}}.
+    """
+
+    def __init__(self, methods: Optional[Dict[str, Dict[str, dict]]] = None):
+        self.methods = methods or {}
+
+    @staticmethod
+    def load(path: str) -> 'TunedConfig':
+        with open(path, 'r') as file:
+            data = json.load(file)
+        return TunedConfig(data.get("methods", {}))
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write then rename, so a solver never loads a half written file
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump({"size_classes": SIZE_CLASSES, "methods": self.methods}, file, indent=2)
+        os.replace(tmp_path, path)
+
+    def set(self, method: str, size: str, params: dict) -> None:
+        self.methods.setdefault(method, {})[size] = dict(params)
+
+    def params(self, method: str, instance) -> dict:
+        """Tuned parameters of the method for the instance's size class (empty if it was not tuned)."""
+        return dict(self.methods.get(method, {}).get(size_class(instance.num_stores, instance.num_warehouses), {}))
@@ -1,48 +1,70 @@
+from typing import Dict, Set
+
+import numpy as np
+
+from models.cost_matrix import row_chunks
 from models.instance_data import InstanceData
 from models.solution import Solution
 
 
 class Validator:
+    """Checks a solution against the instance, streaming over the allocation in store-row chunks."""
+
     def __init__(self, problem: InstanceData, solution: Solution):
         self.problem = problem
         self.solution = solution
 
     def validate(self) -> bool:
         """Check if the solution is valid."""
-        # Validate capacity constraints
-        warehouse_used_capacity = [0] * self.problem.num_warehouses
+        problem, solution = self.problem, self.solution
+        demands = np.array([s.demand for s in problem.stores], dtype=np.int64)
+        open_mask = np.array(solution.open_warehouses, dtype=bool)
+        in_conflict = problem.conflict_graph.degrees > 0
 
-        for store_id, allocations in enumerate(self.solution.allocation):
-            store_demand = self.problem.stores[store_id].demand
-            allocated_sum = sum(allocations)
-
-            if allocated_sum != store_demand:
-                print(f"Invalid allocation for store {store_id}: allocated {allocated_sum}, required {store_demand}")
+        # One pass over the allocation in store-row chunks: demand of every store, warehouse loads, the supplying
+        # warehouses of stores that have incompatible ones, and the first store supplied by a closed warehouse
+        warehouse_used_capacity = np.zeros(problem.num_warehouses, dtype=np.int64)
+        suppliers: Dict[int, Set[int]] = {}
+        closed_supply = None
+        for start, stop in row_chunks(problem.num_stores, problem.num_warehouses):
+            block = np.asarray(solution.allocation[start:stop], dtype=np.int64)
+            allocated = block.sum(axis=1)
+            wrong = np.nonzero(allocated != demands[start:stop])[0]
+            if wrong.size:
+                store_id = start + int(wrong[0])
+                print(f"Invalid allocation for store {store_id}: allocated {allocated[wrong[0]]}, "
+                      f"required {demands[store_id]}")
                 return False
+            warehouse_used_capacity += block.sum(axis=0)
 
-            for w_id, allocation in enumerate(allocations):
-                warehouse_used_capacity[w_id] += allocation
+            rows, w_ids = np.nonzero(block > 0)
+            rows += start
+            if closed_supply is None:
+                closed = np.nonzero(~open_mask[w_ids])[0]
+                if closed.size:
+                    closed_supply = (int(rows[closed[0]]), int(w_ids[closed[0]]))
+            keep = in_conflict[rows]
+            for store_id, w_id in zip(rows[keep].tolist(), w_ids[keep].tolist()):
+                suppliers.setdefault(store_id, set()).add(w_id)
 
         # Validate warehouse capacity constraints
-        for w_id, used in enumerate(warehouse_used_capacity):
-            if used > self.problem.warehouses[w_id].capacity:
+        for w_id, used in enumerate(warehouse_used_capacity.tolist()):
+            if used > problem.warehouses[w_id].capacity:
                 print(
-                    f"Warehouse {w_id} exceeded capacity: used {used}, capacity {self.problem.warehouses[w_id].capacity}")
+                    f"Warehouse {w_id} exceeded capacity: used {used}, capacity {problem.warehouses[w_id].capacity}")
                 return False
 
         # Validate incompatibilities
-        for s1, s2 in self.problem.incompatible_pairs:
-            for w_id in range(self.problem.num_warehouses):
-                if self.solution.allocation[s1][w_id] > 0 and self.solution.allocation[s2][w_id] > 0:
-                    print(f"Incompatible stores {s1} and {s2} assigned to warehouse {w_id}")
-                    return False
+        for s1, s2 in problem.incompatible_pairs:
+            shared = suppliers.get(s1, set()).intersection(suppliers.get(s2, ()))
+            if shared:
+                print(f"Incompatible stores {s1} and {s2} assigned to warehouse {min(shared)}")
+                return False
 
         # Validate open warehouses condition
-        for store_id, allocations in enumerate(self.solution.allocation):
-            for w_id, allocation in enumerate(allocations):
-                if allocation > 0 and not self.solution.open_warehouses[w_id]:
-                    print(f"Store {store_id} is being supplied by a closed warehouse {w_id}")
-                    return False
+        if closed_supply is not None:
+            print(f"Store {closed_supply[0]} is being supplied by a closed warehouse {closed_supply[1]}")
+            return False
 
         return True
 
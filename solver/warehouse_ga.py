@@ -0,0 +1,310 @@
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from models.genetic_algorithm import GeneticAlgorithm
+from models.instance_data import InstanceData
+from models.search_random import SearchRandom, default_random
+from models.solution import Solution
+from solver.trace import TraceRecorder
+
+
+class DecodedState:
+    """
+    Single-source assignment decoded from one chromosome, kept in flat arrays so a child can start from a copy
+    of its parent's in O(S + W). best/second are each store's two cheapest open warehouses among its candidates
+    (-1 if there are none).
+    """
+    __slots__ = ('open', 'assigned', 'remaining', 'members', 'best', 'second', 'supply_cost', 'fixed_cost',
+                 'unplaced')
+
+    def __init__(self, open_mask: np.ndarray, assigned: np.ndarray, remaining: List[int], members: List[set],
+                 best: np.ndarray, second: np.ndarray, supply_cost: int = 0, fixed_cost: int = 0,
+                 unplaced: Optional[set] = None):
+        self.open = open_mask
+        self.assigned = assigned                 # store id -> warehouse id, -1 if unplaced
+        self.remaining = remaining               # warehouse id -> capacity left
+        self.members = members                   # warehouse id -> ids of the stores it supplies
+        self.best = best
+        self.second = second
+        self.supply_cost = supply_cost
+        self.fixed_cost = fixed_cost             # of the warehouses supplying at least one store
+        self.unplaced = unplaced if unplaced is not None else set()
+
+    def copy(self) -> 'DecodedState':
+        return DecodedState(self.open.copy(), self.assigned.copy(), self.remaining[:],
+                            [set(m) for m in self.members], self.best.copy(), self.second.copy(),
+                            self.supply_cost, self.fixed_cost, set(self.unplaced))
+
+
+class WarehouseGA:
+    """
+    Genetic algorithm over which warehouses are open. A chromosome is the open/closed bitstring; it is decoded by
+    assigning every store, largest demand first, to the cheapest open warehouse that can take its whole demand.
+    Demand that finds no warehouse is charged a penalty larger than any feasible cost.
+
+    A child is decoded from the cached state of its parent (the one it takes most genes from) when they differ in
+    at most `max_flips` bits, with the same result as a full decode (see decode_from). Each store tracks its two
+    cheapest open warehouses among its `candidates` cheapest ones, so a flipped warehouse only refreshes the
+    stores that have it among their candidates. The stores a flip displaces can displace others in turn, so the
+    repair only pays off for a few flips: beyond about 6 it costs more than decoding from scratch.
+    """
+
+    def __init__(self, problem: InstanceData, population_size: int = 30, generations: int = 50,
+                 crossover_rate: float = 0.8, mutation_rate: float = 0.02, tournament_size: int = 3,
+                 time_limit: Optional[float] = None, max_flips: int = 6, candidates: int = 16,
+                 rnd: Optional[SearchRandom] = None, trace: Optional[TraceRecorder] = None):
+        self.problem = problem
+        self.population_size = population_size
+        self.generations = generations
+        self.crossover_rate = crossover_rate
+        self.mutation_rate = mutation_rate
+        self.tournament_size = tournament_size
+        self.time_limit = time_limit
+        self.max_flips = max_flips
+        self.rnd = rnd or default_random()
+        self.trace = trace
+
+        self.demands = [s.demand for s in problem.stores]
+        self.order = sorted(range(problem.num_stores), key=lambda s: (-self.demands[s], s))
+        self.order_array = np.array(self.order, dtype=np.int64)
+        self.position = np.empty(problem.num_stores, dtype=np.int64)  # store id -> index in self.order
+        self.position[self.order_array] = np.arange(problem.num_stores)
+        cost_order = problem.cost_order()
+        self.cost_order = cost_order.tolist()
+        self.incompatible = [s.incompatible_stores for s in problem.stores]
+        self.costs = np.asarray(problem.costs)  # a view in the stored dtype (no copy of a mapped matrix)
+        self.unplaced_penalty = int(problem.fixed_costs.sum()) + int(problem.costs.max()) * max(self.demands)
+
+        # Candidates: each store's k cheapest warehouses, and per warehouse the stores having it among them
+        k = max(1, min(candidates, problem.num_warehouses))
+        self.top = np.asarray(cost_order[:, :k], dtype=np.int64)
+        flat = self.top.ravel()
+        by_warehouse = np.argsort(flat, kind='stable')
+        bounds = np.searchsorted(flat[by_warehouse], np.arange(problem.num_warehouses + 1))
+        self.candidate_stores = [by_warehouse[bounds[w]:bounds[w + 1]] // k for w in range(problem.num_warehouses)]
+
+        self.cache = {}                          # chromosome bytes -> fitness
+        self.states = OrderedDict()              # chromosome bytes -> DecodedState, most recent last
+        self.max_states = 3 * population_size
+        self.incremental_decodes = 0
+        self.full_decodes = 0
+
+    # --- state updates -------------------------------------------------------------------------------------
+
+    def best_two(self, open_mask: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cheapest and second cheapest open warehouse of the given stores among their candidates, in cost_order.
+        The candidates are a prefix of cost_order, so any found are also the cheapest open ones overall; place
+        falls back to the whole cost order for the rest.
+        """
+        top = self.top[rows]
+        is_open = open_mask[top]
+        index = np.arange(len(rows))
+        first = np.argmax(is_open, axis=1)
+        has_first = is_open[index, first]
+        is_open[index, first] = False
+        second = np.argmax(is_open, axis=1)
+        has_second = is_open[index, second]
+        return np.where(has_first, top[index, first], -1), np.where(has_second, top[index, second], -1)
+
+    def stores_of(self, warehouses: np.ndarray) -> np.ndarray:
+        """Stores having any of the warehouses among their candidates."""
+        if not len(warehouses):
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate([self.candidate_stores[w] for w in warehouses.tolist()]))
+
+    def assign(self, state: DecodedState, store_id: int, w_id: int) -> None:
+        if not state.members[w_id]:
+            state.fixed_cost += int(self.problem.fixed_costs[w_id])
+        state.members[w_id].add(store_id)
+        state.remaining[w_id] -= self.demands[store_id]
+        state.assigned[store_id] = w_id
+        state.supply_cost += int(self.costs[store_id, w_id]) * self.demands[store_id]
+
+    def unassign(self, state: DecodedState, store_id: int) -> None:
+        w_id = int(state.assigned[store_id])
+        state.members[w_id].discard(store_id)
+        if not state.members[w_id]:
+            state.fixed_cost -= int(self.problem.fixed_costs[w_id])
+        state.remaining[w_id] += self.demands[store_id]
+        state.assigned[store_id] = -1
+        state.supply_cost -= int(self.costs[store_id, w_id]) * self.demands[store_id]
+
+    def fits(self, state: DecodedState, store_id: int, w_id: int) -> bool:
+        return (state.remaining[w_id] >= self.demands[store_id]
+                and state.members[w_id].isdisjoint(self.incompatible[store_id]))
+
+    def place(self, state: DecodedState, store_id: int) -> bool:
+        """Cheapest open warehouse that fits: best, second, then the rest of the cost order."""
+        for w_id in (int(state.best[store_id]), int(state.second[store_id])):
+            if w_id >= 0 and self.fits(state, store_id, w_id):
+                self.assign(state, store_id, w_id)
+                return True
+        open_mask = state.open
+        for w_id in self.cost_order[store_id]:
+            if open_mask[w_id] and self.fits(state, store_id, w_id):
+                self.assign(state, store_id, w_id)
+                return True
+        return False
+
+    # --- decoding ------------------------------------------------------------------------------------------
+
+    def decode_full(self, open_mask: np.ndarray) -> DecodedState:
+        """Greedy assignment of all stores, largest demand first."""
+        S, W = self.problem.num_stores, self.problem.num_warehouses
+        best, second = self.best_two(open_mask, np.arange(S))
+        state = DecodedState(open_mask.copy(), np.full(S, -1, dtype=np.int64),
+                             [w.capacity for w in self.problem.warehouses], [set() for _ in range(W)], best, second)
+        for store_id in self.order:
+            if not self.place(state, store_id):
+                state.unplaced.add(store_id)
+        return state
+
+    def decode_from(self, parent: DecodedState, open_mask: np.ndarray) -> DecodedState:
+        """
+        Same result as decode_full, from a copy of the parent's state. The greedy is replayed only where it can
+        differ. A warehouse is dirty once its stores differ from the parent's at the same point of the decode; its
+        stores not placed yet are then taken out, so it holds what the greedy would see. A dirty warehouse is freed
+        when it opened or lost one of the parent's stores: one that only gained stores has no more room than in
+        the parent's decode. So a store keeps its parent's warehouse while that is clean and open, unless a freed
+        warehouse it ranks earlier in cost_order fits; only the stores of dirty or closed warehouses and those
+        ranking a freed warehouse before their choice are looked at again.
+        """
+        state = parent.copy()
+        flipped = np.nonzero(parent.open != open_mask)[0]
+        state.open = open_mask.copy()
+
+        # best/second only change for the stores that have a flipped warehouse among their candidates
+        rows = self.stores_of(flipped)
+        if rows.size:
+            state.best[rows], state.second[rows] = self.best_two(open_mask, rows)
+
+        num_stores = self.problem.num_stores
+        assigned = parent.assigned.tolist()
+        placed = parent.assigned >= 0
+        # Supply cost of each store's parent choice; unplaced stores rank every warehouse before theirs
+        chosen_cost = np.full(num_stores, np.iinfo(np.int64).max, dtype=np.int64)
+        chosen_cost[placed] = self.costs[np.nonzero(placed)[0], parent.assigned[placed]]
+        flagged = bytearray(num_stores)          # position in self.order -> store to look at again
+        earlier_freed = {}                       # position -> freed warehouses ranked before the store's choice
+        dirty, freed = set(), set()
+
+        def make_dirty(w_id: int, position: int) -> None:
+            if w_id in dirty:
+                return
+            dirty.add(w_id)
+            for other in list(state.members[w_id]):
+                if self.position[other] > position:
+                    self.unassign(state, other)
+                    flagged[self.position[other]] = 1
+
+        def make_freed(w_id: int, position: int) -> None:
+            make_dirty(w_id, position)
+            if w_id in freed:
+                return
+            freed.add(w_id)
+            later = self.order_array[position + 1:]
+            cost = self.costs[later, w_id].astype(np.int64)
+            chosen = chosen_cost[later]
+            earlier = (cost < chosen) | ((cost == chosen) & (w_id < parent.assigned[later]))
+            for offset in np.nonzero(earlier)[0].tolist():
+                flagged[position + 1 + offset] = 1
+                earlier_freed.setdefault(position + 1 + offset, []).append(w_id)
+
+        for w_id in flipped.tolist():
+            if open_mask[w_id]:
+                make_freed(w_id, -1)
+            else:
+                make_dirty(w_id, -1)
+
+        for position in range(num_stores):
+            if not flagged[position]:
+                continue
+            store_id = self.order[position]
+            choice = assigned[store_id]
+            target = -1
+            if choice < 0 or (choice not in dirty and open_mask[choice]):
+                # The parent's choice still fits (or there was none): only an earlier freed warehouse can win
+                fitting = [w_id for w_id in earlier_freed.get(position, ()) if self.fits(state, store_id, w_id)]
+                if fitting:
+                    target = min(fitting, key=lambda w_id: (int(self.costs[store_id, w_id]), w_id))
+                    if choice >= 0:
+                        make_freed(choice, position)
+                        self.unassign(state, store_id)
+                    else:
+                        state.unplaced.discard(store_id)
+                    self.assign(state, store_id, target)
+                continue
+
+            passed = False                       # whether the scan went past the parent's choice
+            for w_id in self.cost_order[store_id]:
+                if w_id == choice:
+                    passed = True
+                if not open_mask[w_id]:
+                    continue
+                if not passed and w_id not in freed:
+                    continue                     # no more room here than in the parent's decode
+                make_dirty(w_id, position)
+                if self.fits(state, store_id, w_id):
+                    target = w_id
+                    break
+            if target != choice and open_mask[choice]:
+                make_freed(choice, position)
+            if target >= 0:
+                self.assign(state, store_id, target)
+            else:
+                state.unplaced.add(store_id)
+        return state
+
+    def decode(self, chromosome: List[int], parent_chromosome: Optional[List[int]] = None) -> DecodedState:
+        open_mask = np.array(chromosome, dtype=bool)
+        parent = None
+        if parent_chromosome is not None and bytes(parent_chromosome) in self.states:
+            self.states.move_to_end(bytes(parent_chromosome))
+            parent = self.states[bytes(parent_chromosome)]
+            if int((parent.open != open_mask).sum()) > self.max_flips:
+                parent = None
+
+        if parent is not None:
+            self.incremental_decodes += 1
+            state = self.decode_from(parent, open_mask)
+        else:
+            self.full_decodes += 1
+            state = self.decode_full(open_mask)
+
+        self.states[bytes(chromosome)] = state
+        if len(self.states) > self.max_states:
+            self.states.popitem(last=False)
+        return state
+
+    def to_solution(self, state: DecodedState) -> Solution:
+        solution = Solution(self.problem)
+        for store_id, w_id in enumerate(state.assigned.tolist()):
+            if w_id >= 0:
+                solution.assign(store_id, w_id, self.demands[store_id])
+        return solution
+
+    def fitness(self, chromosome: List[int], parent: Optional[List[int]] = None) -> int:
+        key = bytes(chromosome)
+        if key not in self.cache:
+            state = self.decode(chromosome, parent)
+            unplaced = sum(self.demands[s] for s in state.unplaced)
+            self.cache[key] = -(state.supply_cost + state.fixed_cost + self.unplaced_penalty * unplaced)
+        return self.cache[key]
+
+    def run(self, solution: Solution) -> Solution:
+        ga = GeneticAlgorithm(self.population_size, self.problem.num_warehouses, self.fitness,
+                              crossover_rate=self.crossover_rate, mutation_rate=self.mutation_rate,
+                              tournament_size=self.tournament_size, generations=self.generations,
+                              initial_population=[int(is_open) for is_open in solution.open_warehouses],
+                              rnd=self.rnd, trace=self.trace, time_limit=self.time_limit, verbose=False,
+                              lineage=True)
+        chromosome, _ = ga.run()
+
+        state = self.states.get(bytes(chromosome)) or self.decode(chromosome)
+        decoded = self.to_solution(state)
+        if not state.unplaced and decoded.fitness_score < solution.fitness_score:
+            return decoded
+        return solution.copy()
@@ -0,0 +1,60 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+from models.parser import Parser
+from solver.best_fit import BestFitDecreasing, ResidualIndex
+from solver.validator import Validator
+
+INSTANCES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instances")
+
+
+@pytest.mark.parametrize("bucket_size", [1, 3, 32])
+def test_residual_index_agrees_with_a_linear_scan(bucket_size):
+    rng = random.Random(bucket_size)
+    index, residuals = ResidualIndex(bucket_size), {}
+    for step in range(5000):
+        w_id = rng.randrange(300)
+        if w_id not in residuals:
+            residuals[w_id] = rng.randrange(100)
+            index.add(w_id, residuals[w_id])
+        elif rng.random() < 0.2:
+            index.remove(w_id, residuals.pop(w_id))
+        else:
+            new = rng.randrange(100)
+            index.update(w_id, residuals[w_id], new)
+            residuals[w_id] = new
+
+        demand = rng.randrange(110)
+        expected = sorted((residual, w_id) for w_id, residual in residuals.items() if residual >= demand)
+        assert list(index.fits(demand)) == expected, step
+        # Tightest fit: the smallest residual with room, lowest id among ties
+        assert next(index.fits(demand), None) == (expected[0] if expected else None), step
+
+
+def test_residual_index_tightest_fit_after_updates():
+    index = ResidualIndex(bucket_size=1)
+    for w_id, residual in enumerate([50, 20, 80, 20]):
+        index.add(w_id, residual)
+    assert next(index.fits(15)) == (20, 1)
+
+    index.update(1, 20, 5)      # warehouse 1 fills up
+    assert next(index.fits(15)) == (20, 3)
+    index.update(2, 80, 16)     # warehouse 2 becomes the tightest
+    assert next(index.fits(15)) == (16, 2)
+    index.remove(2, 16)
+    assert list(index.fits(15)) == [(20, 3), (50, 0)]
+    assert list(index.fits(51)) == []
+
+
+@pytest.mark.parametrize("name", ["toy", "wlp01", "wlp02"])
+def test_large_window_equals_unbounded_scan(name):
+    instance = Parser().parse_instance(os.path.join(INSTANCES, f"{name}.dzn"))
+    unbounded = BestFitDecreasing(instance, window=None).run()
+    assert Validator(instance, unbounded).validate()
+    for window in (instance.num_warehouses, 32):
+        bounded = BestFitDecreasing(instance, window=window).run()
+        np.testing.assert_array_equal(np.asarray(bounded.allocation), np.asarray(unbounded.allocation))
+        assert bounded.fitness_score == unbounded.fitness_score
@@ -0,0 +1,135 @@
+import itertools
+import math
+import os
+
+import numpy as np
+import pytest
+
+from models.parser import Parser
+from solver.branch_and_bound import CLOSED, FREE, OPEN, BranchAndBound, Relaxation
+from solver.validator import Validator
+
+INSTANCES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instances")
+
+
+@pytest.fixture(scope="module", params=["dense", "mapped"])
+def toy(request, tmp_path_factory):
+    path = os.path.join(INSTANCES, "toy.dzn")
+    if request.param == "dense":
+        return Parser().parse_instance(path)
+    instance = Parser(str(tmp_path_factory.mktemp("costs"))).parse_instance(path)
+    assert isinstance(instance.costs, np.memmap) and instance.costs.dtype == np.uint8
+    return instance
+
+
+def min_cost_flow(costs, demands, capacities, forbidden):
+    """Supply cost of the cheapest transportation (Bellman-Ford successive shortest paths), None if infeasible."""
+    S, K = len(demands), len(capacities)
+    source, sink = S + K, S + K + 1
+    edges = []  # [tail, head, capacity, cost], each followed by its reverse
+
+    def add(tail, head, capacity, cost):
+        edges.append([tail, head, capacity, cost])
+        edges.append([head, tail, 0, -cost])
+
+    for s in range(S):
+        add(source, s, demands[s], 0)
+        for k in range(K):
+            if (s, k) not in forbidden:
+                add(s, S + k, demands[s], costs[s][k])
+    for k in range(K):
+        add(S + k, sink, capacities[k], 0)
+
+    total, flow = 0, 0
+    while flow < sum(demands):
+        dist = [math.inf] * (S + K + 2)
+        pred = [-1] * (S + K + 2)
+        dist[source] = 0
+        for _ in range(S + K + 1):
+            changed = False
+            for i, (tail, head, capacity, cost) in enumerate(edges):
+                if capacity > 0 and dist[tail] + cost < dist[head]:
+                    dist[head], pred[head], changed = dist[tail] + cost, i, True
+            if not changed:
+                break
+        if math.isinf(dist[sink]):
+            return None, None
+        path, node = [], sink
+        while node != source:
+            path.append(pred[node])
+            node = edges[pred[node]][0]
+        amount = min(edges[i][2] for i in path)
+        for i in path:
+            edges[i][2] -= amount
+            edges[i ^ 1][2] += amount
+        total += amount * dist[sink]
+        flow += amount
+
+    flows = {}
+    for i in range(0, len(edges), 2):
+        tail, head, capacity, _ = edges[i]
+        if tail < S and edges[i ^ 1][2] > 0:
+            flows[(tail, head - S)] = edges[i ^ 1][2]
+    return total, flows
+
+
+def brute_force(instance):
+    """Optimal cost for every set of open warehouses (fixed costs included), branching on conflicts as they appear."""
+    costs = np.asarray(instance.costs, dtype=np.int64).tolist()
+    demands = [s.demand for s in instance.stores]
+    incompatible = [set(s.incompatible_stores) for s in instance.stores]
+    by_open_set = {}
+    for size in range(1, instance.num_warehouses + 1):
+        for open_ids in itertools.combinations(range(instance.num_warehouses), size):
+            capacities = [instance.warehouses[w].capacity for w in open_ids]
+            if sum(capacities) < sum(demands):
+                continue
+            sub_costs = [[row[w] for w in open_ids] for row in costs]
+            best, pending = math.inf, [frozenset()]
+            while pending:
+                forbidden = pending.pop()
+                cost, flows = min_cost_flow(sub_costs, demands, capacities, forbidden)
+                if cost is None or cost >= best:
+                    continue
+                clash = next(((a, b, k) for (a, k) in flows for (b, k2) in flows
+                              if k2 == k and b in incompatible[a]), None)
+                if clash is None:
+                    best = cost
+                else:
+                    a, b, k = clash
+                    pending += [forbidden | {(a, k)}, forbidden | {(b, k)}]
+            fixed = sum(instance.warehouses[w].fixed_cost for w in open_ids)
+            by_open_set[frozenset(open_ids)] = best + fixed
+    return by_open_set
+
+
+@pytest.fixture(scope="module")
+def toy_optimum(toy):
+    return brute_force(toy)
+
+
+def test_proves_the_brute_force_optimum(toy, toy_optimum):
+    optimum = min(toy_optimum.values())
+    result = BranchAndBound(toy).run()
+    assert result.proven
+    assert result.upper_bound == optimum
+    assert result.solution.fitness() == optimum
+    assert Validator(toy, result.solution).validate()
+    assert math.ceil(result.lower_bound - 1e-6) == optimum
+
+
+def test_lagrangian_bound_never_above_the_optimum(toy, toy_optimum):
+    relaxation = Relaxation(toy)
+    W = toy.num_warehouses
+    rng = np.random.default_rng(0)
+
+    statuses = [np.full(W, FREE, dtype=np.int8)]
+    statuses += [rng.choice([FREE, CLOSED, OPEN], size=W).astype(np.int8) for _ in range(30)]
+    for status in statuses:
+        # The best any solution can do with the fixed open warehouses open and the closed ones closed
+        consistent = [cost for open_ids, cost in toy_optimum.items()
+                      if all(w in open_ids for w in np.nonzero(status == OPEN)[0])
+                      and not any(w in open_ids for w in np.nonzero(status == CLOSED)[0])]
+        best = min(consistent, default=math.inf)
+        bound, _, _ = relaxation.lagrangian(status, None, relaxation.initial_multipliers(), math.inf, 200)
+        assert bound <= best + 1e-6, (status, bound, best)
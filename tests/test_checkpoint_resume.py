@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+import pytest
+
+from models.parser import Parser
+from models.search_random import SearchRandom
+from solver.Tweaks import Tweaks
+from solver.checkpoint import SearchCheckpoint, restore_solution
+from solver.solver import Solver
+
+INSTANCES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instances")
+
+
+class Interrupted(Exception):
+    pass
+
+
+class InterruptingCheckpoint(SearchCheckpoint):
+    """Snapshots every iteration and stops the search right after the `stop_after`-th snapshot."""
+
+    def __init__(self, path: str, stop_after: int):
+        super().__init__(path, interval=0.0)
+        self.stop_after = stop_after
+        self.saves = 0
+
+    def save(self, state: dict) -> None:
+        super().save(state)
+        self.saves += 1
+        if self.saves == self.stop_after:
+            raise Interrupted()
+
+
+@pytest.fixture(scope="module", params=["toy", "wlp01"])
+def instance(request):
+    return Parser().parse_instance(os.path.join(INSTANCES, f"{request.param}.dzn"))
+
+
+@pytest.mark.parametrize("method", ["tweak_with_iterations", "tweak_with_iterations1"])
+def test_resumed_run_matches_uninterrupted_run(instance, method, tmp_path):
+    search = getattr(Tweaks, method)
+    start = Solver.initial_solution(instance)
+    iterations = 400
+
+    uninterrupted = search(start, instance, iterations=iterations, rnd=SearchRandom(7))
+
+    path = str(tmp_path / "run.pkl")
+    with pytest.raises(Interrupted):
+        search(start, instance, iterations=iterations, rnd=SearchRandom(7),
+               checkpoint=InterruptingCheckpoint(path, stop_after=150))
+    assert os.path.exists(path)
+
+    # A fresh generator: its state comes from the checkpoint, not from the seed
+    resumed = search(start, instance, iterations=iterations, rnd=SearchRandom(12345),
+                     checkpoint=SearchCheckpoint(path, interval=3600.0))
+
+    np.testing.assert_array_equal(np.asarray(resumed.allocation), np.asarray(uninterrupted.allocation))
+    assert resumed.fitness_score == uninterrupted.fitness_score
+    assert resumed.fitness() == uninterrupted.fitness()
+
+
+def test_checkpoint_of_another_method_or_instance_is_rejected(instance, tmp_path):
+    path = str(tmp_path / "run.pkl")
+    start = Solver.initial_solution(instance)
+    with pytest.raises(Interrupted):
+        Tweaks.tweak_with_iterations(start, instance, iterations=100, rnd=SearchRandom(0),
+                                     checkpoint=InterruptingCheckpoint(path, stop_after=10))
+
+    with pytest.raises(ValueError, match="tweak_with_iterations"):
+        Tweaks.tweak_with_iterations1(start, instance, iterations=100, rnd=SearchRandom(0),
+                                      checkpoint=SearchCheckpoint(path))
+
+    other = next(parsed for parsed in (Parser().parse_instance(os.path.join(INSTANCES, f"{name}.dzn"))
+                                       for name in ("toy", "wlp01"))
+                 if parsed.content_hash() != instance.content_hash())
+    with pytest.raises(ValueError, match="another instance"):
+        Tweaks.tweak_with_iterations(Solver.initial_solution(other), other, iterations=100, rnd=SearchRandom(0),
+                                     checkpoint=SearchCheckpoint(path))
+
+
+def test_resume_keeps_only_the_time_left(instance, tmp_path):
+    path = str(tmp_path / "run.pkl")
+    start = Solver.initial_solution(instance)
+    with pytest.raises(Interrupted):
+        Tweaks.tweak_with_iterations(start, instance, iterations=1000, rnd=SearchRandom(0),
+                                     checkpoint=InterruptingCheckpoint(path, stop_after=5))
+
+    # Pretend the interrupted run had already used up its whole time limit
+    checkpoint = SearchCheckpoint(path)
+    state = checkpoint.load()
+    checkpoint.save(dict(state, elapsed=10.0))
+
+    # No time is left, so the resumed run stops before its first move
+    resumed = Tweaks.tweak_with_iterations(start, instance, iterations=1000, time_limit=10.0, rnd=SearchRandom(0),
+                                           checkpoint=SearchCheckpoint(path, interval=3600.0))
+    np.testing.assert_array_equal(np.asarray(resumed.allocation),
+                                  np.asarray(restore_solution(state["current"], instance).allocation))
@@ -0,0 +1,97 @@
+import math
+import os
+import random
+import tracemalloc
+
+import numpy as np
+import pytest
+
+import models.cost_matrix
+from models.cost_matrix import CostRows, CostVector
+from models.parser import Parser
+from models.search_random import SearchRandom
+from models.solution import Solution
+from solver.branch_and_bound import FREE, Relaxation
+from solver.decomposition import Decomposition
+
+INSTANCES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instances")
+
+
+def parse(name, cost_dir=None):
+    path = os.path.join(INSTANCES, f"{name}.dzn")
+    return Parser(cost_dir).parse_instance(path) if cost_dir else Parser().parse_instance(path)
+
+
+@pytest.fixture(scope="module", params=["toy", "wlp01"])
+def pair(request, tmp_path_factory):
+    """The same instance parsed dense (int64 lists) and memory-mapped in its narrowest dtype."""
+    dense = parse(request.param)
+    mapped = parse(request.param, str(tmp_path_factory.mktemp("costs")))
+    assert isinstance(mapped.supply_costs_matrix, CostRows)
+    assert isinstance(mapped.costs, np.memmap) and mapped.costs.dtype.itemsize < 8
+    return dense, mapped
+
+
+def test_cost_lookups_match_the_dense_matrix(pair):
+    dense, mapped = pair
+    rows = mapped.supply_costs_matrix
+    assert len(rows) == dense.num_stores
+    for store_id in range(dense.num_stores):
+        row = rows[store_id]
+        assert isinstance(row, CostVector) and rows[store_id] is row  # cached for the per-move lookups
+        assert len(row) == dense.num_warehouses
+        assert list(row) == list(dense.supply_costs_matrix[store_id])
+        for w_id in range(dense.num_warehouses):
+            value = row[w_id]
+            assert type(value) is int and value == dense.supply_costs_matrix[store_id][w_id]
+    for w_id in range(dense.num_warehouses):
+        assert list(rows.column(w_id)) == [row[w_id] for row in dense.supply_costs_matrix]
+    assert [list(row) for row in rows] == [list(row) for row in dense.supply_costs_matrix]
+
+
+def test_assign_and_unassign_costs_match_the_dense_matrix(pair):
+    dense, mapped = pair
+    rng = random.Random(0)
+    solutions = Solution(dense), Solution(mapped)
+    for step in range(2000):
+        store_id = rng.randrange(dense.num_stores)
+        w_id = rng.randrange(dense.num_warehouses)
+        supplied = solutions[0].allocation[store_id][w_id]
+        if supplied and rng.random() < 0.5:
+            amount = rng.randint(1, supplied)
+            for solution in solutions:
+                solution.unassign(store_id, w_id, amount)
+        else:
+            amount = rng.randint(1, max(1, dense.stores[store_id].demand))
+            for solution in solutions:
+                solution.assign(store_id, w_id, amount)
+        assert type(solutions[1].fitness_score) is int
+        assert solutions[0].fitness_score == solutions[1].fitness_score, step
+    assert solutions[0].fitness() == solutions[1].fitness() == solutions[1].fitness_score
+
+
+def test_decomposition_and_relaxation_keep_the_stored_matrix(pair):
+    _, mapped = pair
+    for costs in (Decomposition(mapped).costs, Relaxation(mapped).costs):
+        assert costs.dtype == mapped.costs.dtype
+        assert np.shares_memory(costs, mapped.costs)
+
+
+def test_no_dense_float_copy_of_the_cost_matrix(tmp_path, monkeypatch):
+    instance = parse("wlp08", str(tmp_path))
+    dense_float32 = instance.costs.size * 4
+    monkeypatch.setattr(models.cost_matrix, "CHUNK_BYTES", 64 * 1024)
+
+    relaxation = Relaxation(instance)
+    root = np.full(instance.num_warehouses, FREE, dtype=np.int8)
+    tracemalloc.start()
+    try:
+        multipliers = relaxation.initial_multipliers()
+        relaxation.lagrangian(root, None, multipliers, math.inf, 3)
+        assert tracemalloc.get_traced_memory()[1] < dense_float32
+
+        tracemalloc.reset_peak()
+        Decomposition(instance, cluster_size=300, kmeans_iterations=3, rnd=SearchRandom(0)).cluster_stores()
+        assert tracemalloc.get_traced_memory()[1] < dense_float32
+    finally:
+        tracemalloc.stop()
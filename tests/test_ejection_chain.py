@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from models.parser import Parser
+from models.solution import Solution
+from solver.ejection_chain import EjectionChain
+from solver.solver import Solver
+
+INSTANCES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instances")
+
+
+def chain_instance():
+    """
+    Store 0 sits in warehouse 0 at its cheapest cost, store 1 fills warehouse 1 at a high cost and would be
+    cheap in warehouse 0, which store 2 keeps open. The only improving chain starting from store 0 moves it
+    into warehouse 1 (same cost) and evicts store 1 into warehouse 0.
+    """
+    data = {
+        "Warehouses": 3,
+        "Stores": 3,
+        "Capacity": [20, 10, 10],
+        "FixedCost": [100, 100, 1000],
+        "Goods": [10, 10, 5],
+        "SupplyCost": [[1, 1, 100],
+                       [1, 50, 100],
+                       [1, 100, 100]],
+        "IncompatiblePairs": [],
+    }
+    instance = Parser.instance_from_data(data)
+    solution = Solution(instance)
+    for store_id, w_id in ((0, 0), (1, 1), (2, 0)):
+        solution.assign(store_id, w_id, instance.stores[store_id].demand)
+    return instance, solution
+
+
+class PartialCostCut(EjectionChain):
+    """The cut the regret bound replaced: partial cost plus the cheapest cost of the pending store."""
+
+    def lower_bound(self, store_id: int, depth: int) -> int:
+        return self.solution.fitness_score + self.min_cost[store_id]
+
+
+class RecordingChain(EjectionChain):
+    """Searches without pruning, checking the bound at every node against every chain completed below it."""
+
+    def __init__(self, solution: Solution, max_depth: int = 3, max_branch: int = 6):
+        super().__init__(solution, max_depth, max_branch)
+        self.bounds = []
+        self.completed = 0
+
+    def lower_bound(self, store_id: int, depth: int) -> float:
+        return -float("inf")
+
+    def extend(self, store_id: int, from_w: int, depth: int) -> None:
+        self.bounds.append(super().lower_bound(store_id, depth))
+        solution = self.solution
+        demand = self.problem.stores[store_id].demand
+        for w_id in self.problem.candidate_warehouses(store_id)[:self.max_branch]:
+            if w_id != from_w and w_id not in self.visited and solution.can_supply(store_id, w_id, demand):
+                solution.assign(store_id, w_id, demand)
+                assert max(self.bounds) <= solution.fitness_score
+                self.completed += 1
+                solution.unassign(store_id, w_id)
+        super().extend(store_id, from_w, depth)
+        self.bounds.pop()
+
+
+def test_old_cut_drops_an_improving_chain_the_bound_keeps():
+    instance, solution = chain_instance()
+    cost = solution.fitness()
+
+    assert PartialCostCut(solution).search(0) is None
+
+    chains = EjectionChain(solution)
+    moves = chains.search(0)
+    assert moves == [(0, 0, 1), (1, 1, 0)]
+    chains.apply(moves)
+    assert solution.fitness_score == solution.fitness() == cost - 10 * (50 - 1)
+
+
+@pytest.mark.parametrize("name", ["chain", "toy", "wlp01"])
+def test_bound_never_exceeds_a_completed_chain(name):
+    if name == "chain":
+        instance, solution = chain_instance()
+    else:
+        instance = Parser().parse_instance(os.path.join(INSTANCES, f"{name}.dzn"))
+        solution = Solver.initial_solution(instance)
+    chains = RecordingChain(solution, max_depth=3, max_branch=4)
+    for store_id in range(instance.num_stores):
+        chains.search(store_id)
+    assert chains.completed > 0
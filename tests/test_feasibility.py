@@ -0,0 +1,37 @@
+import pytest
+
+from models.parser import Parser
+from solver.batch_runner import CONSTRUCTORS
+
+
+def instance(demands, incompatible_pairs=()):
+    """Two warehouses of capacity 10; warehouse 0 is the cheaper one for every store."""
+    return Parser.instance_from_data({
+        "Warehouses": 2, "Stores": len(demands), "Capacity": [10, 10], "FixedCost": [5, 5], "Goods": list(demands),
+        "SupplyCost": [[1, 2] for _ in demands], "IncompatiblePairs": [list(pair) for pair in incompatible_pairs],
+    })
+
+
+@pytest.mark.parametrize("constructor", ["initial_solution", "initial_solution1", "generate_valid_solution",
+                                         "initial_solution_dsatur", "generate_valid_solution_dsatur"])
+def test_passes_the_pre_check_but_cannot_be_packed_single_source(constructor):
+    # Three stores of demand 6 fit in the total capacity of 20, but only one fits whole in each warehouse
+    packing = instance([6, 6, 6])
+    assert packing.feasibility(single_source=True).feasible
+    with pytest.raises(ValueError, match=r"store 2\b"):
+        CONSTRUCTORS[constructor](packing)
+
+
+# The store each constructor fails on: stores 0 and 1 end up together whichever warehouse store 2 takes
+CONFLICT_FAILURES = {"initial_solution": 2, "initial_solution1": 2, "generate_valid_solution": 2,
+                     "initial_solution_dsatur": 1, "generate_valid_solution_dsatur": 1, "initial_solution2": 2,
+                     "solve": 2, "solve_dsatur": 1, "best_fit_decreasing": 1}
+
+
+@pytest.mark.parametrize("constructor", sorted(CONFLICT_FAILURES))
+def test_passes_the_pre_check_but_conflicts_cannot_be_separated(constructor):
+    # Store 2 (demand 8) is incompatible with stores 0 and 1, which would have to share a warehouse: 12 > 10
+    conflicting = instance([6, 6, 8], incompatible_pairs=[(1, 3), (2, 3)])
+    assert conflicting.feasibility().feasible and conflicting.feasibility(single_source=True).feasible
+    with pytest.raises(ValueError, match=rf"store {CONFLICT_FAILURES[constructor]}\b"):
+        CONSTRUCTORS[constructor](conflicting)
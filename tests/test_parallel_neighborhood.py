@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pytest
+
+from models.parser import Parser
+from solver.parallel_neighborhood import ParallelNeighborhood
+from solver.solver import Solver
+from solver.validator import Validator
+
+INSTANCES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instances")
+
+
+@pytest.fixture(scope="module", params=["toy", "wlp01"])
+def instance(request):
+    return Parser().parse_instance(os.path.join(INSTANCES, f"{request.param}.dzn"))
+
+
+def with_split_store(instance):
+    """The constructed solution with a store that has incompatible stores split over two warehouses."""
+    solution = Solver.initial_solution(instance)
+    for store in instance.stores:
+        (w_id, amount), = solution.store_suppliers[store.id].items()
+        if not store.incompatible_stores or amount < 2:
+            continue
+        for other in range(instance.num_warehouses):
+            if other != w_id and solution.can_supply(store.id, other, amount // 2):
+                solution.unassign(store.id, w_id)
+                solution.assign(store.id, w_id, amount - amount // 2)
+                solution.assign(store.id, other, amount // 2)
+                return solution
+    pytest.fail("no store to split")
+
+
+def descend(instance, start, workers, block_size=None):
+    with ParallelNeighborhood(instance, workers=workers, block_size=block_size) as neighborhood:
+        return neighborhood.descend(start, max_steps=200)
+
+
+def assert_same(first, second):
+    np.testing.assert_array_equal(np.asarray(first.allocation), np.asarray(second.allocation))
+    assert first.fitness_score == second.fitness_score
+
+
+@pytest.mark.parametrize("start", ["constructed", "split"])
+def test_parallel_descent_matches_serial(instance, start):
+    solution = Solver.initial_solution(instance) if start == "constructed" else with_split_store(instance)
+    serial = descend(instance, solution, workers=1)
+    assert serial.fitness_score < solution.fitness_score
+    assert Validator(instance, serial).validate()
+    assert serial.fitness() == serial.fitness_score
+
+    assert_same(descend(instance, solution, workers=2), serial)
+    # Any split into blocks picks the same moves
+    assert_same(descend(instance, solution, workers=1, block_size=7), serial)
+
+
+def test_reduced_instance_moves_stores_to_candidates_only(instance):
+    reduced = instance.reduce(3)
+    start = Solver.initial_solution(reduced)
+    serial = descend(reduced, start, workers=1)
+    assert Validator(reduced, serial).validate()
+    for store_id, suppliers in enumerate(serial.store_suppliers):
+        if suppliers != start.store_suppliers[store_id]:
+            assert set(suppliers) <= set(reduced.candidate_warehouses(store_id))
+    assert_same(descend(reduced, start, workers=2), serial)
+
+
+def test_shared_state_has_no_store_by_warehouse_array(instance):
+    with ParallelNeighborhood(instance, workers=1) as neighborhood:
+        neighborhood.load(Solver.initial_solution(instance))
+        sizes = {key: array.size for key, array in neighborhood.arrays.items() if key != "costs"}
+    assert max(sizes.values()) < instance.num_stores * instance.num_warehouses, sizes
@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+from models.parser import Parser
+from models.search_random import SearchRandom
+from solver.path_relinking import ElitePathRelinking
+from solver.solver import Solver
+from solver.validator import Validator
+
+INSTANCES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instances")
+
+
+@pytest.fixture(scope="module", params=["toy", "wlp01"])
+def instance(request):
+    return Parser().parse_instance(os.path.join(INSTANCES, f"{request.param}.dzn"))
+
+
+@pytest.mark.parametrize("pool_size", [2, 4])
+def test_relinking_without_time_limit_is_bounded(instance, pool_size):
+    search = ElitePathRelinking(instance, pool_size=pool_size, min_distance=1, restarts=4, iterations=200,
+                                time_limit=None, rnd=SearchRandom(3))
+    assert search.max_relinks == pool_size * (pool_size - 1)
+    result = search.run(Solver.initial_solution(instance))
+    assert 0 < search.relinks <= pool_size * (pool_size - 1)
+    assert Validator(instance, result).validate()
+
+
+def test_explicit_max_relinks_stops_phase_two(instance):
+    search = ElitePathRelinking(instance, pool_size=4, min_distance=1, restarts=4, iterations=200,
+                                time_limit=None, rnd=SearchRandom(3), max_relinks=1)
+    search.run(Solver.initial_solution(instance))
+    assert search.relinks == 1
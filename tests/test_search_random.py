@@ -0,0 +1,67 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from models.parser import Parser
+from models.search_random import SearchRandom
+from solver.Tweaks import Tweaks
+from solver.solver import Solver
+
+INSTANCES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instances")
+
+
+def draws(rnd: SearchRandom, count: int = 300) -> list:
+    """A mix of every batched and derived draw, crossing several batch boundaries for small batch sizes."""
+    values = []
+    for i in range(count):
+        values.append(rnd.random())
+        values.append(rnd.store_index(10 if i % 50 < 40 else 7))
+        values.append(rnd.randint(1, 6))
+        values.append(rnd.choice("abcdef"))
+        values.append(tuple(rnd.sample(range(40), 3)))
+    values.append(tuple(rnd.uniforms(5).tolist()))
+    return values
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, 4096])
+def test_seeded_draws_are_reproducible(batch_size):
+    assert draws(SearchRandom(42, batch_size)) == draws(SearchRandom(42, batch_size))
+    assert draws(SearchRandom(42, batch_size)) != draws(SearchRandom(43, batch_size))
+    assert draws(SearchRandom(42, batch_size).spawn()) == draws(SearchRandom(42, batch_size).spawn())
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, 4096])
+@pytest.mark.parametrize("consumed", [0, 3, 100, 1000])
+def test_state_round_trips_in_the_middle_of_a_batch(batch_size, consumed):
+    rnd = SearchRandom(5, batch_size)
+    draws(rnd, consumed)
+    state = pickle.loads(pickle.dumps(rnd.getstate()))
+    expected = draws(rnd)
+
+    # Restored into a generator with another seed and nothing buffered
+    restored = SearchRandom(999, batch_size)
+    restored.setstate(state)
+    assert draws(restored) == expected
+
+    # Restored into a generator that has buffered batches of its own
+    busy = SearchRandom(999, batch_size)
+    draws(busy, 17)
+    busy.setstate(state)
+    assert draws(busy) == expected
+
+
+@pytest.fixture(scope="module", params=["toy", "wlp01"])
+def instance(request):
+    return Parser().parse_instance(os.path.join(INSTANCES, f"{request.param}.dzn"))
+
+
+@pytest.mark.parametrize("method", ["tweak_with_iterations", "tweak_with_iterations1"])
+def test_seeded_run_is_reproducible(instance, method):
+    search = getattr(Tweaks, method)
+    start = Solver.initial_solution(instance)
+    first = search(start, instance, iterations=300, rnd=SearchRandom(11))
+    second = search(start, instance, iterations=300, rnd=SearchRandom(11))
+    np.testing.assert_array_equal(np.asarray(first.allocation), np.asarray(second.allocation))
+    assert first.fitness_score == second.fitness_score
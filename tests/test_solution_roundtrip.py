@@ -0,0 +1,81 @@
+import os
+
+import numpy as np
+import pytest
+
+from models.parser import Parser
+from models.solution import Solution
+from solver.solver import Solver
+
+INSTANCES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instances")
+
+
+@pytest.fixture(scope="module", params=["toy", "wlp01"])
+def instance(request):
+    return Parser().parse_instance(os.path.join(INSTANCES, f"{request.param}.dzn"))
+
+
+def allocations(instance):
+    """A constructed solution, one with a store split over two warehouses and zero rows, and an empty one."""
+    constructed = Solver.initial_solution(instance)
+
+    split = Solution(instance)
+    demand = instance.stores[0].demand
+    split.assign(0, 0, demand // 2)
+    split.assign(0, 1, demand - demand // 2)
+    split.assign(1, 2, instance.stores[1].demand)  # every other store keeps a zero row
+
+    return {"constructed": constructed, "split": split, "empty": Solution(instance)}
+
+
+def matrix(solution):
+    return np.asarray(solution.allocation, dtype=np.int64)
+
+
+def test_text_round_trip(instance, tmp_path):
+    for name, solution in allocations(instance).items():
+        path = tmp_path / f"{name}.txt"
+        solution.export(str(path))
+        parsed = Solution.parse_allocation_text(path.read_text(), instance.num_stores, instance.num_warehouses)
+        np.testing.assert_array_equal(parsed, matrix(solution), err_msg=name)
+
+        loaded = Solution.from_solution_data(path.read_text(), instance)
+        np.testing.assert_array_equal(matrix(loaded), matrix(solution), err_msg=name)
+        assert loaded.fitness() == solution.fitness(), name
+
+
+def test_text_format_matches_row_by_row_layout(instance):
+    # The spliced formatter must produce exactly the '[(a,b,..)\n(..)]' layout
+    solution = allocations(instance)["split"]
+    rows = ['(' + ','.join(str(v) for v in row) + ')' for row in solution.allocation]
+    assert Solution.format_allocation_text(matrix(solution)) == '[' + '\n'.join(rows) + ']'
+
+
+def test_sparse_round_trip(instance, tmp_path):
+    for name, solution in allocations(instance).items():
+        path = tmp_path / name / "solution.npz"
+        solution.export_sparse(str(path))
+        loaded = Solution.from_sparse(str(path), instance)
+        np.testing.assert_array_equal(matrix(loaded), matrix(solution), err_msg=name)
+        assert loaded.fitness() == solution.fitness(), name
+        assert loaded.open_warehouses == solution.open_warehouses, name
+
+
+def test_sparse_and_text_agree(instance, tmp_path):
+    solution = allocations(instance)["split"]
+    solution.export(str(tmp_path / "solution.txt"))
+    solution.export_sparse(str(tmp_path / "solution.npz"))
+    from_text = Solution.from_solution_data((tmp_path / "solution.txt").read_text(), instance)
+    from_sparse = Solution.from_sparse(str(tmp_path / "solution.npz"), instance)
+    np.testing.assert_array_equal(matrix(from_text), matrix(from_sparse))
+
+
+def test_wrong_shapes_are_rejected(instance):
+    text = Solution.format_allocation_text(np.zeros((instance.num_stores, instance.num_warehouses), dtype=np.int64))
+    with pytest.raises(ValueError):
+        Solution.parse_allocation_text(text, instance.num_stores + 1, instance.num_warehouses)
+
+    arrays = allocations(instance)["split"].to_sparse_arrays()
+    arrays["shape"] = np.array([instance.num_stores, instance.num_warehouses + 1], dtype=np.int64)
+    with pytest.raises(ValueError):
+        Solution.from_sparse_arrays(arrays, instance)
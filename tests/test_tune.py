@@ -0,0 +1,31 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.tune import Race, evaluate
+
+TOY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instances", "toy.dzn")
+GOOD = {"temperature": 100.0, "cooling": 0.99, "iterations": 100}
+BAD = {"no_such_parameter": 1, "iterations": 100}
+
+
+def test_failed_run_logs_the_traceback(capsys):
+    assert evaluate("tweak_with_iterations1", BAD, TOY, 0, 1.0) == float("inf")
+    out = capsys.readouterr().out
+    assert "Traceback (most recent call last)" in out and "no_such_parameter" in out
+
+
+def test_race_stops_when_every_configuration_fails(capsys):
+    with ThreadPoolExecutor(1) as executor:
+        race = Race("tweak_with_iterations1", [BAD, dict(BAD, no_such_parameter=2)], [(TOY, 0), (TOY, 1)], 1.0,
+                    executor, min_blocks=1)
+        with pytest.raises(RuntimeError, match="Every configuration of tweak_with_iterations1 failed on toy seed 0"):
+            race.run()
+
+
+def test_race_winner_is_a_configuration_that_ran():
+    with ThreadPoolExecutor(1) as executor:
+        best, alive = Race("tweak_with_iterations1", [BAD, GOOD], [(TOY, seed) for seed in range(3)], 1.0,
+                           executor, min_blocks=1).run()
+    assert best == GOOD
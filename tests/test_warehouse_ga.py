@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import pytest
+
+from models.parser import Parser
+from solver.warehouse_ga import WarehouseGA
+
+INSTANCES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instances")
+
+
+@pytest.fixture(scope="module", params=["toy", "wlp01"])
+def instance(request):
+    return Parser().parse_instance(os.path.join(INSTANCES, f"{request.param}.dzn"))
+
+
+def assert_same_decode(ga, state, open_mask):
+    full = ga.decode_full(open_mask)
+    np.testing.assert_array_equal(state.assigned, full.assigned)
+    assert state.unplaced == full.unplaced
+    assert (state.supply_cost, state.fixed_cost) == (full.supply_cost, full.fixed_cost)
+    np.testing.assert_array_equal(state.best, full.best)
+    np.testing.assert_array_equal(state.second, full.second)
+    assert state.remaining == full.remaining
+    assert state.members == full.members
+    if not state.unplaced:
+        assert ga.to_solution(state).fitness() == state.supply_cost + state.fixed_cost
+
+
+def test_incremental_decode_matches_full_decode(instance):
+    rng = np.random.default_rng(0)
+    num_warehouses = instance.num_warehouses
+    ga = WarehouseGA(instance, max_flips=num_warehouses)
+
+    for trial in range(100):
+        parent = (rng.random(num_warehouses) < rng.uniform(0.3, 0.9)).astype(int).tolist()
+        ga.fitness(parent)
+
+        # A few generations of children, each decoded from the cached state of the one before
+        for generation in range(3):
+            child = list(parent)
+            for w_id in rng.choice(num_warehouses, size=rng.integers(1, min(num_warehouses, 6) + 1), replace=False):
+                child[w_id] ^= 1
+            if bytes(child) in ga.cache:
+                continue
+
+            full_decodes = ga.full_decodes
+            fitness = ga.fitness(child, parent)
+            assert ga.full_decodes == full_decodes, "the child was not decoded from its parent"
+
+            state = ga.states[bytes(child)]
+            assert_same_decode(ga, state, np.array(child, dtype=bool))
+            unplaced = sum(ga.demands[s] for s in state.unplaced)
+            assert fitness == -(state.supply_cost + state.fixed_cost + ga.unplaced_penalty * unplaced)
+            parent = child
+
+
+def test_too_many_flips_decode_from_scratch(instance):
+    ga = WarehouseGA(instance, max_flips=1)
+    parent = [1] * instance.num_warehouses
+    child = [0, 0] + parent[2:]
+    ga.fitness(parent)
+    ga.fitness(child, parent)
+    assert (ga.incremental_decodes, ga.full_decodes) == (0, 2)